@@ -1,4 +1,5 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, make_response, send_file, send_from_directory
+from flask import Flask, Response, render_template, request, redirect, url_for, session, jsonify, make_response, send_file, g
+from markupsafe import Markup
 import random
 import threading
 import webbrowser
@@ -10,82 +11,842 @@ import sys
 import time
 import json
 from datetime import datetime, timedelta
+from collections import deque
+from itertools import islice
 import re
-import shutil
 import glob
+import queue
+import bisect
+import heapq
+import sqlite3
+import hashlib
+import gzip
+import contextlib
+import io
+
+try:
+    import brotli  # optional: zusätzlich Brotli-Varianten der statischen Dateien
+except ImportError:
+    brotli = None
+
+try:
+    import fcntl  # nur POSIX: Dateisperre, damit nur ein Prozess das State-Journal schreibt
+except ImportError:
+    fcntl = None
+
+SECRET_KEY_FILE = os.environ.get('SECRET_KEY_FILE', '.secret_key')
+
+def load_secret_key():
+    """Session-Secret, das alle Worker-Prozesse teilen: SECRET_KEY aus der Umgebung,
+    sonst eine einmalig erzeugte Datei (der erste Worker legt sie an, die anderen lesen sie)"""
+    secret = os.environ.get('SECRET_KEY')
+    if secret:
+        return secret
+    try:
+        fd = os.open(SECRET_KEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        for _ in range(50):
+            with open(SECRET_KEY_FILE, 'r', encoding='utf-8') as f:
+                secret = f.read().strip()
+            if secret:
+                return secret
+            time.sleep(0.1)  # ein anderer Worker schreibt die Datei gerade
+        print(f"[load_secret_key] Error: {SECRET_KEY_FILE} is empty, using a per-process key")
+        return secrets.token_hex(32)
+    except OSError as e:
+        print(f"[load_secret_key] Error: {e}")
+        return secrets.token_hex(32)
+    secret = secrets.token_hex(32)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(secret)
+    return secret
 
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)
+app.secret_key = load_secret_key()
 
 CONTROL_PASSWORD = "default"
 CONTROL_USERS = {"Control", "Admin"}
 
-LEADERBOARD_FILE = 'leaderboard.json'
-leaderboard = {
-    'players': {}, 
-    'impostors': {}  
-}
-
-players = []
-game_players = {}
-player_sessions = {}
-session_heartbeats = {}
-game_started = False
-assigned_words = {}
-spicy_mode = False
-force_spicy = False
-revealed = False
-lobby_messages = []  # Separate chat for lobby
-game_messages = []   # Separate chat for game
-current_starter = ""
-votes = {}
-voting_active = False
-vote_results = {}
-game_ended = False
-winning_word = ""
-impostor_guess_used = False
-start_votes = set()
+LEADERBOARD_FILE = 'leaderboard.json'  # altes Format, wird beim ersten Start einmalig übernommen
+LEADERBOARD_DB_FILE = os.environ.get('LEADERBOARD_DB', 'leaderboard.db')
+LEADERBOARD_ROLES = ('players', 'impostors')
+LEADERBOARD_PAGE_MAX = 100  # höchstens so viele Einträge pro Seite von /api/leaderboard?limit=
+LEADERBOARD_NEIGHBOURS = 2  # Standard für /api/leaderboard?around=: so viele Plätze davor und danach
+LEADERBOARD_BACKUP_DIR = os.environ.get('LEADERBOARD_BACKUP_DIR', 'leaderboard_backups')
+LEADERBOARD_BACKUP_KEEP = int(os.environ.get('LEADERBOARD_BACKUP_KEEP', 20))  # die neuesten N Backups bleiben immer
+LEADERBOARD_BACKUP_KEEP_DAYS = int(os.environ.get('LEADERBOARD_BACKUP_KEEP_DAYS', 30))  # dazu das jüngste Backup jedes dieser Tage
+LEADERBOARD_BACKUP_INTERVAL = int(os.environ.get('LEADERBOARD_BACKUP_INTERVAL', 6 * 3600))  # automatische Backups, 0 = aus
+LEGACY_BACKUP_PATTERNS = ('leaderboard_bckp', 'leaderboard_bckp_*.json')  # alte Backups im Arbeitsverzeichnis
+leaderboard_lock = threading.Lock()
+leaderboard_seen_version = None  # zuletzt gesehene Version im Store, für das 'leaderboard'-Event
+leaderboard_response = {'version': None, 'body': None, 'etag': None}
+
+DEFAULT_ROOM_ID = 'main'
+MAX_ROOMS = 100
+ROOM_IDLE_TIMEOUT = 30 * 60
+
+rooms = {}  # room_id -> GameRoom
+rooms_lock = threading.Lock()
 
 HEARTBEAT_TIMEOUT = 6
 CLEANUP_INTERVAL = 6
+STATUS_LONG_POLL_TIMEOUT = 25
+
+KICKED_SESSION_TTL = 10 * 60  # so lange merkt sich ein Raum gekickte Sessions
+
+CHAT_BUFFER_SIZE = 200  # Nachrichten pro Chat, ältere fallen heraus
+CHAT_STATUS_LIMIT = 50  # höchstens so viele Nachrichten pro /api/status-Antwort
+STATUS_DELTA_HISTORY = 32  # so viele Versionen zurück gibt es Diffs, ältere Clients laden komplett neu
+
+CONSOLE_LOG_FILE = 'server.log'
+CONSOLE_TAIL_LINES = 40  # so viele Zeilen beim ersten Abruf bzw. nach Rotation
+CONSOLE_TAIL_BYTES = 16 * 1024  # dafür wird nur dieses Stück vom Dateiende gelesen
+CONSOLE_MAX_BYTES = 64 * 1024  # höchstens so viel neue Ausgabe pro Antwort
+
+STATE_EPOCH = secrets.token_hex(4)  # unterscheidet ETags über Neustarts hinweg
+
+STREAM_KEEPALIVE = 3
+STREAM_MAX_AGE = 300
+STREAM_QUEUE_SIZE = 100
+# Offene SSE-Streams und wartende Long-Polls belegen je einen Gunicorn-Thread: höchstens so viele
+# pro Worker (Hälfte von --threads 64 im Procfile), darüber 503 bzw. sofortige Antwort
+STREAM_MAX_OPEN = int(os.environ.get('STREAM_MAX_OPEN', 32))
+STREAM_RETRY_AFTER = 2  # Sekunden bis zum nächsten Abruf, wenn kein Platz frei war
+
+REALTIME_PORT = int(os.environ.get('REALTIME_PORT', 0)) or None  # WebSocket-Modus (realtime.py), aus wenn nicht gesetzt
+realtime_server = None
+
+stream_subscribers = {}  # queue.Queue -> (room_id, session_id)
+stream_lock = threading.Lock()
+stream_slots = threading.BoundedSemaphore(STREAM_MAX_OPEN)
 
 announce_spicy_mode = True
 
-kicked_sessions = set()
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # gesetzt: /metrics nur mit "Authorization: Bearer <token>"
+METRICS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)  # Sekunden
 
-BACKUP_PATTERN = 'leaderboard_bckp_*.json'
+def format_metric_labels(names, values):
+    """Label-Teil einer Prometheus-Zeile, z.B. {route="/",status="200"}"""
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+class MetricCounter:
+    """Prometheus-Counter mit Labels. Zählt nur in diesem Prozess (jeder Worker eigene Werte)."""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.values = {}  # Label-Werte (Tupel) -> Zählerstand
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def total(self):
+        with self.lock:
+            return sum(self.values.values())
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_metric_labels(self.labels, label_values)} {value}")
+        return lines
+
+class MetricHistogram:
+    """Prometheus-Histogramm (Sekunden) mit Labels; merkt sich zusätzlich den letzten Wert"""
+
+    def __init__(self, name, help_text, labels=(), buckets=METRICS_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}  # Label-Werte -> [Anzahl je Bucket, Summe, Anzahl, letzter Wert]
+        self.lock = threading.Lock()
+
+    def observe(self, seconds, *label_values):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            entry = self.values.get(label_values)
+            if entry is None:
+                entry = self.values[label_values] = [[0] * len(self.buckets), 0.0, 0, 0.0]
+            if index < len(self.buckets):
+                entry[0][index] += 1
+            entry[1] += seconds
+            entry[2] += 1
+            entry[3] = seconds
+
+    @contextlib.contextmanager
+    def time(self, *label_values):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *label_values)
+
+    def summary(self):
+        """Anzahl, Mittelwert und letzter Wert (ms) über alle Labels, für das Control Panel"""
+        with self.lock:
+            count = sum(entry[2] for entry in self.values.values())
+            total = sum(entry[1] for entry in self.values.values())
+            last = max(self.values.values(), key=lambda entry: entry[2], default=None)
+        return {
+            'count': count,
+            'mean_ms': round(total / count * 1000, 3) if count else 0.0,
+            'last_ms': round(last[3] * 1000, 3) if last else 0.0
+        }
 
-def load_leaderboard():
-    """Lädt das Leaderboard aus der JSON-Datei"""
-    global leaderboard
-    if os.path.exists(LEADERBOARD_FILE):
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for label_values, (bucket_counts, total, count, _) in sorted(self.values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    cumulative += bucket_count
+                    labels = format_metric_labels(self.labels + ('le',), label_values + (bound,))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = format_metric_labels(self.labels + ('le',), label_values + ('+Inf',))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = format_metric_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+http_requests_total = MetricCounter('impostor_http_requests_total', 'HTTP-Requests pro Route und Status',
+                                    ('method', 'route', 'status'))
+http_request_duration = MetricHistogram('impostor_http_request_duration_seconds', 'Antwortzeit pro Route',
+                                        ('method', 'route'))
+status_polls_total = MetricCounter('impostor_status_polls_total', '/api/status-Abfragen nach Art und Ergebnis',
+                                   ('mode', 'result'))
+cleanup_duration = MetricHistogram('impostor_cleanup_duration_seconds', 'Dauer eines Cleanup-Durchlaufs')
+leaderboard_save_duration = MetricHistogram('impostor_leaderboard_save_duration_seconds',
+                                            'Dauer einer Leaderboard-Schreibtransaktion')
+public_ip_duration = MetricHistogram('impostor_public_ip_lookup_seconds', 'Dauer der Abfrage der öffentlichen IP',
+                                     ('result',))
+
+def publish_event(event_type, data, room_id=None, session_id=None):
+    """Verteilt ein Event an die offenen /api/stream Verbindungen eines Raums
+    (ohne room_id an alle, mit session_id nur an diese Session)"""
+    with stream_lock:
+        subscribers = list(stream_subscribers.items())
+    for subscriber_queue, (subscriber_room, subscriber_session) in subscribers:
+        if room_id and subscriber_room != room_id:
+            continue
+        if session_id and subscriber_session != session_id:
+            continue
         try:
-            with open(LEADERBOARD_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if 'players' not in data:
-                    data['players'] = {}
-                if 'impostors' not in data:
-                    data['impostors'] = {}
-                leaderboard = data
-        except (OSError, json.JSONDecodeError, TypeError, ValueError) as e:
-            print(f"[load_leaderboard] Error loading leaderboard: {e}")
-            save_leaderboard()
-    else:
-        save_leaderboard()
+            subscriber_queue.put_nowait((event_type, data))
+        except queue.Full:
+            # Client hängt hinterher: Rückstand verwerfen, der Client lädt den Status neu
+            with subscriber_queue.mutex:
+                subscriber_queue.queue.clear()
+            subscriber_queue.put_nowait(('state', {}))
+
+def format_sse(event_type, data):
+    """Formatiert ein Server-Sent Event"""
+    return f"event: {event_type}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+STATE_BACKEND = os.environ.get('STATE_BACKEND', 'memory')
+STATE_DB_FILE = os.environ.get('STATE_DB', 'state.db')
+STATE_POLL_INTERVAL = 0.5
+STATE_JOURNAL_FILE = os.environ.get('STATE_JOURNAL', 'state.journal')
+STATE_JOURNAL_MAX_BYTES = 1024 * 1024  # größer -> Snapshot schreiben und Journal leeren
+STATE_SNAPSHOT_INTERVAL = 300  # spätestens dann ebenfalls, sofern das Journal nicht leer ist
+STATE_JOURNAL_LOCK_TIMEOUT = 30  # so lange auf einen alten Prozess warten, der das Journal noch hält
+JOURNAL_CHAT_FIELDS = ('lobby_messages', 'game_messages')
+
+class MemoryStateStore:
+    """Zustand im Speicher dieses Prozesses – die GameRoom-Objekte sind selbst der Zustand.
+    Standard-Backend, reicht für genau einen Worker."""
+    shared = False
+    poll_interval = None
+    epoch = STATE_EPOCH  # Raumversionen beginnen nach jedem Neustart von vorn
+
+    def begin(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    @contextlib.contextmanager
+    def transaction(self):
+        yield
+
+    def room_version(self, room_id):
+        return None
+
+    def load_room(self, room_id):
+        return None
+
+    def save_room(self, room):
+        pass
+
+    def delete_room(self, room_id):
+        pass
+
+    def list_room_ids(self):
+        return []
+
+    def touch_session(self, room_id, session_id):
+        pass
+
+    def load_heartbeats(self, room_id, session_ids=None):
+        return {}
+
+    def delete_heartbeats(self, room_id, session_ids):
+        pass
+
+    def restore(self):
+        """Gespeicherte Räume als {room_id: (version, data)} – im Speicher gibt es nach einem Neustart keine"""
+        return {}
+
+
+def journal_diff(old, new):
+    """Geänderte Felder eines Raumzustands (to_dict) für das Journal. Chats, die nur gewachsen
+    sind, werden als <feld>+ mit den neuen Nachrichten geschrieben statt komplett."""
+    diff = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if key in JOURNAL_CHAT_FIELDS and previous:
+            # Chats ändern sich nur durch Anhängen oder Leeren: Generation und next_id genügen zum Vergleich
+            if (previous['generation'], previous['next_id']) == (value['generation'], value['next_id']):
+                continue
+            if previous['generation'] == value['generation']:
+                appended = [message for message in value['messages'] if message['id'] >= previous['next_id']]
+                if appended and appended[-1]['id'] + 1 == value['next_id']:
+                    diff[key + '+'] = appended
+                    continue
+        elif previous == value:
+            continue
+        diff[key] = value
+    return diff
+
+def apply_journal_diff(state, diff):
+    """Gegenstück zu journal_diff()"""
+    for key, value in diff.items():
+        if key.endswith('+'):
+            chat = state[key[:-1]]
+            chat['messages'] = (chat['messages'] + value)[-CHAT_BUFFER_SIZE:]
+            chat['next_id'] = value[-1]['id'] + 1
+        else:
+            state[key] = value
+
+
+class JournalStateStore(MemoryStateStore):
+    """Wie MemoryStateStore, hält aber jede Raumänderung (Beitritt, Start, Vote, Tipp, Kick,
+    Reset, Chat ...) als Zeile in einem Append-only-Journal fest: nur die geänderten Felder
+    gegenüber dem zuletzt geschriebenen Stand. Ab STATE_JOURNAL_MAX_BYTES bzw. nach
+    STATE_SNAPSHOT_INTERVAL wird ein kompakter Snapshot aller Räume geschrieben (Temp-Datei,
+    fsync, rename) und das Journal geleert. Ein neu gestarteter Prozess liest Snapshot plus
+    Journal und setzt die Runden fort. Nur für genau einen Worker."""
+
+    def __init__(self, path):
+        self.path = path
+        self.snapshot_path = path + '.snapshot'
+        self.lock = threading.Lock()
+        self.last = {}  # room_id -> (version, zuletzt geschriebener Zustand)
+        self.journal = None
+        self.journal_size = 0
+        self.last_snapshot = time.monotonic()
+        self.lock_file = None
+
+    def acquire_lock(self):
+        """Sperrt das Journal für diesen Prozess; wartet auf einen alten Worker, der noch läuft"""
+        if fcntl is None:
+            return True
+        self.lock_file = open(self.path + '.lock', 'a')
+        deadline = time.monotonic() + STATE_JOURNAL_LOCK_TIMEOUT
+        while True:
+            try:
+                fcntl.flock(self.lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except OSError:
+                if time.monotonic() > deadline:
+                    return False
+                time.sleep(0.1)
+
+    def restore(self):
+        """Liest Snapshot und Journal (eine abgerissene letzte Zeile wird verworfen)
+        und öffnet das Journal zum Anhängen"""
+        if not self.acquire_lock():
+            print(f"[restore] Error: {self.path} wird von einem anderen Prozess benutzt, Journal deaktiviert")
+            return {}
+        states = {}
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                for room_id, entry in json.load(f)['rooms'].items():
+                    states[room_id] = (entry['version'], entry['data'])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[restore] Error reading snapshot: {e}")
+        valid_size = 0
+        try:
+            with open(self.path, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    if not line.endswith(b'\n'):
+                        break
+                    self.replay(states, record)
+                    valid_size += len(line)
+        except FileNotFoundError:
+            pass
+        self.journal = open(self.path, 'ab')
+        if self.journal.tell() != valid_size:
+            print(f"[restore] Error: Journal ab Byte {valid_size} unvollständig, Rest verworfen")
+            self.journal.truncate(valid_size)
+        self.journal_size = valid_size
+        self.last = {room_id: (version, data) for room_id, (version, data) in states.items()}
+        return {room_id: (version, json.loads(json.dumps(data))) for room_id, (version, data) in states.items()}
+
+    def replay(self, states, record):
+        room_id = record['r']
+        if record.get('c'):
+            states.pop(room_id, None)
+        elif 's' in record:
+            if room_id not in states or record['v'] > states[room_id][0]:
+                states[room_id] = (record['v'], record['s'])
+        elif room_id in states and record['v'] > states[room_id][0]:
+            # Einträge bis zur Snapshot-Version sind schon enthalten (Abbruch zwischen Snapshot und Leeren)
+            apply_journal_diff(states[room_id][1], record['d'])
+            states[room_id] = (record['v'], states[room_id][1])
+
+    def append(self, record):
+        line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+        self.journal.write(line)
+        self.journal.flush()  # im Betriebssystem, übersteht den Absturz des Prozesses
+        self.journal_size += len(line)
+
+    def save_room(self, room):
+        if self.journal is None:
+            return
+        data = room.to_dict()
+        chats = {field: data.pop(field) for field in JOURNAL_CHAT_FIELDS}
+        data = json.loads(json.dumps(data, ensure_ascii=False))  # eigene Kopie, to_dict() liefert teils die lebenden Objekte
+        # ChatBuffer.to_dict() liefert schon eine neue Liste, die Nachrichten selbst ändern sich nicht mehr
+        data.update(chats)
+        with self.lock:
+            previous = self.last.get(room.room_id)
+            try:
+                if previous is None:
+                    self.append({'r': room.room_id, 'v': room.version, 's': data})
+                else:
+                    diff = journal_diff(previous[1], data)
+                    if not diff:
+                        return
+                    self.append({'r': room.room_id, 'v': room.version, 'd': diff})
+                self.last[room.room_id] = (room.version, data)
+                if self.journal_size > STATE_JOURNAL_MAX_BYTES or \
+                        time.monotonic() - self.last_snapshot > STATE_SNAPSHOT_INTERVAL:
+                    self.compact()
+            except OSError as e:
+                print(f"[save_room] Error: {e}")
+
+    def delete_room(self, room_id):
+        if self.journal is None:
+            return
+        with self.lock:
+            if self.last.pop(room_id, None) is not None:
+                try:
+                    self.append({'r': room_id, 'c': 1})
+                except OSError as e:
+                    print(f"[delete_room] Error: {e}")
+
+    def compact(self):
+        """Snapshot aller zuletzt geschriebenen Zustände, danach Journal leeren. Aufruf mit self.lock."""
+        snapshot = {'rooms': {room_id: {'version': version, 'data': data}
+                              for room_id, (version, data) in self.last.items()}}
+        tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self.journal.truncate(0)
+        self.journal_size = 0
+        self.last_snapshot = time.monotonic()
+
+
+class SqliteStateStore:
+    """Zustand in einer gemeinsamen SQLite-Datei (WAL), damit mehrere Worker-Prozesse
+    dieselben Räume, Spieler, Heartbeats, Chats und Votes sehen (das Leaderboard liegt
+    ohnehin in seiner eigenen Datenbank, siehe LeaderboardStore).
+    Schreibende Requests laufen in einer Transaktion (BEGIN IMMEDIATE), die Worker
+    übernehmen neuere Raumversionen beim nächsten Zugriff."""
+    shared = True
+    poll_interval = STATE_POLL_INTERVAL
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.heartbeat_writes = {}  # (room_id, session_id) -> time.monotonic() des letzten Schreibens
+        with self.transaction() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS rooms (room_id TEXT PRIMARY KEY, version INTEGER NOT NULL, data TEXT NOT NULL)')
+            db.execute('CREATE TABLE IF NOT EXISTS heartbeats (room_id TEXT NOT NULL, session_id TEXT NOT NULL, '
+                       'last_seen REAL NOT NULL, PRIMARY KEY (room_id, session_id))')
+            db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, version INTEGER NOT NULL, data TEXT NOT NULL)')
+            # Raumversionen gelten für alle Worker und überleben Neustarts, solange die Datei besteht
+            db.execute("INSERT OR IGNORE INTO meta (key, version, data) VALUES ('epoch', 0, ?)", (secrets.token_hex(4),))
+            self.epoch = db.execute("SELECT data FROM meta WHERE key = 'epoch'").fetchone()[0]
+
+    def connection(self):
+        """Eine Verbindung pro Thread"""
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self.local.db = db
+            self.local.depth = 0
+        return db
+
+    def begin(self):
+        db = self.connection()
+        if self.local.depth == 0:
+            db.execute('BEGIN IMMEDIATE')
+        self.local.depth += 1
+        return db
+
+    def commit(self):
+        self.local.depth -= 1
+        if self.local.depth == 0:
+            self.local.db.execute('COMMIT')
+
+    def rollback(self):
+        self.local.depth -= 1
+        if self.local.depth == 0:
+            self.local.db.execute('ROLLBACK')
+
+    @contextlib.contextmanager
+    def transaction(self):
+        db = self.begin()
+        try:
+            yield db
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def room_version(self, room_id):
+        row = self.connection().execute('SELECT version FROM rooms WHERE room_id = ?', (room_id,)).fetchone()
+        return row[0] if row else None
+
+    def load_room(self, room_id):
+        row = self.connection().execute('SELECT version, data FROM rooms WHERE room_id = ?', (room_id,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def save_room(self, room):
+        self.connection().execute('INSERT OR REPLACE INTO rooms (room_id, version, data) VALUES (?, ?, ?)',
+                                  (room.room_id, room.version, json.dumps(room.to_dict(), ensure_ascii=False)))
+
+    def delete_room(self, room_id):
+        with self.transaction() as db:
+            db.execute('DELETE FROM rooms WHERE room_id = ?', (room_id,))
+            db.execute('DELETE FROM heartbeats WHERE room_id = ?', (room_id,))
+
+    def list_room_ids(self):
+        return [row[0] for row in self.connection().execute('SELECT room_id FROM rooms')]
+
+    def touch_session(self, room_id, session_id):
+        """Schreibt Heartbeats gedrosselt, nicht bei jedem einzelnen Poll"""
+        key = (room_id, session_id)
+        now = time.monotonic()
+        if now - self.heartbeat_writes.get(key, 0) < HEARTBEAT_TIMEOUT / 3:
+            return
+        self.heartbeat_writes[key] = now
+        try:
+            self.connection().execute('INSERT OR REPLACE INTO heartbeats (room_id, session_id, last_seen) VALUES (?, ?, ?)',
+                                      (room_id, session_id, time.time()))
+        except sqlite3.Error as e:
+            print(f"[touch_session] Error: {e}")
+
+    def load_heartbeats(self, room_id, session_ids=None):
+        """Letzte Heartbeats (time.time()) aller oder der angegebenen Sessions eines Raums"""
+        db = self.connection()
+        if session_ids is None:
+            rows = db.execute('SELECT session_id, last_seen FROM heartbeats WHERE room_id = ?', (room_id,))
+            return dict(rows)
+        heartbeats = {}
+        for session_id in session_ids:
+            row = db.execute('SELECT last_seen FROM heartbeats WHERE room_id = ? AND session_id = ?',
+                             (room_id, session_id)).fetchone()
+            if row:
+                heartbeats[session_id] = row[0]
+        return heartbeats
+
+    def delete_heartbeats(self, room_id, session_ids):
+        db = self.connection()
+        for session_id in session_ids:
+            db.execute('DELETE FROM heartbeats WHERE room_id = ? AND session_id = ?', (room_id, session_id))
+            self.heartbeat_writes.pop((room_id, session_id), None)
+
+def create_state_store():
+    """Wählt das State-Backend über STATE_BACKEND (memory, journal oder sqlite)"""
+    if STATE_BACKEND == 'sqlite':
+        return SqliteStateStore(STATE_DB_FILE)
+    if STATE_BACKEND not in ('memory', 'journal'):
+        print(f"[create_state_store] Error: unknown STATE_BACKEND '{STATE_BACKEND}', using memory")
+    if int(os.environ.get('WEB_CONCURRENCY', 1)) > 1:
+        print(f"⚠️ Mehrere Worker mit STATE_BACKEND={STATE_BACKEND} – jeder Worker hätte sein eigenes Spiel. STATE_BACKEND=sqlite setzen!")
+    if STATE_BACKEND == 'journal':
+        return JournalStateStore(STATE_JOURNAL_FILE)
+    return MemoryStateStore()
+
+state_store = create_state_store()
+
+def leaderboard_rows(data):
+    """(Rolle, Name, Gewinne)-Zeilen aus dem Format von leaderboard.json. Namen werden wie in
+    add_wins() kleingeschrieben, Einträge, die sich nur in der Schreibweise unterscheiden, zusammengezählt."""
+    rows = {}
+    for role in LEADERBOARD_ROLES:
+        for name, wins in data.get(role, {}).items():
+            key = (role, str(name).lower())
+            rows[key] = rows.get(key, 0) + int(wins)
+    return [(role, name, wins) for (role, name), wins in rows.items() if wins > 0]
+
+class WinsIndex:
+    """Rangstatistik einer Rolle: Fenwick-Baum über die Gewinnzahlen (Spieler pro Gewinnzahl).
+    "Wie viele haben mehr Gewinne als w" und damit der Rang sind O(log W), ein Gewinn ist O(log W)."""
+
+    def __init__(self, histogram):
+        self.histogram = dict(histogram)  # Gewinne -> Anzahl Spieler
+        self.total = sum(self.histogram.values())
+        self.build(max(self.histogram, default=0))
+
+    def build(self, max_wins):
+        size = 64
+        while size <= max_wins:
+            size *= 2
+        self.tree = [0] * (size + 1)
+        for wins, count in self.histogram.items():
+            self._update(wins, count)
+
+    def _update(self, wins, delta):
+        while wins < len(self.tree):
+            self.tree[wins] += delta
+            wins += wins & -wins
+
+    def add(self, wins, delta):
+        """Ein Spieler mehr (delta=1) oder weniger (delta=-1) mit genau `wins` Gewinnen"""
+        count = self.histogram.get(wins, 0) + delta
+        if count:
+            self.histogram[wins] = count
+        else:
+            del self.histogram[wins]
+        self.total += delta
+        if wins >= len(self.tree):
+            self.build(wins)  # Baum verdoppeln, enthält das neue Histogramm schon
+        else:
+            self._update(wins, delta)
+
+    def count_above(self, wins):
+        """Spieler mit mehr als `wins` Gewinnen"""
+        at_most = 0
+        index = min(wins, len(self.tree) - 1)
+        while index > 0:
+            at_most += self.tree[index]
+            index -= index & -index
+        return self.total - at_most
+
+    def rank(self, wins):
+        """Platz bei `wins` Gewinnen; gleich viele Gewinne teilen sich den Platz (1, 2, 2, 4)"""
+        return self.count_above(wins) + 1
+
+class LeaderboardStore:
+    """Leaderboard in SQLite (WAL): eine Zeile pro Rolle und Name, Index auf (role, wins DESC, name).
+    Ein Gewinn ist ein Upsert über den Primärschlüssel (O(log n)), Ranglisten und Seiten
+    kommen direkt aus dem Index statt aus einer komplett geladenen und neu geschriebenen Datei.
+    Alle Worker-Prozesse öffnen dieselbe Datei; `version` zählt jede Änderung."""
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.ranks = (None, {})  # (version, role -> WinsIndex), eigene Gewinne werden nachgeführt
+        with self.transaction() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS wins (role TEXT NOT NULL, name TEXT NOT NULL, '
+                       'wins INTEGER NOT NULL, PRIMARY KEY (role, name)) WITHOUT ROWID')
+            db.execute('CREATE INDEX IF NOT EXISTS wins_ranking ON wins (role, wins DESC, name)')
+            db.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, version INTEGER NOT NULL, data TEXT NOT NULL)')
+            db.execute("INSERT OR IGNORE INTO meta (key, version, data) VALUES ('leaderboard', 0, ?)", (secrets.token_hex(4),))
+            self.epoch = db.execute("SELECT data FROM meta WHERE key = 'leaderboard'").fetchone()[0]
+
+    def connection(self):
+        """Eine Verbindung pro Thread"""
+        db = getattr(self.local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            self.local.db = db
+        return db
+
+    @contextlib.contextmanager
+    def transaction(self):
+        db = self.connection()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute("UPDATE meta SET version = version + 1 WHERE key = 'leaderboard'")
+        db.execute('COMMIT')
+
+    def version(self):
+        return self.connection().execute("SELECT version FROM meta WHERE key = 'leaderboard'").fetchone()[0]
+
+    def add_wins(self, entries):
+        """Zählt (Rolle, Name)-Gewinne hoch, alle in einer Transaktion"""
+        changes = []
+        with self.transaction() as db:
+            before = db.execute("SELECT version FROM meta WHERE key = 'leaderboard'").fetchone()[0]
+            for role, name in entries:
+                wins = db.execute('INSERT INTO wins (role, name, wins) VALUES (?, ?, 1) '
+                                  'ON CONFLICT (role, name) DO UPDATE SET wins = wins + 1 RETURNING wins',
+                                  (role, name)).fetchone()[0]
+                changes.append((role, wins))
+        with self.lock:
+            version, indexes = self.ranks
+            if version != before:
+                return  # Index ist ohnehin veraltet und wird beim nächsten Zugriff neu aufgebaut
+            for role, wins in changes:
+                index = indexes[role]
+                if wins > 1:
+                    index.add(wins - 1, -1)
+                index.add(wins, 1)
+            self.ranks = (before + 1, indexes)
+
+    def rank_index(self, role):
+        """WinsIndex der Rolle zum aktuellen Stand. Neu aufgebaut (ein GROUP BY über den Index)
+        nur nach Änderungen anderer Worker, Reset oder Import."""
+        version = self.version()
+        with self.lock:
+            if self.ranks[0] != version:
+                db = self.connection()
+                db.execute('BEGIN')  # Version und Histogramm aus demselben Snapshot
+                try:
+                    version = db.execute("SELECT version FROM meta WHERE key = 'leaderboard'").fetchone()[0]
+                    histograms = {name: {} for name in LEADERBOARD_ROLES}
+                    for row_role, wins, count in db.execute('SELECT role, wins, COUNT(*) FROM wins GROUP BY role, wins'):
+                        histograms.setdefault(row_role, {})[wins] = count
+                finally:
+                    db.execute('COMMIT')
+                self.ranks = (version, {name: WinsIndex(histogram) for name, histogram in histograms.items()})
+            return self.ranks[1][role]
+
+    def page(self, role, offset=0, limit=None):
+        """Einträge einer Rolle nach Rang (meiste Gewinne zuerst, dann Name) als (Name, Gewinne)"""
+        return self.connection().execute(
+            'SELECT name, wins FROM wins WHERE role = ? ORDER BY wins DESC, name LIMIT ? OFFSET ?',
+            (role, -1 if limit is None else limit, offset)).fetchall()
+
+    def count(self, role):
+        return self.rank_index(role).total
+
+    def around(self, role, name, neighbours):
+        """Eintrag von `name` mit bis zu `neighbours` Plätzen davor und danach als (Name, Gewinne),
+        über Bereichsabfragen auf dem Index statt OFFSET. None, wenn der Name nicht vorkommt."""
+        db = self.connection()
+        row = db.execute('SELECT wins FROM wins WHERE role = ? AND name = ?', (role, name)).fetchone()
+        if row is None:
+            return None
+        wins = row[0]
+        above = db.execute('SELECT name, wins FROM wins WHERE role = ? AND wins = ? AND name < ? '
+                           'ORDER BY name DESC LIMIT ?', (role, wins, name, neighbours)).fetchall()
+        if len(above) < neighbours:
+            above += db.execute('SELECT name, wins FROM wins WHERE role = ? AND wins > ? ORDER BY wins, name DESC LIMIT ?',
+                                (role, wins, neighbours - len(above))).fetchall()
+        below = db.execute('SELECT name, wins FROM wins WHERE role = ? AND wins = ? AND name > ? '
+                           'ORDER BY name LIMIT ?', (role, wins, name, neighbours)).fetchall()
+        if len(below) < neighbours:
+            below += db.execute('SELECT name, wins FROM wins WHERE role = ? AND wins < ? ORDER BY wins DESC, name LIMIT ?',
+                                (role, wins, neighbours - len(below))).fetchall()
+        return above[::-1] + [(name, wins)] + below
+
+    def reset(self, roles):
+        with self.transaction() as db:
+            db.executemany('DELETE FROM wins WHERE role = ?', [(role,) for role in roles])
+
+    def export(self):
+        """Ganzes Leaderboard im Format von leaderboard.json, absteigend nach Gewinnen"""
+        return {role: dict(self.page(role)) for role in LEADERBOARD_ROLES}
+
+    def import_data(self, data):
+        """Ersetzt das Leaderboard durch `data` (Format von leaderboard.json)"""
+        rows = leaderboard_rows(data)
+        with self.transaction() as db:
+            db.execute('DELETE FROM wins')
+            db.executemany('INSERT INTO wins (role, name, wins) VALUES (?, ?, ?)', rows)
+
+    def migrate_json(self, path):
+        """Übernimmt einmalig eine vorhandene leaderboard.json; danach ist die Datenbank maßgeblich.
+        Die Datei bleibt unverändert liegen. Gibt True zurück, wenn übernommen wurde."""
+        with self.transaction() as db:
+            if db.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+                return False
+            if not os.path.exists(path):
+                db.execute("INSERT INTO meta (key, version, data) VALUES ('migrated', 0, ?)", (path,))
+                return False
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    rows = leaderboard_rows(json.load(f))
+            except (OSError, json.JSONDecodeError, TypeError, ValueError, AttributeError) as e:
+                # nicht als übernommen markieren: beim nächsten Start mit reparierter Datei erneut versuchen
+                print(f"[migrate_json] Error: {e}")
+                return False
+            db.execute('DELETE FROM wins')
+            db.executemany('INSERT INTO wins (role, name, wins) VALUES (?, ?, ?)', rows)
+            db.execute("INSERT INTO meta (key, version, data) VALUES ('migrated', 0, ?)", (path,))
+            return True
 
-def save_leaderboard():
-    """Speichert das Leaderboard in die JSON-Datei"""
-    with open(LEADERBOARD_FILE, 'w', encoding='utf-8') as f:
-        json.dump(leaderboard, f, ensure_ascii=False, indent=4)
+leaderboard_store = LeaderboardStore(LEADERBOARD_DB_FILE)
+
+def sync_leaderboard():
+    """Aktuelle Leaderboard-Version; meldet Änderungen (auch anderer Worker) per 'leaderboard'-Event"""
+    global leaderboard_seen_version
+    version = leaderboard_store.version()
+    if version != leaderboard_seen_version:
+        if leaderboard_seen_version is not None:
+            publish_event('leaderboard', {})
+        leaderboard_seen_version = version
+    return version
+
+def add_wins(winners):
+    """Trägt mehrere Gewinne (Liste aus (Name, Rolle)) in einem Schritt ein"""
+    entries = [('impostors' if role == 'impostor' else 'players', player_name.lower()) for player_name, role in winners]
+    try:
+        with leaderboard_save_duration.time():
+            leaderboard_store.add_wins(entries)
+    except sqlite3.Error as e:
+        print(f"[add_wins] Error: {e}")
+    sync_leaderboard()
 
 def add_win(player_name, role):
     """Fügt einen Gewinn zum Leaderboard hinzu"""
-    key = player_name.lower()
-    if role == 'impostor':
-        leaderboard['impostors'][key] = leaderboard['impostors'].get(key, 0) + 1
-    else:
-        leaderboard['players'][key] = leaderboard['players'].get(key, 0) + 1
-    save_leaderboard()
+    add_wins([(player_name, role)])
+
+def import_leaderboard(data):
+    """Ersetzt das Leaderboard (Upload bzw. Backup wiederherstellen)"""
+    leaderboard_store.import_data(data)
+    sync_leaderboard()
+
+def export_leaderboard_json():
+    """Leaderboard als JSON-Text im Format von leaderboard.json (Download und Backups)"""
+    return json.dumps(leaderboard_store.export(), ensure_ascii=False, indent=4)
 
 def format_name(name):
     """Formatiert Namen mit erstem Buchstaben groß"""
@@ -95,57 +856,352 @@ def format_name(name):
 
 def get_top_winners(role, limit=None):
     """Gibt sortierte Liste der Gewinner zurück"""
-    data = leaderboard.get(role, {})
-    sorted_list = sorted(data.items(), key=lambda x: x[1], reverse=True)
-    if limit:
-        return sorted_list[:limit]
-    return sorted_list
-
-def update_leaderboard_on_game_end(vote_results):
-    """Aktualisiert das Leaderboard basierend auf Spielergebnis"""
+    return leaderboard_store.page(role, 0, limit)
+
+def leaderboard_entries(rows):
+    return [{'name': format_name(name), 'wins': wins} for name, wins in rows]
+
+def leaderboard_page(offset, limit):
+    """Eine Seite je Rolle direkt aus dem Index (für top= ist offset 0)"""
+    data = {role: leaderboard_entries(leaderboard_store.page(role, offset, limit)) for role in LEADERBOARD_ROLES}
+    data.update({'total': {role: leaderboard_store.count(role) for role in LEADERBOARD_ROLES},
+                 'offset': offset, 'limit': limit})
+    return data
+
+def leaderboard_around(name, neighbours):
+    """Platz von `name` je Rolle mit Nachbarn; Plätze aus dem WinsIndex (gleich viele Gewinne, gleicher Platz)"""
+    data = {'name': format_name(name), 'total': {}}
+    for role in LEADERBOARD_ROLES:
+        index = leaderboard_store.rank_index(role)
+        data['total'][role] = index.total
+        rows = leaderboard_store.around(role, name, neighbours)
+        if rows is None:
+            data[role] = {'rank': None, 'wins': 0, 'entries': []}
+            continue
+        entries = [{'rank': index.rank(wins), 'name': format_name(entry_name), 'wins': wins} for entry_name, wins in rows]
+        own = next(entry for entry, (entry_name, _) in zip(entries, rows) if entry_name == name)
+        data[role] = {'rank': own['rank'], 'wins': own['wins'], 'entries': entries}
+    return data
+
+def get_leaderboard_response():
+    """Fertig serialisierte /api/leaderboard-Antwort, neu gebaut nur wenn sich das Leaderboard geändert hat"""
+    version = sync_leaderboard()
+    with leaderboard_lock:
+        if leaderboard_response['version'] != version:
+            body = json.dumps({role: leaderboard_entries(get_top_winners(role)) for role in LEADERBOARD_ROLES},
+                              ensure_ascii=False)
+            leaderboard_response['version'] = version
+            leaderboard_response['body'] = body
+            leaderboard_response['etag'] = f"{leaderboard_store.epoch}-lb-{version}"
+        return leaderboard_response['body'], leaderboard_response['etag']
+
+def update_leaderboard_on_game_end(room, vote_results):
+    """Aktualisiert das Leaderboard basierend auf Spielergebnis (alle Gewinne auf einmal)"""
+    winners = []
     if vote_results.get('impostor_won'):
         impostor_name = vote_results.get('impostor')
         if impostor_name:
-            add_win(impostor_name, 'impostor')
+            winners.append((impostor_name, 'impostor'))
     elif vote_results.get('impostor_failed'):
-        for player in game_players.keys():
+        for player in room.game_players.keys():
             if player != vote_results.get('impostor'):
-                add_win(player, 'player')
+                winners.append((player, 'player'))
     elif vote_results.get('is_impostor'):
-        for player in game_players.keys():
+        for player in room.game_players.keys():
             if player != vote_results.get('voted_out'):
-                add_win(player, 'player')
+                winners.append((player, 'player'))
     elif vote_results.get('voted_out') and not vote_results.get('is_impostor'):
-        for player, word in assigned_words.items():
+        for player, word in room.assigned_words.items():
             if "IMPOSTOR" in word:
-                add_win(player, 'impostor')
+                winners.append((player, 'impostor'))
                 break
-
-load_leaderboard()
-
-def get_public_ip():
-    """Ermittelt die öffentliche IP-Adresse"""
-    try:
-        services = [
-            'https://api.ipify.org',
-            'https://ipinfo.io/ip',
-            'https://icanhazip.com',
-            'https://ident.me'
-        ]
-        
-        for service in services:
+    if winners:
+        add_wins(winners)
+
+if leaderboard_store.migrate_json(LEADERBOARD_FILE):
+    print(f"🏆 {LEADERBOARD_FILE} nach {LEADERBOARD_DB_FILE} übernommen")
+
+class BackupManager:
+    """Leaderboard-Backups in einem eigenen Verzeichnis: gzip-komprimierte Exporte mit
+    sekundengenauem, eindeutigem Namen und dazu manifest.json mit Name, Zeitpunkt, Größen und
+    SHA-256 jedes Backups (neuestes zuerst). Die Liste kommt aus dem Manifest statt aus glob
+    über das Arbeitsverzeichnis. Backup und Manifest werden per Temp-Datei und rename
+    geschrieben, zwischen Workern per Dateisperre serialisiert. Nach jedem Backup greift die
+    Aufbewahrung: die neuesten `keep` plus das jüngste jedes der letzten `keep_days` Tage."""
+
+    def __init__(self, directory, keep, keep_days):
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self.keep = keep
+        self.keep_days = keep_days
+        self.lock = threading.Lock()
+        self.cache_lock = threading.Lock()
+        self.cache = (None, [])  # (mtime, Größe, Inode des Manifests) -> Einträge
+
+    @contextlib.contextmanager
+    def locked(self):
+        """Exklusiver Zugriff auf Verzeichnis und Manifest, auch gegenüber anderen Workern"""
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, '.lock'), 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)  # wird mit der Datei wieder freigegeben
+                yield
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def entries(self):
+        """Manifest-Einträge, neuestes zuerst; die Datei wird nur nach einer Änderung neu gelesen"""
+        try:
+            stat = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return []
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self.cache_lock:
+            if self.cache[0] != key:
+                self.cache = (key, self.read_manifest())
+            return self.cache[1]
+
+    def find(self, name):
+        return next((entry for entry in self.entries() if entry['name'] == name), None)
+
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)['backups']
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"[read_manifest] Error: {e}, Manifest wird aus dem Verzeichnis neu aufgebaut")
+            return self.scan()
+
+    def scan(self):
+        """Einträge aus den vorhandenen Backup-Dateien (nur für ein verlorenes oder kaputtes Manifest)"""
+        entries = []
+        for path in glob.glob(self.path('*.json.gz')):
             try:
-                response = requests.get(service, timeout=5)
-                if response.status_code == 200:
-                    return response.text.strip()
-            except requests.RequestException as e:
-                print(f"[get_public_ip] Error with {service}: {e}")
+                with open(path, 'rb') as f:
+                    compressed = f.read()
+                raw = gzip.decompress(compressed)
+            except (OSError, EOFError) as e:
+                print(f"[scan] Error: {path}: {e}")
                 continue
-        
-        return get_local_ip()
-    except Exception as e:
-        print(f"[get_public_ip] General error: {e}")
-        return "localhost"
+            created = datetime.fromtimestamp(os.path.getmtime(path))
+            entries.append(self.entry(os.path.basename(path), created, compressed, raw, 'scan'))
+        entries.sort(key=lambda entry: entry['created'], reverse=True)
+        return entries
+
+    def write_atomic(self, path, content):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def write_manifest(self, entries):
+        content = json.dumps({'backups': entries}, ensure_ascii=False, indent=4).encode('utf-8')
+        self.write_atomic(self.manifest_path, content)
+
+    @staticmethod
+    def entry(name, created, compressed, raw, reason):
+        return {'name': name, 'created': created.isoformat(timespec='seconds'), 'size': len(compressed),
+                'raw_size': len(raw), 'sha256': hashlib.sha256(raw).hexdigest(), 'reason': reason}
+
+    def new_name(self, created):
+        base = f"leaderboard_{created.strftime('%Y%m%d-%H%M%S')}"
+        name, counter = f"{base}.json.gz", 1
+        while os.path.exists(self.path(name)):
+            counter += 1
+            name = f"{base}-{counter}.json.gz"
+        return name
+
+    def add(self, entries, raw, created, reason):
+        """Schreibt ein Backup und trägt es in `entries` ein. Aufruf mit locked()."""
+        compressed = gzip.compress(raw, mtime=0)
+        name = self.new_name(created)
+        self.write_atomic(self.path(name), compressed)
+        entry = self.entry(name, created, compressed, raw, reason)
+        entries.insert(0, entry)
+        entries.sort(key=lambda e: e['created'], reverse=True)  # stabil: in derselben Sekunde bleibt das neue vorn
+        return entry
+
+    def create(self, text, reason='manual', min_age=None):
+        """Neues Backup von `text` (Export des Leaderboards). Mit `min_age` (automatische
+        Backups) wird übersprungen, wenn das jüngste Backup jünger ist oder denselben Inhalt
+        hat; dann None. Danach wird die Aufbewahrung angewendet."""
+        raw = text.encode('utf-8')
+        now = datetime.now()
+        with self.locked():
+            entries = self.read_manifest()
+            if min_age is not None and entries:
+                latest = entries[0]
+                if (latest['sha256'] == hashlib.sha256(raw).hexdigest() or
+                        now - datetime.fromisoformat(latest['created']) < timedelta(seconds=min_age)):
+                    return None
+            entry = self.add(entries, raw, now, reason)
+            kept = self.retained(entries, now)
+            self.write_manifest(kept)
+            kept_names = {entry['name'] for entry in kept}
+            for old in entries:
+                if old['name'] not in kept_names:
+                    try:
+                        os.remove(self.path(old['name']))
+                    except FileNotFoundError:
+                        pass
+        return entry
+
+    def retained(self, entries, now):
+        """Aufbewahrung: die `keep` neuesten plus das jüngste Backup jedes der letzten `keep_days` Tage.
+        Übernommene alte Backups ('legacy') zählen nicht mit und werden nie gelöscht."""
+        managed = [entry for entry in entries if entry['reason'] != 'legacy']
+        keep = {entry['name'] for entry in managed[:self.keep]}
+        first_day = (now - timedelta(days=self.keep_days - 1)).date().isoformat()
+        days = set()
+        for entry in managed:
+            day = entry['created'][:10]
+            if day >= first_day and day not in days:
+                days.add(day)
+                keep.add(entry['name'])
+        return [entry for entry in entries if entry['reason'] == 'legacy' or entry['name'] in keep]
+
+    def read(self, name):
+        """Inhalt (JSON-Text als Bytes) eines Backups aus dem Manifest; prüft die Prüfsumme.
+        None, wenn es das Backup nicht gibt."""
+        entry = self.find(name)
+        if entry is None:
+            return None
+        with open(self.path(entry['name']), 'rb') as f:
+            raw = gzip.decompress(f.read())
+        if hashlib.sha256(raw).hexdigest() != entry['sha256']:
+            raise ValueError(f"checksum mismatch for {name}")
+        return raw
+
+    def adopt_legacy(self, patterns):
+        """Kopiert alte Backups aus dem Arbeitsverzeichnis ins Backup-Verzeichnis (komprimiert,
+        Zeitpunkt = Änderungszeit). Die Originale bleiben liegen; schon übernommene (gleiche
+        Datei, gleicher Inhalt) werden übersprungen. Gibt die Anzahl neu übernommener zurück."""
+        files = sorted({path for pattern in patterns for path in glob.glob(pattern) if os.path.isfile(path)})
+        if not files:
+            return 0
+        with self.locked():
+            entries = self.read_manifest()
+            known = {(entry.get('source'), entry['sha256']) for entry in entries}
+            adopted = 0
+            for path in files:
+                try:
+                    with open(path, 'rb') as f:
+                        raw = f.read()
+                    created = datetime.fromtimestamp(os.path.getmtime(path)).replace(microsecond=0)
+                except FileNotFoundError:
+                    continue
+                if (path, hashlib.sha256(raw).hexdigest()) in known:
+                    continue
+                entry = self.add(entries, raw, created, 'legacy')
+                entry['source'] = path
+                adopted += 1
+            if adopted:
+                self.write_manifest(entries)
+        return adopted
+
+leaderboard_backups = BackupManager(LEADERBOARD_BACKUP_DIR, LEADERBOARD_BACKUP_KEEP, LEADERBOARD_BACKUP_KEEP_DAYS)
+
+def create_leaderboard_backup(reason='manual', min_age=None):
+    """Backup des aktuellen Leaderboards (siehe BackupManager.create)"""
+    return leaderboard_backups.create(export_leaderboard_json(), reason, min_age)
+
+def start_backup_thread():
+    """Startet automatische Leaderboard-Backups alle LEADERBOARD_BACKUP_INTERVAL Sekunden.
+    Laufen mehrere Worker, schreibt nur der erste; die anderen finden ein frisches Backup vor."""
+    if LEADERBOARD_BACKUP_INTERVAL <= 0:
+        return
+    def backup_loop():
+        while True:
+            time.sleep(LEADERBOARD_BACKUP_INTERVAL)
+            try:
+                entry = create_leaderboard_backup('auto', min_age=LEADERBOARD_BACKUP_INTERVAL / 2)
+                if entry:
+                    print(f"🏆 Automatisches Leaderboard-Backup: {entry['name']}")
+            except (OSError, sqlite3.Error) as e:
+                print(f"[backup_loop] Error: {e}")
+
+    backup_thread = threading.Thread(target=backup_loop, daemon=True)
+    backup_thread.start()
+
+try:
+    adopted_backups = leaderboard_backups.adopt_legacy(LEGACY_BACKUP_PATTERNS)
+    if adopted_backups:
+        print(f"🏆 {adopted_backups} alte Leaderboard-Backups nach {LEADERBOARD_BACKUP_DIR} kopiert")
+except OSError as e:
+    print(f"[adopt_legacy] Error: {e}")
+
+PUBLIC_IP_SERVICES = [
+    'https://api.ipify.org',
+    'https://ipinfo.io/ip',
+    'https://icanhazip.com',
+    'https://ident.me'
+]
+PUBLIC_IP_TTL = int(os.environ.get('PUBLIC_IP_TTL', 3600))
+PUBLIC_IP_RETRY = 60
+
+public_ip_cache = {'ip': None, 'expires_at': 0.0}
+public_ip_lock = threading.Lock()
+public_ip_lookup = None  # threading.Event der laufenden Auflösung
+
+def resolve_public_ip():
+    """Fragt die IP-Dienste nacheinander ab (blockierend), None wenn keiner antwortet"""
+    started = time.perf_counter()
+    for service in PUBLIC_IP_SERVICES:
+        try:
+            response = requests.get(service, timeout=5)
+            if response.status_code == 200:
+                public_ip_duration.observe(time.perf_counter() - started, 'ok')
+                return response.text.strip()
+        except requests.RequestException as e:
+            print(f"[resolve_public_ip] Error with {service}: {e}")
+    public_ip_duration.observe(time.perf_counter() - started, 'failed')
+    return None
+
+def refresh_public_ip():
+    """Startet die Auflösung im Hintergrund, gleichzeitige Aufrufe teilen sich eine Abfrage"""
+    global public_ip_lookup
+    with public_ip_lock:
+        if public_ip_lookup is not None:
+            return public_ip_lookup
+        lookup = threading.Event()
+        public_ip_lookup = lookup
+
+    def lookup_worker():
+        global public_ip_lookup
+        try:
+            ip = resolve_public_ip()
+        except Exception as e:
+            print(f"[refresh_public_ip] General error: {e}")
+            ip = None
+        with public_ip_lock:
+            if ip:
+                public_ip_cache['ip'] = ip
+                public_ip_cache['expires_at'] = time.monotonic() + PUBLIC_IP_TTL
+            else:
+                public_ip_cache['expires_at'] = time.monotonic() + PUBLIC_IP_RETRY
+            public_ip_lookup = None
+        lookup.set()
+
+    threading.Thread(target=lookup_worker, daemon=True).start()
+    return lookup
+
+def get_public_ip(wait=0):
+    """Gibt die gecachte öffentliche IP zurück, ohne den Request zu blockieren"""
+    with public_ip_lock:
+        ip = public_ip_cache['ip']
+        expired = time.monotonic() >= public_ip_cache['expires_at']
+    if expired:
+        lookup = refresh_public_ip()
+        if wait and lookup.wait(wait):
+            with public_ip_lock:
+                ip = public_ip_cache['ip']
+    return ip or get_local_ip()
 
 def get_local_ip():
     """Ermittelt die lokale IP-Adresse als Fallback"""
@@ -180,42 +1236,707 @@ def generate_session_id():
     """Generiert eine eindeutige Session-ID"""
     return secrets.token_hex(16)
 
-def update_heartbeat(session_id):
-    """Aktualisiert den Heartbeat für eine Session"""
-    session_heartbeats[session_id] = datetime.now()
+def diff_state(old, new, list_fields=(), dict_fields=()):
+    """Kompakter Diff zweier Zustände (dicts): geänderte Felder unter 'changed',
+    Listen als <feld>_added/<feld>_removed, dicts als <feld>_set/<feld>_removed.
+    Listen, deren Reihenfolge sich anders ändert, kommen komplett unter 'changed'."""
+    delta = {'changed': {}}
+    for key, value in new.items():
+        if key not in old:
+            delta['changed'][key] = value
+        elif key in list_fields and isinstance(value, list) and isinstance(old[key], list):
+            new_items = set(value)
+            old_items = set(old[key])
+            kept = [item for item in old[key] if item in new_items]
+            added = [item for item in value if item not in old_items]
+            if kept + added != value:
+                delta['changed'][key] = value
+                continue
+            if added:
+                delta[f'{key}_added'] = added
+            removed = [item for item in old[key] if item not in new_items]
+            if removed:
+                delta[f'{key}_removed'] = removed
+        elif key in dict_fields and isinstance(value, dict) and isinstance(old[key], dict):
+            updated = {k: v for k, v in value.items() if old[key].get(k, object()) != v}
+            if updated:
+                delta[f'{key}_set'] = updated
+            removed = [k for k in old[key] if k not in value]
+            if removed:
+                delta[f'{key}_removed'] = removed
+        elif old[key] != value:
+            delta['changed'][key] = value
+    return delta
+
+class ChatBuffer:
+    """Chat mit fester Kapazität (Ringpuffer) und fortlaufenden Nachrichten-IDs.
+    IDs laufen auch über clear() hinweg weiter, der Schlüssel (key) wechselt dabei."""
+
+    def __init__(self, name, capacity=CHAT_BUFFER_SIZE):
+        self.name = name
+        self.messages = deque(maxlen=capacity)
+        self.next_id = 1
+        self.generation = 0
+
+    def __len__(self):
+        return len(self.messages)
+
+    @property
+    def key(self):
+        """Identifiziert Chat und Generation, damit Clients nach einem Reset neu laden"""
+        return f"{self.name}-{self.generation}"
+
+    def append(self, message):
+        message['id'] = self.next_id
+        self.next_id += 1
+        self.messages.append(message)
+        return message
+
+    def clear(self):
+        self.messages.clear()
+        self.generation += 1
+
+    def latest(self, limit=CHAT_STATUS_LIMIT):
+        """Die letzten `limit` Nachrichten"""
+        return list(islice(self.messages, max(0, len(self.messages) - limit), None))
+
+    def after(self, after_id, limit=CHAT_STATUS_LIMIT):
+        """Nachrichten mit ID > after_id. None, wenn der Client neu laden muss
+        (ID unbekannt, schon aus dem Puffer gefallen oder zu viele neue Nachrichten)."""
+        if after_id is None:
+            return None
+        oldest_id = self.messages[0]['id'] if self.messages else self.next_id
+        if after_id < oldest_id - 1 or after_id >= self.next_id or self.next_id - 1 - after_id > limit:
+            return None
+        return list(islice(self.messages, after_id - oldest_id + 1, None))
+
+    def copy(self):
+        """Kopie für Auswertungen ohne Raum-Lock (die Nachrichten selbst ändern sich nicht mehr)"""
+        chat = ChatBuffer(self.name, self.messages.maxlen)
+        chat.messages.extend(self.messages)
+        chat.next_id = self.next_id
+        chat.generation = self.generation
+        return chat
+
+    def to_dict(self):
+        return {'messages': list(self.messages), 'next_id': self.next_id, 'generation': self.generation}
+
+    def load(self, data):
+        self.messages = deque(data['messages'], maxlen=self.messages.maxlen)
+        self.next_id = data['next_id']
+        self.generation = data['generation']
+
+class PlayerRegistry:
+    """Lobby-Spieler (in Beitrittsreihenfolge) mit Name↔Session-Zuordnung in beide Richtungen.
+    Beitritt, Verlassen, Kick, Timeout und Session-Suche sind jeweils O(1)."""
+
+    def __init__(self):
+        self.lobby = {}     # name -> None, als geordnete Menge
+        self.sessions = {}  # session_id -> name
+        self.names = {}     # name -> session_id
+
+    def __contains__(self, name):
+        return name in self.lobby
+
+    def __len__(self):
+        return len(self.lobby)
+
+    def lobby_players(self):
+        return list(self.lobby)
+
+    def join_lobby(self, name):
+        """Nimmt den Namen in die Lobby auf, False wenn er schon drin ist"""
+        if name in self.lobby:
+            return False
+        self.lobby[name] = None
+        return True
+
+    def leave_lobby(self, name):
+        """Entfernt den Namen aus der Lobby, False wenn er nicht drin war"""
+        return self.lobby.pop(name, False) is None
+
+    def clear_lobby(self):
+        self.lobby.clear()
+
+    def bind(self, session_id, name):
+        """Ordnet Session und Namen einander zu; eine ältere Session des Namens verliert ihn"""
+        old_session = self.names.get(name)
+        if old_session is not None and old_session != session_id:
+            self.sessions.pop(old_session, None)
+        old_name = self.sessions.get(session_id)
+        if old_name is not None and old_name != name and self.names.get(old_name) == session_id:
+            del self.names[old_name]
+        self.sessions[session_id] = name
+        self.names[name] = session_id
+
+    def unbind_session(self, session_id):
+        """Löst die Zuordnung einer Session, gibt den Namen zurück (oder None)"""
+        name = self.sessions.pop(session_id, None)
+        if name is not None and self.names.get(name) == session_id:
+            del self.names[name]
+        return name
+
+    def clear_sessions(self):
+        self.sessions.clear()
+        self.names.clear()
+
+    def name_of(self, session_id):
+        return self.sessions.get(session_id)
+
+    def session_of(self, name):
+        return self.names.get(name)
+
+    def to_dict(self):
+        return {'lobby': list(self.lobby), 'sessions': self.sessions}
+
+    def load(self, data):
+        self.lobby = dict.fromkeys(data['lobby'])
+        self.sessions = dict(data['sessions'])
+        self.names = {name: session_id for session_id, name in self.sessions.items()}
+
+class VoteTally:
+    """Stimmen der laufenden Abstimmung mit mitgeführter Auszählung: Stimmen pro Spieler,
+    Spieler pro Stimmenzahl und die aktuelle Höchstzahl. Abgeben, Ändern und Zurücknehmen
+    (Kick/Timeout des Wählers) passen die Zählung an; Führende, Gleichstand und
+    Anzahl abgegebener Stimmen sind ohne Neuauszählung verfügbar."""
+
+    def __init__(self):
+        self.ballots = {}   # Wähler -> gewählter Spieler
+        self.counts = {}    # gewählter Spieler -> Stimmen
+        self.voters = {}    # gewählter Spieler -> Menge der Wähler
+        self.by_count = {}  # Stimmenzahl -> Spieler mit genau so vielen Stimmen (dict als geordnete Menge)
+        self.max_count = 0
+
+    def __contains__(self, voter):
+        return voter in self.ballots
+
+    def __len__(self):
+        return len(self.ballots)
+
+    def _add(self, target, delta):
+        """Verschiebt `target` um eine Stimme nach oben/unten in by_count, hält max_count aktuell"""
+        old = self.counts.get(target, 0)
+        new = old + delta
+        if old:
+            bucket = self.by_count[old]
+            del bucket[target]
+            if not bucket:
+                del self.by_count[old]
+        if new:
+            self.counts[target] = new
+            self.by_count.setdefault(new, {})[target] = None
+        else:
+            del self.counts[target]
+        if new > self.max_count:
+            self.max_count = new
+        elif old == self.max_count and old not in self.by_count:
+            self.max_count = new  # der bisher Führende hatte als einziger diese Zahl
+
+    def cast(self, voter, target):
+        """Gibt eine Stimme ab oder ändert sie"""
+        previous = self.ballots.get(voter)
+        if previous == target:
+            return
+        if previous is not None:
+            self.voters[previous].discard(voter)
+            if not self.voters[previous]:
+                del self.voters[previous]
+            self._add(previous, -1)
+        self.ballots[voter] = target
+        self.voters.setdefault(target, set()).add(voter)
+        self._add(target, 1)
+
+    def withdraw(self, voter):
+        """Nimmt die Stimme eines Wählers zurück, False wenn er nicht gewählt hat"""
+        target = self.ballots.pop(voter, None)
+        if target is None:
+            return False
+        self.voters[target].discard(voter)
+        if not self.voters[target]:
+            del self.voters[target]
+        self._add(target, -1)
+        return True
+
+    def leaders(self):
+        """Spieler mit den meisten Stimmen (mehrere bei Gleichstand)"""
+        return list(self.by_count.get(self.max_count, ()))
+
+    def clear(self):
+        self.ballots.clear()
+        self.counts.clear()
+        self.voters.clear()
+        self.by_count.clear()
+        self.max_count = 0
+
+    def to_dict(self):
+        return self.ballots
+
+    def load(self, data):
+        self.clear()
+        for voter, target in data.items():
+            self.cast(voter, target)
+
+ROOM_STATE_FIELDS = ('game_players', 'game_started', 'assigned_words',
+                     'spicy_mode', 'force_spicy', 'revealed', 'current_starter', 'voting_active', 'vote_results', 'game_ended',
+                     'winning_word', 'impostor_guess_used')
+
+class GameRoom:
+    """Zustand eines einzelnen Spiels: Lobby, Runde, Chat und Votes"""
+
+    def __init__(self, room_id):
+        self.room_id = room_id
+        self.created_at = datetime.now()
+        self.last_activity = time.monotonic()
+        self.version = 0
+        self.lock = threading.RLock()  # serialisiert alle Änderungen am Raum
+        self.changed = threading.Condition(self.lock)
+
+        self.registry = PlayerRegistry()  # Lobby-Spieler und Sessions
+        self.game_players = {}  # name -> session_id der laufenden Runde
+        self.session_heartbeats = {}  # session_id -> time.monotonic() des letzten Heartbeats
+        self.heartbeat_heap = []  # (Ablaufzeitpunkt, session_id), höchstens ein Eintrag pro Session
+        self.heartbeat_scheduled = set()  # Sessions mit Eintrag im Heap
+        self.game_started = False
+        self.assigned_words = {}
+        self.spicy_mode = False
+        self.force_spicy = False
+        self.revealed = False
+        self.lobby_messages = ChatBuffer('lobby')  # Separate chat for lobby
+        self.game_messages = ChatBuffer('game')    # Separate chat for game
+        self.current_starter = ""
+        self.votes = VoteTally()
+        self.voting_active = False
+        self.vote_results = {}
+        self.game_ended = False
+        self.winning_word = ""
+        self.impostor_guess_used = False
+        self.start_votes = set()
+        self.kicked_sessions = {}  # session_id -> time.time() des Kicks, älteste zuerst
+        self.in_store = False  # Raum wurde schon im geteilten State-Store gesehen
+        self.status_cache = None  # (version, gemeinsamer Teil von /api/status, letzte Chat-Nachrichten) als JSON
+        self.status_history = {}  # version -> gemeinsamer Teil als dict, die letzten STATUS_DELTA_HISTORY
+        self.status_deltas = {}  # Basisversion -> Diff-JSON zur aktuellen Version
+        self.page_shell = None  # Seitengerüst der Startseite, an den Slots zerlegt
+        self.page_fragments = None  # (version, Slot -> HTML) der zustandsabhängigen Seitenteile
+
+    def to_dict(self):
+        """Serialisierbarer Zustand für den State-Store (ohne Heartbeats)"""
+        data = {field: getattr(self, field) for field in ROOM_STATE_FIELDS}
+        data['start_votes'] = list(self.start_votes)
+        data['votes'] = self.votes.to_dict()
+        data['kicked_sessions'] = self.kicked_sessions
+        data['registry'] = self.registry.to_dict()
+        data['lobby_messages'] = self.lobby_messages.to_dict()
+        data['game_messages'] = self.game_messages.to_dict()
+        return data
+
+    def apply_state(self, version, data):
+        """Übernimmt einen von einem anderen Worker gespeicherten Zustand"""
+        with self.changed:
+            for field in ROOM_STATE_FIELDS:
+                setattr(self, field, data[field])
+            self.start_votes = set(data['start_votes'])
+            self.votes.load(data['votes'])
+            self.kicked_sessions = dict(data['kicked_sessions'])
+            self.registry.load(data['registry'])
+            self.lobby_messages.load(data['lobby_messages'])
+            self.game_messages.load(data['game_messages'])
+            self.version = version
+            self.last_activity = time.monotonic()
+            self.changed.notify_all()
+        publish_event('state', {'version': version}, room_id=self.room_id)
+
+    def reset_round(self):
+        """Setzt die laufende Runde zurück (Spielerliste und Lobby-Chat bleiben)"""
+        self.game_started = False
+        self.assigned_words = {}
+        self.revealed = False
+        self.game_messages.clear()
+        self.current_starter = ""
+        self.votes.clear()
+        self.voting_active = False
+        self.vote_results = {}
+        self.game_ended = False
+        self.winning_word = ""
+        self.impostor_guess_used = False
+        self.game_players = {}
+
+    def active_players(self):
+        """Spieler der laufenden Runde bzw. der Lobby"""
+        return list(self.game_players.keys()) if self.game_started else self.registry.lobby_players()
+
+    def active_count(self):
+        """Anzahl der Spieler aus active_players(), ohne die Liste zu bauen"""
+        return len(self.game_players) if self.game_started else len(self.registry)
+
+    def is_player(self, name):
+        """Ist der Name in der Lobby oder in der laufenden Runde?"""
+        return name in self.registry or name in self.game_players
+
+    def update_heartbeat(self, session_id):
+        """Aktualisiert den Heartbeat für eine Session"""
+        with self.lock:
+            self.schedule_heartbeat(session_id, time.monotonic())
+        state_store.touch_session(self.room_id, session_id)
+
+    def schedule_heartbeat(self, session_id, seen_at):
+        """Merkt einen Heartbeat vor. Ein Heap-Eintrag pro Session genügt: ist er fällig,
+        prüft due_sessions() den aktuellen Heartbeat und plant bei Bedarf neu ein."""
+        if seen_at > self.session_heartbeats.get(session_id, float('-inf')):
+            self.session_heartbeats[session_id] = seen_at
+        if session_id not in self.heartbeat_scheduled:
+            self.heartbeat_scheduled.add(session_id)
+            heapq.heappush(self.heartbeat_heap, (self.session_heartbeats[session_id] + HEARTBEAT_TIMEOUT, session_id))
+
+    def due_sessions(self, now):
+        """Sessions ohne Heartbeat seit HEARTBEAT_TIMEOUT. Betrachtet nur fällige Heap-Einträge
+        (lazy deletion), nicht alle Sessions."""
+        due = []
+        while self.heartbeat_heap and self.heartbeat_heap[0][0] <= now:
+            _, session_id = heapq.heappop(self.heartbeat_heap)
+            last_seen = self.session_heartbeats.get(session_id)
+            if last_seen is not None and last_seen + HEARTBEAT_TIMEOUT > now:
+                heapq.heappush(self.heartbeat_heap, (last_seen + HEARTBEAT_TIMEOUT, session_id))
+                continue
+            self.heartbeat_scheduled.discard(session_id)
+            if last_seen is not None:
+                due.append(session_id)
+        return due
+
+    def kick_session(self, session_id):
+        """Merkt eine gekickte Session vor (läuft nach KICKED_SESSION_TTL ab)"""
+        self.kicked_sessions.pop(session_id, None)
+        self.kicked_sessions[session_id] = time.time()
+
+    def expire_kicked_sessions(self):
+        """Vergisst alte Kicks; die ältesten stehen vorne, daher nur die abgelaufenen anfassen"""
+        cutoff = time.time() - KICKED_SESSION_TTL
+        expired = False
+        while self.kicked_sessions:
+            session_id, kicked_at = next(iter(self.kicked_sessions.items()))
+            if kicked_at > cutoff:
+                break
+            del self.kicked_sessions[session_id]
+            expired = True
+        return expired
+
+    def bump_version(self):
+        """Erhöht die Zustandsversion und weckt wartende Long-Poll-Requests"""
+        with self.changed:
+            self.version += 1
+            self.last_activity = time.monotonic()
+            version = self.version
+            state_store.save_room(self)
+            self.changed.notify_all()
+        publish_event('state', {'version': version}, room_id=self.room_id)
+
+    def wait_for_change(self, since, timeout, session_id=None):
+        """Wartet bis sich die Zustandsversion von `since` unterscheidet oder das Timeout abläuft.
+        Hält währenddessen den Heartbeat der wartenden Session aktuell; mit geteiltem
+        State-Store werden Änderungen anderer Worker in kurzen Abständen abgefragt."""
+        deadline = time.monotonic() + timeout
+        interval = min(HEARTBEAT_TIMEOUT / 2, state_store.poll_interval or HEARTBEAT_TIMEOUT)
+        while True:
+            with self.changed:
+                remaining = deadline - time.monotonic()
+                if self.version != since or remaining <= 0:
+                    return self.version
+                self.changed.wait(min(remaining, interval))
+                if self.version != since:
+                    return self.version
+            # Heartbeat und Abgleich außerhalb des Locks: beide können auf den Store warten
+            if session_id:
+                self.update_heartbeat(session_id)
+            sync_room(self)
+
+    def current_chat(self):
+        """Returns the appropriate chat based on game state"""
+        return self.game_messages if self.game_started else self.lobby_messages
+
+    def add_game_event(self, event_type, message, emoji="🎮"):
+        """Adds a game event message with special styling"""
+        event_message = {
+            'player': 'SYSTEM',
+            'message': message,
+            'timestamp': datetime.now().strftime('%H:%M:%S'),
+            'is_event': True,
+            'event_type': event_type,
+            'emoji': emoji
+        }
+        
+        # Add to the appropriate chat based on game state
+        self.current_chat().append(event_message)
+        publish_event('game_event', event_message, room_id=self.room_id)
+
+    def add_player_message(self, player_name, message):
+        """Adds a player message to the appropriate chat"""
+        player_message = {
+            'player': player_name,
+            'message': message,
+            'timestamp': datetime.now().strftime('%H:%M:%S'),
+            'is_event': False
+        }
+        
+        self.current_chat().append(player_message)
+        publish_event('chat', player_message, room_id=self.room_id)
+
+    def status_snapshot(self):
+        """Für alle Sessions gleicher Teil der /api/status-Antwort, einmal pro Zustandsversion
+        serialisiert: JSON-Objekt ohne schließende Klammer plus die letzten Chat-Nachrichten.
+        Aufruf mit gehaltenem Lock."""
+        if self.status_cache is None or self.status_cache[0] != self.version:
+            shared = json.dumps({
+                'room_id': self.room_id,
+                'version': self.version,
+                'players': self.active_players(),
+                'game_started': self.game_started,
+                'spicy_mode': self.spicy_mode,
+                'force_spicy': self.force_spicy,
+                'revealed': self.revealed,
+                'current_starter': self.current_starter,
+                'voting_active': self.voting_active,
+                'votes': self.votes.to_dict(),
+                'vote_results': self.vote_results,
+                'game_ended': self.game_ended,
+                'winning_word': self.winning_word,
+                'all_voted': self.check_all_voted(),
+                'impostor_guess_used': self.impostor_guess_used,
+                'start_votes': list(self.start_votes) if not self.game_started else [],
+                'epoch': state_store.epoch
+            }, ensure_ascii=False)
+            latest_chat = json.dumps(self.current_chat().latest(), ensure_ascii=False)
+            self.status_cache = (self.version, shared[:-1], latest_chat)
+            # eigene Kopie, damit spätere Änderungen an votes usw. alte Versionen nicht verändern
+            self.status_history[self.version] = json.loads(shared)
+            while len(self.status_history) > STATUS_DELTA_HISTORY:
+                del self.status_history[next(iter(self.status_history))]
+            self.status_deltas = {}
+        return self.status_cache[1], self.status_cache[2]
+
+    def status_delta(self, base):
+        """Diff des gemeinsamen Status-Teils von Version `base` zur aktuellen Version als JSON-Objekt
+        ohne schließende Klammer, None wenn `base` nicht mehr bekannt ist (Client lädt komplett).
+        Aufruf mit gehaltenem Lock, nach status_snapshot()."""
+        if base not in self.status_deltas:
+            old = self.status_history.get(base)
+            if old is None:
+                return None
+            delta = diff_state(old, self.status_history[self.version], list_fields=('players',), dict_fields=('votes',))
+            delta['changed'].pop('version', None)
+            delta.update({'delta': True, 'base': base, 'version': self.version, 'room_id': self.room_id})
+            self.status_deltas[base] = json.dumps(delta, ensure_ascii=False)[:-1]
+        return self.status_deltas[base]
+
+    def check_all_voted(self):
+        """Prüft ob alle aktiven Spieler gevoted haben (O(1): Zähler statt Listen)"""
+        return len(self.votes) >= self.active_count()
+
+    def remove_session(self, session_id):
+        """Entfernt eine Session samt Heartbeat aus dem Raum"""
+        self.registry.unbind_session(session_id)
+        self.session_heartbeats.pop(session_id, None)
+
+    def summary(self):
+        """Kurzübersicht für Raumlisten"""
+        with self.lock:
+            return {
+                'room_id': self.room_id,
+                'players': self.active_count(),
+                'sessions': len(self.session_heartbeats),
+                'state': 'lobby' if not self.game_started else ('ended' if self.game_ended else ('voting' if self.voting_active else 'running')),
+                'created_at': self.created_at.strftime('%d.%m. %H:%M'),
+                'idle_seconds': int(time.monotonic() - self.last_activity)
+            }
 
-def cleanup_inactive_sessions():
-    """Entfernt inaktive Sessions und Spieler"""
-    global players, game_players, player_sessions, session_heartbeats
-    current_time = datetime.now()
-    inactive_sessions = []
-    for session_id, last_heartbeat in session_heartbeats.items():
-        if current_time - last_heartbeat > timedelta(seconds=HEARTBEAT_TIMEOUT):
-            inactive_sessions.append(session_id)
+def get_room(room_id):
+    """Gibt den Raum mit dieser ID zurück (oder None); mit geteiltem State-Store
+    auch Räume, die ein anderer Worker angelegt hat"""
+    with rooms_lock:
+        room = rooms.get(room_id)
+    if room is not None:
+        return sync_room(room)
+    if not state_store.shared:
+        return None
+    stored = state_store.load_room(room_id)
+    if stored is None:
+        return None
+    with rooms_lock:
+        room = rooms.get(room_id)
+        materialized = room is None
+        if materialized:
+            room = rooms[room_id] = GameRoom(room_id)
+    room.in_store = True
+    if stored[0] > room.version:
+        room.apply_state(*stored)
+    if materialized:
+        # Sessions, die bisher nur andere Worker gesehen haben, ebenfalls zum Ablauf einplanen
+        now, wall_now = time.monotonic(), time.time()
+        for session_id, last_seen in state_store.load_heartbeats(room_id).items():
+            room.schedule_heartbeat(session_id, now - (wall_now - last_seen))
+    return room
+
+def sync_room(room):
+    """Übernimmt Änderungen anderer Worker aus dem geteilten State-Store.
+    Gibt None zurück, wenn der Raum dort inzwischen geschlossen wurde."""
+    if not state_store.shared:
+        return room
+    version = state_store.room_version(room.room_id)
+    if version is None:
+        if room.in_store and room.room_id != DEFAULT_ROOM_ID:
+            forget_room(room)
+            return None
+        return room
+    room.in_store = True
+    if version > room.version:
+        stored = state_store.load_room(room.room_id)
+        if stored is not None and stored[0] > room.version:
+            room.apply_state(*stored)
+    return room
+
+def create_room(room_id=None):
+    """Legt einen neuen Raum an, None wenn das Raumlimit erreicht ist"""
+    with state_store.transaction():
+        with rooms_lock:
+            existing = set(rooms)
+            existing.update(state_store.list_room_ids())
+            if len(existing) >= MAX_ROOMS:
+                return None
+            while room_id is None or room_id in existing:
+                room_id = secrets.token_hex(3)
+            room = GameRoom(room_id)
+            rooms[room_id] = room
+            state_store.save_room(room)
+            return room
+
+def forget_room(room):
+    """Entfernt einen geschlossenen Raum aus diesem Prozess und informiert verbundene Clients"""
+    with rooms_lock:
+        if rooms.get(room.room_id) is room:
+            del rooms[room.room_id]
+    publish_event('room_closed', {'room_id': room.room_id}, room_id=room.room_id)
+    with room.changed:
+        room.version += 1
+        room.changed.notify_all()
+
+def close_room(room_id):
+    """Schließt einen Raum; verbundene Clients werden informiert. Der Standardraum bleibt bestehen."""
+    if room_id == DEFAULT_ROOM_ID:
+        return False
+    room = get_room(room_id)
+    if room is None:
+        return False
+    state_store.delete_room(room_id)
+    forget_room(room)
+    return True
+
+def current_room():
+    """Raum der aktuellen Session, fällt auf den Standardraum zurück"""
+    room = get_room(session.get('room_id', DEFAULT_ROOM_ID))
+    if room is None:
+        session['room_id'] = DEFAULT_ROOM_ID
+        room = get_room(DEFAULT_ROOM_ID)
+    return room
+
+def ensure_default_room():
+    """Legt den Standardraum an, falls ihn noch kein Worker angelegt hat"""
+    with state_store.transaction():
+        return get_room(DEFAULT_ROOM_ID) or create_room(DEFAULT_ROOM_ID)
+
+def restore_rooms():
+    """Stellt beim Start die Räume aus dem State-Journal wieder her (STATE_BACKEND=journal)"""
+    if state_store.shared:
+        return
+    started = time.perf_counter()
+    restored = state_store.restore()
+    now = time.monotonic()
+    for room_id, (version, data) in restored.items():
+        room = GameRoom(room_id)
+        room.apply_state(version, data)
+        # Heartbeats werden nicht gespeichert: alle Sessions bekommen eine neue Frist,
+        # sonst würden Spieler, die nicht zurückkommen, nie entfernt
+        for session_id in set(room.registry.sessions) | set(room.game_players.values()):
+            if session_id:
+                room.schedule_heartbeat(session_id, now)
+        with rooms_lock:
+            rooms[room_id] = room
+    if restored:
+        print(f"♻️ {len(restored)} Raum/Räume aus {STATE_JOURNAL_FILE} wiederhergestellt "
+              f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+
+restore_rooms()
+ensure_default_room()
+
+cleanup_stats = {'runs': 0, 'last_duration_ms': 0.0, 'max_duration_ms': 0.0, 'expired_sessions': 0}
+
+def cleanup_room_sessions(room):
+    """Entfernt inaktive Sessions und Spieler eines Raums, gibt die Zahl entfernter Sessions zurück"""
+    now = time.monotonic()
+    inactive_sessions = room.due_sessions(now)
+    if inactive_sessions and state_store.shared:
+        # Heartbeats, die andere Worker inzwischen gesehen haben, verlängern die Frist
+        wall_now = time.time()
+        for session_id, last_seen in state_store.load_heartbeats(room.room_id, inactive_sessions).items():
+            seen_at = now - (wall_now - last_seen)
+            if seen_at + HEARTBEAT_TIMEOUT > now:
+                room.schedule_heartbeat(session_id, seen_at)
+        inactive_sessions = [sid for sid in inactive_sessions if sid not in room.heartbeat_scheduled]
+    changed = room.expire_kicked_sessions()
+    removed_sessions = []
     for session_id in inactive_sessions:
-        if session_id in player_sessions:
-            player_name = player_sessions[session_id]
-            if player_name in CONTROL_USERS or session.get('control_logged_in', False):
+        player_name = room.registry.name_of(session_id)
+        if player_name is not None:
+            if player_name in CONTROL_USERS:
                 continue
-            if not game_started and player_name in players:
-                players.remove(player_name)
+            if not room.game_started and room.registry.leave_lobby(player_name):
                 # Add game event for player timeout
-                add_game_event('player_timeout', f"⏰ {player_name} wurde wegen Inaktivität entfernt!", "⏰")
+                room.add_game_event('player_timeout', f"⏰ {player_name} wurde wegen Inaktivität entfernt!", "⏰")
                 
                 # Check if not enough players to start the game
-                if len(players) < 3:
-                    add_game_event('lobby_not_ready', f"⏳ Nicht genug Spieler zum Starten ({len(players)}/3)", "⏳")
+                if len(room.registry) < 3:
+                    room.add_game_event('lobby_not_ready', f"⏳ Nicht genug Spieler zum Starten ({len(room.registry)}/3)", "⏳")
                     
-            if game_started and player_name in game_players:
-                del game_players[player_name]
+            if room.game_started and player_name in room.game_players:
+                del room.game_players[player_name]
                 # Add game event for player timeout during game
-                add_game_event('player_timeout', f"⏰ {player_name} wurde wegen Inaktivität aus dem Spiel entfernt!", "⏰")
-            if player_name in assigned_words:
-                del assigned_words[player_name]
-            if player_name in votes:
-                del votes[player_name]
-            del player_sessions[session_id]
-        del session_heartbeats[session_id]
+                room.add_game_event('player_timeout', f"⏰ {player_name} wurde wegen Inaktivität aus dem Spiel entfernt!", "⏰")
+            if player_name in room.assigned_words:
+                del room.assigned_words[player_name]
+            room.votes.withdraw(player_name)
+            room.registry.unbind_session(session_id)
+            changed = True
+        del room.session_heartbeats[session_id]
+        removed_sessions.append(session_id)
+    state_store.delete_heartbeats(room.room_id, removed_sessions)
+    if changed:
+        room.bump_version()
+    return len(removed_sessions)
+
+def cleanup_inactive_sessions():
+    """Entfernt inaktive Sessions und Spieler in allen Räumen und schließt verwaiste Räume"""
+    started = time.perf_counter()
+    with rooms_lock:
+        room_ids = set(rooms)
+    room_ids.update(state_store.list_room_ids())
+    now = time.monotonic()
+    expired = 0
+    for room_id in room_ids:
+        with state_store.transaction():
+            room = get_room(room_id)
+            if room is None:
+                continue
+            with room.lock:
+                expired += cleanup_room_sessions(room)
+                idle = (room.room_id != DEFAULT_ROOM_ID and not room.session_heartbeats
+                        and now - room.last_activity > ROOM_IDLE_TIMEOUT)
+            if idle:
+                close_room(room.room_id)
+    duration = time.perf_counter() - started
+    cleanup_duration.observe(duration)
+    duration_ms = duration * 1000
+    cleanup_stats['runs'] += 1
+    cleanup_stats['last_duration_ms'] = round(duration_ms, 3)
+    cleanup_stats['max_duration_ms'] = round(max(cleanup_stats['max_duration_ms'], duration_ms), 3)
+    cleanup_stats['expired_sessions'] += expired
 
 def start_cleanup_thread():
     """Startet den Cleanup-Thread"""
@@ -227,47 +1948,98 @@ def start_cleanup_thread():
     cleanup_thread = threading.Thread(target=cleanup_loop, daemon=True)
     cleanup_thread.start()
 
-def load_words():
-    """Lädt normale Wörter aus words.txt"""
-    if os.path.exists("words.txt"):
+WORDS_FILE = 'words.txt'
+SPICY_WORDS_FILE = 'spicy_words.txt'
+FALLBACK_WORDS = ("Apfel", "Banane", "Auto", "Haus", "Baum")
+FALLBACK_SPICY_WORDS = ("Massage", "Kuss", "Romantik", "Verführung")
+
+word_index = {
+    'normal': (),
+    'spicy': (),
+    'mixed': (),
+    'mtimes': None,
+    'duplicates_removed': 0,
+    'reloads': 0,
+    'last_reload': None
+}
+word_index_lock = threading.Lock()
+
+def read_word_file(path, fallback):
+    """Liest eine Wortdatei, gibt (Wörter ohne Duplikate, Anzahl entfernter Duplikate) zurück"""
+    if not os.path.exists(path):
+        return fallback, 0
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            words = [line.strip() for line in f if line.strip()]
+    except Exception as e:
+        print(f"[read_word_file] Error reading {path}: {e}")
+        return fallback, 0
+    if not words:
+        print(f"[read_word_file] Warning: {path} is empty, using fallback words.")
+        return fallback, 0
+    unique_words = tuple(dict.fromkeys(words))
+    return unique_words, len(words) - len(unique_words)
+
+def get_word_file_mtimes():
+    """Liefert die mtimes der Wortdateien (None wenn eine Datei fehlt)"""
+    mtimes = []
+    for path in (WORDS_FILE, SPICY_WORDS_FILE):
         try:
-            with open("words.txt", "r", encoding="utf-8") as f:
-                words = [line.strip() for line in f if line.strip()]
-            if not words:
-                print("[load_words] Warning: words.txt is empty, using fallback words.")
-                return ["Apfel", "Banane", "Auto", "Haus", "Baum"]
-            return words
-        except Exception as e:
-            print(f"[load_words] Error: {e}")
-            return ["Apfel", "Banane", "Auto", "Haus", "Baum"]
-    return ["Apfel", "Banane", "Auto", "Haus", "Baum"]
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+def refresh_word_index(force=False):
+    """Lädt die Wortlisten neu, aber nur wenn sich eine der Dateien geändert hat"""
+    mtimes = get_word_file_mtimes()
+    with word_index_lock:
+        if not force and word_index['mtimes'] == mtimes:
+            return False
+        normal_words, normal_duplicates = read_word_file(WORDS_FILE, FALLBACK_WORDS)
+        spicy_words, spicy_duplicates = read_word_file(SPICY_WORDS_FILE, FALLBACK_SPICY_WORDS)
+        word_index['normal'] = normal_words
+        word_index['spicy'] = spicy_words
+        word_index['mixed'] = tuple(dict.fromkeys(normal_words + spicy_words))
+        word_index['mtimes'] = mtimes
+        word_index['duplicates_removed'] = normal_duplicates + spicy_duplicates
+        word_index['reloads'] += 1
+        word_index['last_reload'] = datetime.now().strftime('%H:%M:%S')
+        return True
+
+def load_words():
+    """Gibt die normalen Wörter aus words.txt zurück"""
+    refresh_word_index()
+    return word_index['normal']
 
 def load_spicy_words():
-    """Lädt spicy Wörter aus spicy_words.txt"""
-    if os.path.exists("spicy_words.txt"):
-        try:
-            with open("spicy_words.txt", "r", encoding="utf-8") as f:
-                words = [line.strip() for line in f if line.strip()]
-            if not words:
-                print("[load_spicy_words] Warning: spicy_words.txt is empty, using fallback words.")
-                return ["Massage", "Kuss", "Romantik", "Verführung"]
-            return words
-        except Exception as e:
-            print(f"[load_spicy_words] Error: {e}")
-            return ["Massage", "Kuss", "Romantik", "Verführung"]
-    return ["Massage", "Kuss", "Romantik", "Verführung"]
-
-def get_word_list():
-    """Gibt die aktuelle Wortliste basierend auf dem Modus zurück"""
-    normal_words = load_words()
-    spicy_words = load_spicy_words()
-    
-    if force_spicy:
-        return spicy_words
-    elif spicy_mode:
-        return normal_words + spicy_words
+    """Gibt die spicy Wörter aus spicy_words.txt zurück"""
+    refresh_word_index()
+    return word_index['spicy']
+
+def get_word_list(room):
+    """Gibt die aktuelle Wortliste basierend auf dem Modus des Raums zurück"""
+    refresh_word_index()
+    
+    if room.force_spicy:
+        return word_index['spicy']
+    elif room.spicy_mode:
+        return word_index['mixed']
     else:
-        return normal_words
+        return word_index['normal']
+
+def get_word_stats():
+    """Statistiken zum Wort-Index für das Control Panel"""
+    return {
+        'normal': len(word_index['normal']),
+        'spicy': len(word_index['spicy']),
+        'mixed': len(word_index['mixed']),
+        'duplicates_removed': word_index['duplicates_removed'],
+        'reloads': word_index['reloads'],
+        'last_reload': word_index['last_reload']
+    }
+
+refresh_word_index()
 
 def select_starter(players_list, impostor):
     """Wählt einen Starter aus - Impostor hat 20% Chance, normale Spieler 80%"""
@@ -277,367 +2049,665 @@ def select_starter(players_list, impostor):
         normal_players = [p for p in players_list if p != impostor]
         return random.choice(normal_players)
 
+def is_control_session(data):
+    """Prüft ob Session-Daten zu einem Control-User gehören"""
+    return data.get('control_logged_in', False) or data.get('player_name') in CONTROL_USERS
+
 def is_control_user():
     """Prüft ob aktuelle Session ein Control-User ist"""
-    return session.get('control_logged_in', False) or session.get('player_name') in CONTROL_USERS
-
-def check_all_voted():
-    """Prüft ob alle aktiven Spieler gevoted haben"""
-    active_game_players = list(game_players.keys()) if game_started else players
-    return len(votes) >= len(active_game_players)
+    return is_control_session(session)
 
-def auto_end_voting():
+def auto_end_voting(room):
     """Beendet automatisch das Voting wenn alle gevoted haben"""
-    global voting_active, vote_results, game_ended, winning_word
-    
-    if not voting_active or not check_all_voted():
+    if not room.voting_active or not room.check_all_voted():
         return
     
-    voting_active = False
+    room.voting_active = False
     
-    vote_counts = {}
-    for voted_player in votes.values():
-        vote_counts[voted_player] = vote_counts.get(voted_player, 0) + 1
+    vote_counts = dict(room.votes.counts)
     
     if vote_counts:
-        max_votes = max(vote_counts.values())
-        most_voted = [player for player, count in vote_counts.items() if count == max_votes]
+        most_voted = room.votes.leaders()
         
         if len(most_voted) == 1:
             voted_out = most_voted[0]
-            is_impostor = "IMPOSTOR" in assigned_words.get(voted_out, "")
+            is_impostor = "IMPOSTOR" in room.assigned_words.get(voted_out, "")
             
             if is_impostor:
-                game_ended = True
-                for player, word in assigned_words.items():
+                room.game_ended = True
+                for player, word in room.assigned_words.items():
                     if not "IMPOSTOR" in word:
-                        winning_word = word.replace("Dein Wort: ", "")
+                        room.winning_word = word.replace("Dein Wort: ", "")
                         break
                 # Add game event for impostor caught
-                add_game_event('voting_result', f"🎉 {voted_out} war der IMPOSTOR! Die Spieler haben gewonnen!", "🎉")
+                room.add_game_event('voting_result', f"🎉 {voted_out} war der IMPOSTOR! Die Spieler haben gewonnen!", "🎉")
             else:
                 # Add game event for innocent player voted out
-                add_game_event('voting_result', f"😔 {voted_out} war unschuldig! Der Impostor ist noch da!", "😔")
+                room.add_game_event('voting_result', f"😔 {voted_out} war unschuldig! Der Impostor ist noch da!", "😔")
             
-            vote_results = {
+            room.vote_results = {
                 'voted_out': voted_out,
                 'is_impostor': is_impostor,
                 'votes': vote_counts,
-                'game_ended': game_ended,
-                'winning_word': winning_word
+                'game_ended': room.game_ended,
+                'winning_word': room.winning_word
             }
             
-            if game_ended:
-                update_leaderboard_on_game_end(vote_results)
+            if room.game_ended:
+                update_leaderboard_on_game_end(room, room.vote_results)
+            publish_event('vote_results', room.vote_results, room_id=room.room_id)
         else:
             # Add game event for tie
             tied_names = ", ".join(most_voted)
-            add_game_event('voting_result', f"🤝 Unentschieden zwischen: {tied_names}", "🤝")
-            vote_results = {
+            room.add_game_event('voting_result', f"🤝 Unentschieden zwischen: {tied_names}", "🤝")
+            room.vote_results = {
                 'tie': True,
                 'tied_players': most_voted,
                 'votes': vote_counts
             }
+            publish_event('vote_results', room.vote_results, room_id=room.room_id)
     # Removed the "no votes" case since players always need to vote
 
 def check_impostor_word_guess(guessed_word, actual_word):
     """Prüft ob Impostor das richtige Wort erraten hat (case insensitive)"""
     return guessed_word.strip().lower() == actual_word.strip().lower()
 
+ASSET_MAX_AGE = 365 * 24 * 3600  # gehashte Dateinamen ändern sich mit dem Inhalt
+COMPRESS_MIN_SIZE = 1024  # kleinere Antworten lohnen das Komprimieren nicht
+COMPRESS_MIMETYPES = {'text/html', 'application/json', 'text/plain', 'text/css', 'text/javascript', 'application/javascript'}
+
+assets = {}  # Pfad unter static/ -> Asset
+asset_files = {}  # gehashter Pfad -> Asset
+
+class Asset:
+    """Statische Datei mit Inhalts-Hash im Namen, einmal beim Start vorkomprimiert"""
+
+    def __init__(self, path, content):
+        self.path = path
+        self.content = content
+        self.digest = hashlib.sha256(content).hexdigest()[:12]
+        stem, ext = os.path.splitext(path)
+        self.hashed_path = f"{stem}.{self.digest}{ext}"
+        self.mimetype = 'text/javascript' if ext == '.js' else ('text/css' if ext == '.css' else 'application/octet-stream')
+        # Varianten nur behalten, wenn sie wirklich kleiner sind
+        self.encodings = {}
+        gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(gzipped) < len(content):
+            self.encodings['gzip'] = gzipped
+        if brotli is not None:
+            compressed = brotli.compress(content, quality=11)
+            if len(compressed) < len(content):
+                self.encodings['br'] = compressed
+
+def load_assets():
+    """Liest CSS und JS aus static/, berechnet die Hashes und die komprimierten Varianten"""
+    assets.clear()
+    asset_files.clear()
+    for directory, _, filenames in os.walk(app.static_folder):
+        for filename in filenames:
+            if not filename.endswith(('.css', '.js')):
+                continue
+            full_path = os.path.join(directory, filename)
+            path = os.path.relpath(full_path, app.static_folder).replace(os.sep, '/')
+            try:
+                with open(full_path, 'rb') as f:
+                    asset = Asset(path, f.read())
+            except OSError as e:
+                print(f"[load_assets] Error: {e}")
+                continue
+            assets[path] = asset
+            asset_files[asset.hashed_path] = asset
+
+@app.template_global()
+def asset_url(path):
+    """URL mit Inhalts-Hash für eine Datei aus static/ (Fallback: normale Static-URL)"""
+    asset = assets.get(path)
+    if asset is None:
+        return url_for('static', filename=path)
+    return url_for('asset', filename=asset.hashed_path)
+
+def preferred_encoding(available):
+    """Beste vom Client akzeptierte Kodierung aus `available` (Brotli vor gzip), sonst None"""
+    for encoding in ('br', 'gzip'):
+        if encoding in available and request.accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+@app.route('/assets/<path:filename>')
+def asset(filename):
+    """Gehashte statische Dateien: dürfen ein Jahr unverändert im Browser-Cache bleiben"""
+    asset = asset_files.get(filename)
+    if asset is None:
+        return Response('Not found\n', 404, mimetype='text/plain')
+    encoding = preferred_encoding(asset.encodings)
+    if request.if_none_match.contains_weak(asset.digest):
+        response = make_response('', 304)
+    else:
+        response = make_response(asset.encodings[encoding] if encoding else asset.content)
+        response.mimetype = asset.mimetype
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(asset.digest, weak=encoding is not None)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = f'public, max-age={ASSET_MAX_AGE}, immutable'
+    return response
+
+load_assets()
+
+@app.after_request
+def compress_response(response):
+    """Komprimiert größere HTML- und JSON-Antworten mit gzip, wenn der Client es annimmt"""
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESS_MIMETYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    if response.content_length is None or response.content_length < COMPRESS_MIN_SIZE:
+        return response
+    if preferred_encoding({'gzip'}) is None:
+        return response
+    response.set_data(gzip.compress(response.get_data(), compresslevel=6))
+    response.headers['Content-Encoding'] = 'gzip'
+    # gleiche Daten, andere Bytes: schwaches ETag (If-None-Match vergleicht schwach)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def start_realtime_server(reuse_port=False):
+    """Startet den WebSocket-Server aus realtime.py neben der Flask-App, wenn REALTIME_PORT gesetzt ist"""
+    global realtime_server
+    if not REALTIME_PORT or realtime_server is not None:
+        return realtime_server
+    import realtime
+    # dieses Modul übergeben: beim Start als Skript heißt es __main__, nicht ImposterGame
+    realtime_server = realtime.start_in_thread(sys.modules[__name__], REALTIME_PORT, reuse_port=reuse_port)
+    return realtime_server
+
+# Endpoints, die den Spielzustand nur lesen. Alle anderen sind Befehle, die pro Raum
+# serialisiert laufen: erst die Store-Transaktion (geteilter Store), dann das Raum-Lock.
+# Lesende Endpoints nehmen das Raum-Lock nur kurz für einen konsistenten Schnappschuss.
+READ_ONLY_ENDPOINTS = {'static', 'asset', 'api_status', 'api_stream', 'api_leaderboard', 'api_am_i_kicked',
+                       'api_start_votes', 'api_heartbeat', 'api_control_stats', 'api_room_status', 'control_panel', 'word',
+                       'api_console_output', 'api_backup_leaderboard', 'api_download_leaderboard_backup',
+                       'api_list_leaderboard_backups', 'api_download_leaderboard_backup_file', 'metrics'}
+# Seiten, deren GET nur liest; POST (Beitritt) läuft als Befehl
+READ_ONLY_GET_ENDPOINTS = {'index'}
+# Befehle, die zwischen Räumen wechseln oder fremde Räume ändern, sperren selbst
+# (sonst könnten zwei Requests je ein Raum-Lock halten und auf das andere warten)
+ROOM_SWITCH_ENDPOINTS = {'join_room', 'new_room', 'api_rooms', 'api_close_room', 'api_settings'}
+
+@app.before_request
+def start_request_timer():
+    # als erster Hook registriert: die Wartezeit auf das Raum-Lock zählt mit
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is not None:
+        # Route-Muster statt Pfad, damit /room/<room_id> nicht pro Raum eine Zeitreihe erzeugt
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        http_requests_total.inc(request.method, route, response.status_code)
+        http_request_duration.observe(time.perf_counter() - started, request.method, route)
+    return response
+
+@app.before_request
+def begin_room_command():
+    if request.endpoint in READ_ONLY_ENDPOINTS:
+        return
+    if request.method == 'GET' and request.endpoint in READ_ONLY_GET_ENDPOINTS:
+        return
+    if state_store.shared:
+        state_store.begin()
+        g.state_transaction = True
+    if request.endpoint not in ROOM_SWITCH_ENDPOINTS:
+        room = current_room()
+        room.lock.acquire()
+        g.room_lock = room.lock
+
+@contextlib.contextmanager
+def room_command():
+    """Befehlspfad für einen ändernden Zweig eines sonst lesenden Endpoints, wie
+    begin_room_command: Store-Transaktion, Raum abgleichen, Raum-Lock. Liefert den Raum."""
+    with state_store.transaction():
+        room = current_room()
+        with room.lock:
+            yield room
+
+@app.teardown_request
+def end_room_command(error=None):
+    if g.pop('state_transaction', False):
+        if error is None:
+            state_store.commit()
+        else:
+            state_store.rollback()
+    room_lock = g.pop('room_lock', None)
+    if room_lock is not None:
+        room_lock.release()
+
 @app.route("/api/leaderboard")
 def api_leaderboard():
-    """API-Endpoint für Leaderboard-Daten"""
-    player_wins = get_top_winners('players')
-    impostor_wins = get_top_winners('impostors')
-    
-    formatted_players = [
-        {'name': format_name(name), 'wins': wins} 
-        for name, wins in player_wins
-    ]
-    formatted_impostors = [
-        {'name': format_name(name), 'wins': wins} 
-        for name, wins in impostor_wins
-    ]
-    
-    return jsonify({
-        'players': formatted_players,
-        'impostors': formatted_impostors
-    })
+    """API-Endpoint für Leaderboard-Daten (vorserialisiert, 304 solange unverändert).
+    ?top=K            nur die ersten K je Rolle
+    ?offset=&limit=   eine Seite je Rolle
+    ?around=<name>    Platz des Spielers je Rolle plus ?neighbours= Plätze davor und danach
+    Die Varianten liefern zusätzlich die Gesamtzahl je Rolle."""
+    args = request.args
+    if 'around' in args:
+        name = args.get('around', '').strip().lower()
+        neighbours = min(max(args.get('neighbours', LEADERBOARD_NEIGHBOURS, type=int), 0), LEADERBOARD_PAGE_MAX // 2)
+        params = f"around-{hashlib.sha1(name.encode()).hexdigest()[:12]}-{neighbours}"
+        render = lambda: leaderboard_around(name, neighbours)
+    elif 'top' in args or 'offset' in args or 'limit' in args:
+        offset = 0 if 'top' in args else max(args.get('offset', 0, type=int), 0)
+        limit = min(max(args.get('top' if 'top' in args else 'limit', LEADERBOARD_PAGE_MAX, type=int), 1), LEADERBOARD_PAGE_MAX)
+        params = f"{offset}-{limit}"
+        render = lambda: leaderboard_page(offset, limit)
+    else:
+        params = None
+    if params is None:
+        body, etag = get_leaderboard_response()
+    else:
+        etag = f"{leaderboard_store.epoch}-lb-{sync_leaderboard()}-{params}"
+    if request.if_none_match.contains_weak(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(body if params is None else json.dumps(render(), ensure_ascii=False))
+        response.mimetype = 'application/json'
+    response.set_etag(etag)
+    # Browser sollen jedes Mal revalidieren – sie schicken dann selbst If-None-Match
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def status_etag(room, player_name):
+    """ETag für /api/status: Raum, Zustandsversion plus die sessionabhängigen Felder"""
+    return f"{state_store.epoch}-{room.room_id}-{room.version}-{player_name or ''}-{int(is_control_user())}"
+
+class StatusView:
+    """Schnappschuss eines Raums für /api/status: unter dem Raum-Lock angelegt (gemeinsamer Teil,
+    Diffs zu den Versionen in `bases`, Chat und die pro Spieler nötigen Felder als Kopien),
+    danach ohne Lock für beliebig viele Sessions auswertbar. Der WebSocket-Push hält das
+    Raum-Lock so nur einmal kurz statt für den Status jeder Verbindung."""
+
+    def __init__(self, room, bases=()):
+        self.shared_json, self.latest_chat_json = room.status_snapshot()
+        self.version = room.version
+        self.epoch = state_store.epoch
+        self.deltas = {base: room.status_delta(base) for base in bases if base is not None}
+        self.chat = room.current_chat().copy()
+        self.revealed = room.revealed
+        self.game_started = room.game_started
+        self.assigned_words = dict(room.assigned_words)
+        self.game_players = set(room.game_players)
+        self.players = set(room.registry.lobby_players()) | self.game_players
+
+    def cursor(self):
+        """(Version, Epoche, Chat-Schlüssel, letzte Chat-ID), wie sie ein Client danach kennt"""
+        return self.version, self.epoch, self.chat.key, self.chat.next_id - 1
+
+    def render(self, player_name, is_control, base=None, epoch=None, chat_key=None, after_id=None):
+        """JSON-Text der /api/status-Antwort. Mit base/epoch nur der Diff seit dieser Version
+        (sofern beim Anlegen in `bases`), mit chat_key/after_id nur neue Chat-Nachrichten."""
+        shared_json = self.shared_json
+        if base is not None and epoch == self.epoch and self.deltas.get(base) is not None:
+            shared_json = self.deltas[base]
+
+        player_word = ""
+
+        if self.revealed and player_name and player_name in self.assigned_words:
+            player_word = self.assigned_words[player_name]
+
+        # Sonst die letzten CHAT_STATUS_LIMIT Nachrichten (vorserialisiert)
+        chat = self.chat
+        chat_last_id = chat.next_id - 1
+        chat_messages = None
+        if chat_key == chat.key:
+            chat_messages = chat.after(after_id)
+        chat_incremental = chat_messages is not None
+        if chat_incremental:
+            chat_json = json.dumps(chat_messages, ensure_ascii=False)
+        else:
+            chat_json = self.latest_chat_json
+
+        # Nur dieser kleine Teil hängt von der Session ab und wird pro Aufruf serialisiert
+        overlay = json.dumps({
+            'player_word': player_word,
+            'is_logged_in': player_name is not None and player_name in self.players,
+            'player_name': player_name,
+            'is_control': is_control,
+            'can_rejoin': self.game_started and player_name in self.assigned_words and player_name not in self.game_players,
+            'announce_spicy_mode': announce_spicy_mode,
+            'chat_key': chat.key,
+            'chat_incremental': chat_incremental,
+            'chat_last_id': chat_last_id
+        }, ensure_ascii=False)
+        return f'{shared_json}, "chat_messages": {chat_json}, {overlay[1:]}'
+
+def build_status(room, player_name, is_control, base=None, epoch=None, chat_key=None, after_id=None):
+    """JSON-Text der /api/status-Antwort für eine Session (siehe StatusView.render).
+    Aufruf mit gehaltenem Raum-Lock."""
+    bases = (base,) if epoch == state_store.epoch else ()
+    return StatusView(room, bases).render(player_name, is_control, base, epoch, chat_key, after_id)
 
 @app.route("/api/status")
 def api_status():
-    """API-Endpoint für Live-Updates mit Heartbeat"""
+    """API-Endpoint für Live-Updates mit Heartbeat.
+    Mit ?since=<version> wartet der Request, bis sich der Zustand ändert (Long-Polling)."""
+    room = current_room()
     session_id = session.get('session_id')
     player_name = session.get('player_name')
-    
+
     if session_id:
-        update_heartbeat(session_id)
-    
-    player_word = ""
-    
-    if revealed and player_name and player_name in assigned_words:
-        player_word = assigned_words[player_name]
-    
-    active_players = list(game_players.keys()) if game_started else players
-    
-    return jsonify({
-        'players': active_players,
-        'game_started': game_started,
-        'spicy_mode': spicy_mode,
-        'force_spicy': force_spicy,
-        'revealed': revealed,
-        'player_word': player_word,
-        'is_logged_in': player_name is not None and (player_name in players or player_name in game_players),
-        'player_name': player_name,
-        'chat_messages': get_current_chat()[-50:],
-        'current_starter': current_starter,
-        'voting_active': voting_active,
-        'votes': votes,
-        'vote_results': vote_results,
-        'game_ended': game_ended,
-        'winning_word': winning_word,
-        'all_voted': check_all_voted(),
-        'is_control': is_control_user(),
-        'impostor_guess_used': impostor_guess_used,
-        'can_rejoin': game_started and player_name in assigned_words and player_name not in game_players,
-        'announce_spicy_mode': announce_spicy_mode,
-        'start_votes': list(start_votes) if not game_started else []
-    })
+        room.update_heartbeat(session_id)
+
+    since = request.args.get('since', type=int)
+    throttled = False
+    if since is not None:
+        if stream_slots.acquire(blocking=False):
+            try:
+                room.wait_for_change(since, STATUS_LONG_POLL_TIMEOUT, session_id)
+            finally:
+                stream_slots.release()
+        else:
+            # alle Plätze belegt: sofort antworten, der Client fragt nach Retry-After wieder
+            throttled = True
+
+    # Konsistenter Schnappschuss: Mutationen am Raum laufen unter demselben Lock
+    with room.lock:
+        etag = status_etag(room, player_name)
+        poll_mode = 'poll' if since is None else 'long_poll'
+        if room.version == since or request.if_none_match.contains_weak(etag):
+            status_polls_total.inc(poll_mode, 'not_modified')
+            response = make_response('', 304)
+        else:
+            status_polls_total.inc(poll_mode, 'full')
+            response = make_response(build_status(room, player_name, is_control_user(),
+                                                  request.args.get('base', type=int), request.args.get('epoch'),
+                                                  request.args.get('chat_key'), request.args.get('after_id', type=int)))
+            response.mimetype = 'application/json'
+    response.set_etag(etag)
+    if throttled:
+        response.headers['Retry-After'] = str(STREAM_RETRY_AFTER)
+    return response
+
+PAGE_SLOTS = ('join', 'player_count', 'players', 'lobby_chat', 'game_chat',
+              'leaderboard_players', 'leaderboard_impostors')
+PAGE_SLOT_MARKERS = {name: Markup(f'<!--slot:{name}-->') for name in PAGE_SLOTS}
+PAGE_SLOT_PATTERN = re.compile(r'<!--slot:(\w+)-->')
+PAGE_LEADERBOARD_LIMIT = 10  # wie playersShowLimit/impostorsShowLimit in index.js
+
+leaderboard_fragments = {'version': None, 'slots': None}
+
+def get_page_shell(room):
+    """Seitengerüst der Startseite: hängt nur von der Raum-ID ab, wird einmal gerendert
+    und an den Slot-Markern in [Text, Slot, Text, ...] zerlegt"""
+    if room.page_shell is None:
+        html = render_template("index.html", room_id=room.room_id, realtime_port=REALTIME_PORT, slot=PAGE_SLOT_MARKERS)
+        room.page_shell = PAGE_SLOT_PATTERN.split(html)
+    return room.page_shell
+
+def get_room_fragments(room):
+    """Spielerliste und Chat, einmal pro Zustandsversion gerendert und von allen Sessions geteilt.
+    Aufruf mit gehaltenem Raum-Lock."""
+    if room.page_fragments is None or room.page_fragments[0] != room.version:
+        players = room.active_players()
+        voted = None
+        if not room.game_started and len(players) >= 3:
+            voted = room.start_votes
+        elif room.voting_active:
+            voted = room.votes
+        chat = render_template("fragments/chat.html", messages=room.current_chat().latest())
+        room.page_fragments = (room.version, {
+            'player_count': str(len(players)),
+            'players': render_template("fragments/players.html", players=players, voted=voted),
+            'lobby_chat': '' if room.game_started else chat,
+            'game_chat': chat if room.game_started and not room.game_ended else ''
+        })
+    return room.page_fragments[1]
+
+def get_leaderboard_fragments():
+    """Top-Einträge beider Leaderboards, neu gerendert nur wenn sich das Leaderboard geändert hat"""
+    version = sync_leaderboard()
+    if leaderboard_fragments['version'] != version:
+        slots = {}
+        for role in ('players', 'impostors'):
+            entries = [{'name': format_name(name), 'wins': wins} for name, wins in get_top_winners(role, PAGE_LEADERBOARD_LIMIT)]
+            slots[f'leaderboard_{role}'] = render_template("fragments/leaderboard.html", entries=entries)
+        leaderboard_fragments['slots'] = slots
+        leaderboard_fragments['version'] = version
+    return leaderboard_fragments['slots']
+
+def render_index(room, is_logged_in=False, error_message=None, kicked_message=None):
+    """Setzt die Startseite aus den gecachten Fragmenten zusammen, pro Request wird nur
+    das Beitrittsformular gerendert. Alles Weitere pro Spieler lädt index.js über /api/status."""
+    slots = {'join': render_template("fragments/join.html", is_logged_in=is_logged_in,
+                                     error_message=error_message, kicked_message=kicked_message)}
+    with room.lock:
+        slots.update(get_room_fragments(room))
+    slots.update(get_leaderboard_fragments())
+    shell = get_page_shell(room)
+    parts = [shell[0]]
+    for index in range(1, len(shell), 2):
+        parts.append(slots[shell[index]])
+        parts.append(shell[index + 1])
+    return ''.join(parts)
 
 @app.route("/", methods=["GET", "POST"])
 def index():
-    global players, game_players, player_sessions, session_heartbeats, kicked_sessions
+    room = current_room()
     error_message = None
-    kicked_message = None
     session_id = session.get('session_id')
-    if session_id and session_id in kicked_sessions:
-        kicked_sessions.remove(session_id)
+    if session_id and session_id in room.kicked_sessions:
+        with room_command() as room:
+            if room.kicked_sessions.pop(session_id, None) is not None:
+                room.bump_version()
         session.clear()
-        kicked_message = "Du wurdest aus dem Spiel entfernt. Du kannst erneut beitreten."
-        return render_template("index.html",
-                             players=list(game_players.keys()) if game_started else players,
-                             game_started=game_started,
-                             spicy_mode=spicy_mode,
-                             force_spicy=force_spicy,
-                             revealed=revealed,
-                             assigned_words=assigned_words,
-                             player_word="",
-                             is_logged_in=False,
-                             player_name=None,
-                             chat_messages=get_current_chat()[-20:],
-                             current_starter=current_starter,
-                             voting_active=voting_active,
-                             votes=votes,
-                             vote_results=vote_results,
-                             public_ip=get_public_ip(),
-                             game_ended=game_ended,
-                             winning_word=winning_word,
-                             is_control=is_control_user(),
-                             impostor_guess_used=impostor_guess_used,
-                             can_rejoin=False,
-                             error_message=error_message,
-                             kicked_message=kicked_message)
-    
+        session['room_id'] = room.room_id
+        return render_index(room, kicked_message="Du wurdest aus dem Spiel entfernt. Du kannst erneut beitreten.")
+
     if request.method == "POST":
         action = request.form.get("action")
-        
+
         if action == "join":
             name = request.form["name"].strip()
             if not (3 <= len(name) <= 20) or not re.match(r'^[A-Za-z0-9äöüÄÖÜß ]+$', name):
                 error_message = "Name muss 3-20 Zeichen lang sein und darf nur Buchstaben, Zahlen und Leerzeichen enthalten."
-            elif name in players or name in game_players:
+            elif room.is_player(name):
                 error_message = "Name ist bereits vergeben. Bitte wähle einen anderen Namen."
-            elif 'session_id' in session and session.get('player_name') in players + list(game_players.keys()):
+            elif 'session_id' in session and room.is_player(session.get('player_name')):
                 error_message = "Du bist bereits im Spiel!"
             else:
                 session_id = generate_session_id()
                 session['session_id'] = session_id
                 session['player_name'] = name
-                player_sessions[session_id] = name
-                update_heartbeat(session_id)
-                if not game_started and name not in players:
-                    players.append(name)
+                room.registry.bind(session_id, name)
+                room.update_heartbeat(session_id)
+                if not room.game_started and room.registry.join_lobby(name):
                     # Add game event for player join
-                    add_game_event('player_join', f"👋 {name} ist der Lobby beigetreten!", "👋")
-                    
+                    room.add_game_event('player_join', f"👋 {name} ist der Lobby beigetreten!", "👋")
+
                     # Check if enough players joined to start the game
-                    if len(players) == 3:
-                        add_game_event('lobby_ready', "🎮 Genug Spieler zum Starten! (3/3)", "🎮")
-                    elif len(players) > 3:
-                        add_game_event('lobby_ready', f"🎮 Genug Spieler zum Starten! ({len(players)}/3)", "🎮")
-                        
-                elif game_started and name in assigned_words and name not in game_players:
-                    game_players[name] = session_id
+                    if len(room.registry) == 3:
+                        room.add_game_event('lobby_ready', "🎮 Genug Spieler zum Starten! (3/3)", "🎮")
+                    elif len(room.registry) > 3:
+                        room.add_game_event('lobby_ready', f"🎮 Genug Spieler zum Starten! ({len(room.registry)}/3)", "🎮")
+
+                elif room.game_started and name in room.assigned_words and name not in room.game_players:
+                    room.game_players[name] = session_id
                     # Add game event for player rejoin
-                    add_game_event('player_rejoin', f"🔄 {name} ist wieder dem Spiel beigetreten!", "🔄")
+                    room.add_game_event('player_rejoin', f"🔄 {name} ist wieder dem Spiel beigetreten!", "🔄")
+                room.bump_version()
                 return redirect(url_for("index"))
-        
+
     if 'session_id' not in session:
         session['session_id'] = generate_session_id()
     session_id = session.get('session_id')
     player_name = session.get('player_name')
     if session_id:
-        update_heartbeat(session_id)
-    player_word = ""
-    if revealed and player_name and player_name in assigned_words:
-        player_word = assigned_words[player_name]
+        room.update_heartbeat(session_id)
     is_active_player = False
     if player_name:
-        if game_started:
-            is_active_player = player_name in game_players
-        else:
-            is_active_player = player_name in players
-    can_rejoin = (game_started and player_name in assigned_words and 
-                  player_name not in game_players)
-    return render_template("index.html", 
-                         players=list(game_players.keys()) if game_started else players,
-                         game_started=game_started,
-                         spicy_mode=spicy_mode,
-                         force_spicy=force_spicy,
-                         revealed=revealed,
-                         assigned_words=assigned_words,
-                         player_word=player_word,
-                         is_logged_in=is_active_player,
-                         player_name=player_name,
-                         chat_messages=get_current_chat()[-20:],
-                         current_starter=current_starter,
-                         voting_active=voting_active,
-                         votes=votes,
-                         vote_results=vote_results,
-                         public_ip=get_public_ip(),
-                         game_ended=game_ended,
-                         winning_word=winning_word,
-                         is_control=is_control_user(),
-                         impostor_guess_used=impostor_guess_used,
-                         can_rejoin=can_rejoin,
-                         error_message=error_message,
-                         kicked_message=kicked_message)
+        with room.lock:
+            if room.game_started:
+                is_active_player = player_name in room.game_players
+            else:
+                is_active_player = player_name in room.registry
+    return render_index(room, is_logged_in=is_active_player, error_message=error_message)
+
+def leave_current_room():
+    """Entfernt die Session aus ihrem Raum (Lobby verlassen)"""
+    room = current_room()
+    player_name = session.get('player_name')
+    session_id = session.get('session_id')
+    was_control = session.get('control_logged_in', False)
+    with room.lock:
+        if player_name and session_id:
+            if not room.game_started and not was_control and room.registry.leave_lobby(player_name):
+                # Add game event for player leave
+                room.add_game_event('player_leave', f"👋 {player_name} hat die Lobby verlassen!", "👋")
+
+                # Check if not enough players to start the game
+                if len(room.registry) < 3:
+                    room.add_game_event('lobby_not_ready', f"⏳ Nicht genug Spieler zum Starten ({len(room.registry)}/3)", "⏳")
+            room.remove_session(session_id)
+            session.clear()
+            session['room_id'] = room.room_id
+            if was_control:
+                session['control_logged_in'] = True
+            room.bump_version()
+
+@app.route("/room/<room_id>")
+def join_room(room_id):
+    """Wechselt in einen anderen Raum"""
+    room = get_room(room_id)
+    if room is None:
+        return "Raum nicht gefunden."
+    if room.room_id != session.get('room_id', DEFAULT_ROOM_ID):
+        leave_current_room()
+        session.pop('player_name', None)
+        session['room_id'] = room.room_id
+    return redirect(url_for("index"))
+
+@app.route("/rooms/new")
+def new_room():
+    """Erstellt einen neuen Raum und wechselt hinein"""
+    room = create_room()
+    if room is None:
+        return "Maximale Anzahl an Räumen erreicht."
+    return join_room(room.room_id)
 
 @app.route("/rejoin")
 def rejoin_game():
     """Re-Join zu laufendem Spiel"""
-    global game_players
-    
+    room = current_room()
     session_id = session.get('session_id')
     player_name = session.get('player_name')
-    
-    if (game_started and player_name and player_name in assigned_words and 
-        player_name not in game_players and session_id):
-        
-        game_players[player_name] = session_id
-        update_heartbeat(session_id)
-    
+
+    if (room.game_started and player_name and player_name in room.assigned_words and
+        player_name not in room.game_players and session_id):
+
+        room.game_players[player_name] = session_id
+        room.update_heartbeat(session_id)
+        room.bump_version()
+
     return redirect(url_for("index"))
 
 @app.route("/leave_lobby")
 def leave_lobby():
     """Verlasse die Lobby"""
-    global players
-    player_name = session.get('player_name')
-    session_id = session.get('session_id')
-    was_control = session.get('control_logged_in', False)
-    if player_name and session_id:
-        if not game_started and player_name in players and not was_control:
-            players.remove(player_name)
-            # Add game event for player leave
-            add_game_event('player_leave', f"👋 {player_name} hat die Lobby verlassen!", "👋")
-            
-            # Check if not enough players to start the game
-            if len(players) < 3:
-                add_game_event('lobby_not_ready', f"⏳ Nicht genug Spieler zum Starten ({len(players)}/3)", "⏳")
-        if session_id in player_sessions:
-            del player_sessions[session_id]
-        if session_id in session_heartbeats:
-            del session_heartbeats[session_id]
-        session.clear()
-        if was_control:
-            session['control_logged_in'] = True
+    leave_current_room()
     return redirect(url_for("index"))
 
 @app.route("/word/<name>")
 def word(name):
+    room = current_room()
     session_id = session.get('session_id')
     player_name = session.get('player_name')
-    
+
     if player_name != name:
         return "Zugriff verweigert! Du kannst nur dein eigenes Wort sehen."
-    
-    if game_started and name not in game_players:
+
+    with room.lock:
+        active = not room.game_started or name in room.game_players
+        role = room.assigned_words.get(name)
+
+    if not active:
         return "Du bist nicht aktiv im Spiel. Bitte rejoine zuerst."
-    
-    if name not in assigned_words:
+
+    if role is None:
         return "Spiel hat noch nicht gestartet oder du bist kein Spieler."
-    
+
     if session_id:
-        update_heartbeat(session_id)
-    
-    return render_template("word.html", name=name, role=assigned_words[name])
+        room.update_heartbeat(session_id)
+
+    return render_template("word.html", name=name, role=role)
 
 @app.route("/send_message", methods=["POST"])
 def send_message():
+    room = current_room()
     player_name = session.get('player_name')
     session_id = session.get('session_id')
-    
+
     # Allow messages in both lobby and game phases
     if not player_name:
         return jsonify({'error': 'Du bist nicht eingeloggt'})
-    
+
     # Check if player is in the appropriate phase
-    if game_started:
-        if player_name not in game_players:
+    if room.game_started:
+        if player_name not in room.game_players:
             return jsonify({'error': 'Du bist kein aktiver Spieler'})
     else:
-        if player_name not in players:
+        if player_name not in room.registry:
             return jsonify({'error': 'Du bist nicht in der Lobby'})
-    
+
     if session_id:
-        update_heartbeat(session_id)
-    
+        room.update_heartbeat(session_id)
+
     message = request.form.get('message', '').strip()
     if message and len(message) <= 200:
-        add_player_message(player_name, message)
-    
+        room.add_player_message(player_name, message)
+        room.bump_version()
+
     return jsonify({'success': True})
 
 @app.route("/guess_word", methods=["POST"])
 def guess_word():
-    global game_ended, vote_results, winning_word, impostor_guess_used
-    
-    if not game_started or game_ended:
+    room = current_room()
+    if not room.game_started or room.game_ended:
         return jsonify({'error': 'Spiel nicht aktiv'})
-    
+
     player_name = session.get('player_name')
     session_id = session.get('session_id')
-    
-    if not player_name or player_name not in game_players:
+
+    if not player_name or player_name not in room.game_players:
         return jsonify({'error': 'Du bist kein aktiver Spieler'})
-    
+
     if session_id:
-        update_heartbeat(session_id)
-    
-    if not ("IMPOSTOR" in assigned_words.get(player_name, "")):
+        room.update_heartbeat(session_id)
+
+    if not ("IMPOSTOR" in room.assigned_words.get(player_name, "")):
         return jsonify({'error': 'Nur der Impostor kann das Wort erraten'})
-    
-    if impostor_guess_used:
+
+    if room.impostor_guess_used:
         return jsonify({'error': 'Du kannst nur einmal raten!'})
-    
+
     guessed_word = request.form.get('guessed_word', '').strip()
-    
+
     if not guessed_word:
         return jsonify({'error': 'Kein Wort eingegeben'})
-    
-    impostor_guess_used = True
-    
+
+    room.impostor_guess_used = True
+
     actual_word = ""
-    for player, word in assigned_words.items():
+    for player, word in room.assigned_words.items():
         if not "IMPOSTOR" in word:
             actual_word = word.replace("Dein Wort: ", "")
             break
-    
+
     if check_impostor_word_guess(guessed_word, actual_word):
-        game_ended = True
-        winning_word = actual_word
-        vote_results = {
+        room.game_ended = True
+        room.winning_word = actual_word
+        room.vote_results = {
             'impostor_won': True,
             'guessed_word': guessed_word,
             'actual_word': actual_word,
@@ -646,13 +2716,15 @@ def guess_word():
             'winning_word': actual_word
         }
 
-        update_leaderboard_on_game_end(vote_results)
-        add_game_event('game', f"Richtig! {player_name} hat gewonnen!")
+        update_leaderboard_on_game_end(room, room.vote_results)
+        publish_event('vote_results', room.vote_results, room_id=room.room_id)
+        room.add_game_event('game', f"Richtig! {player_name} hat gewonnen!")
+        room.bump_version()
         return jsonify({'success': True, 'correct': True, 'message': 'Richtig! Du hast gewonnen!'})
     else:
-        game_ended = True
-        winning_word = actual_word
-        vote_results = {
+        room.game_ended = True
+        room.winning_word = actual_word
+        room.vote_results = {
             'impostor_failed': True,
             'guessed_word': guessed_word,
             'actual_word': actual_word,
@@ -661,176 +2733,162 @@ def guess_word():
             'winning_word': actual_word
         }
 
-        update_leaderboard_on_game_end(vote_results)
-        add_game_event('game', f"Falsch! {player_name} hat verloren!")
+        update_leaderboard_on_game_end(room, room.vote_results)
+        publish_event('vote_results', room.vote_results, room_id=room.room_id)
+        room.add_game_event('game', f"Falsch! {player_name} hat verloren!")
+        room.bump_version()
         return jsonify({'success': True, 'correct': False, 'message': 'Falsch! Die Spieler haben gewonnen!'})
 
+def remove_player(room, player_to_kick):
+    """Entfernt einen Spieler aus dem Raum, gibt seine Session-ID zurück (oder None)"""
+    room.registry.leave_lobby(player_to_kick)
+    if player_to_kick in room.game_players:
+        del room.game_players[player_to_kick]
+    if player_to_kick in room.assigned_words:
+        del room.assigned_words[player_to_kick]
+    room.votes.withdraw(player_to_kick)
+    session_to_remove = room.registry.session_of(player_to_kick)
+    if session_to_remove:
+        room.remove_session(session_to_remove)
+    return session_to_remove
+
 @app.route("/kick_player", methods=["POST"])
 def kick_player():
-    global players, game_players, player_sessions, session_heartbeats, kicked_sessions
+    room = current_room()
     player_to_kick = request.form.get('player_name')
     if not player_to_kick:
         return jsonify({'error': 'Kein Spieler angegeben'})
-    if player_to_kick in players:
-        players.remove(player_to_kick)
-    if player_to_kick in game_players:
-        del game_players[player_to_kick]
-    if player_to_kick in assigned_words:
-        del assigned_words[player_to_kick]
-    if player_to_kick in votes:
-        del votes[player_to_kick]
-    session_to_remove = None
-    for sid, name in player_sessions.items():
-        if name == player_to_kick:
-            session_to_remove = sid
-            break
+    session_to_remove = remove_player(room, player_to_kick)
     if session_to_remove:
-        kicked_sessions.add(session_to_remove)
-        del player_sessions[session_to_remove]
-        if session_to_remove in session_heartbeats:
-            del session_heartbeats[session_to_remove]
-    
+        room.kick_session(session_to_remove)
+        publish_event('kicked', {}, room_id=room.room_id, session_id=session_to_remove)
+
     # Add game event for player kick
-    add_game_event('player_kick', f"🚪 {player_to_kick} wurde aus dem Spiel entfernt!", "🚪")
-    
+    room.add_game_event('player_kick', f"🚪 {player_to_kick} wurde aus dem Spiel entfernt!", "🚪")
+    room.bump_version()
+
     return jsonify({'success': True, 'message': f'{player_to_kick} wurde gekickt'})
 
 @app.route("/vote", methods=["POST"])
 def vote():
-    global votes
-    if not game_started or voting_active == False:
+    room = current_room()
+    if not room.game_started or room.voting_active == False:
         return jsonify({'error': 'Voting nicht aktiv'})
-    
+
     player_name = session.get('player_name')
     session_id = session.get('session_id')
-    
-    if not player_name or player_name not in game_players:
+
+    if not player_name or player_name not in room.game_players:
         return jsonify({'error': 'Du bist kein aktiver Spieler'})
-    
+
     if session_id:
-        update_heartbeat(session_id)
-    
+        room.update_heartbeat(session_id)
+
     voted_player = request.form.get('voted_player')
-    if voted_player and voted_player in game_players and voted_player != player_name:
-        votes[player_name] = voted_player
-        
-        if check_all_voted():
-            auto_end_voting()
-    
+    if voted_player and voted_player in room.game_players and voted_player != player_name:
+        room.votes.cast(player_name, voted_player)
+
+        if room.check_all_voted():
+            auto_end_voting(room)
+        room.bump_version()
+
     return jsonify({'success': True})
 
 @app.route("/start_voting")
 def start_voting():
-    global voting_active, votes, vote_results
-    if game_started and not voting_active and not game_ended:
-        voting_active = True
-        votes = {}
-        vote_results = {}
+    room = current_room()
+    if room.game_started and not room.voting_active and not room.game_ended:
+        room.voting_active = True
+        room.votes.clear()
+        room.vote_results = {}
         # Add game event for voting start
-        add_game_event('voting_start', "🗳️ Abstimmung hat begonnen", "🗳️")
+        room.add_game_event('voting_start', "🗳️ Abstimmung hat begonnen", "🗳️")
+        room.bump_version()
     return redirect(url_for("index"))
 
 @app.route("/end_voting")
 def end_voting():
-    if voting_active:
-        auto_end_voting()
+    room = current_room()
+    if room.voting_active:
+        auto_end_voting(room)
+        room.bump_version()
     return redirect(url_for("index"))
 
 @app.route("/return_to_lobby")
 def return_to_lobby():
     """Zurück zur Lobby - Reset für neues Spiel"""
-    global game_started, assigned_words, revealed, game_messages, current_starter, votes, voting_active, vote_results, game_ended, winning_word, impostor_guess_used, game_players
-    
-    game_started = False
-    assigned_words = {}
-    revealed = False
-    game_messages = []
-    current_starter = ""
-    votes = {}
-    voting_active = False
-    vote_results = {}
-    game_ended = False
-    winning_word = ""
-    impostor_guess_used = False
-    game_players = {}
-    
+    room = current_room()
+    room.reset_round()
+
     session.pop('player_name', None)
-    
+
     # Add game event for return to lobby
-    add_game_event('lobby_return', "🏠 Zurück in der Lobby - Neues Spiel kann beginnen!", "🏠")
-    
+    room.add_game_event('lobby_return', "🏠 Zurück in der Lobby - Neues Spiel kann beginnen!", "🏠")
+    room.bump_version()
+
     return redirect(url_for("index"))
 
 @app.route("/start")
 def start_game():
-    global assigned_words, game_started, current_starter, game_ended, winning_word, impostor_guess_used, game_players, start_votes
-    start_votes.clear()
-    
-    if not players or len(players) < 3:
+    room = current_room()
+    room.start_votes.clear()
+
+    if len(room.registry) < 3:
         return "Mindestens 3 Spieler benötigt."
-    
-    word_list = get_word_list()
+
+    players = room.registry.lobby_players()
+    word_list = get_word_list(room)
     word = random.choice(word_list)
     impostor = random.choice(players)
-    
-    current_starter = select_starter(players, impostor)
-    winning_word = word
-    
+
+    room.current_starter = select_starter(players, impostor)
+    room.winning_word = word
+
     for player in players:
-        if player in player_sessions.values():
-            for sid, name in player_sessions.items():
-                if name == player:
-                    game_players[player] = sid
-                    break
-    
+        sid = room.registry.session_of(player)
+        if sid is not None:
+            room.game_players[player] = sid
+
     for p in players:
         if p == impostor:
-            assigned_words[p] = "Du bist der IMPOSTOR!"
+            room.assigned_words[p] = "Du bist der IMPOSTOR!"
         else:
-            assigned_words[p] = f"Dein Wort: {word}"
-    
-    game_started = True
-    game_ended = False
-    impostor_guess_used = False
-    
+            room.assigned_words[p] = f"Dein Wort: {word}"
+
+    room.game_started = True
+    room.game_ended = False
+    room.impostor_guess_used = False
+
     # Add game events
-    add_game_event('game_start', f"🎬 Das Spiel hat begonnen!", "🎬")
-    add_game_event('game_start', f"🎯 {current_starter} beginnt das Spiel!", "🎯")
+    room.add_game_event('game_start', f"🎬 Das Spiel hat begonnen!", "🎬")
+    room.add_game_event('game_start', f"🎯 {room.current_starter} beginnt das Spiel!", "🎯")
+    room.bump_version()
 
     return redirect(url_for("index"))
 
 @app.route("/reveal")
 def reveal_words():
-    global revealed
-    if game_started and assigned_words and not game_ended:
-        revealed = True
+    room = current_room()
+    if room.game_started and room.assigned_words and not room.game_ended:
+        room.revealed = True
         # Word reveal event removed as requested
+        room.bump_version()
     return redirect(url_for("index"))
 
 @app.route("/reset")
 def reset_game():
-    global players, game_started, assigned_words, revealed, game_messages, current_starter, votes, voting_active, vote_results, game_ended, winning_word, impostor_guess_used, game_players, player_sessions, session_heartbeats, start_votes
-    start_votes.clear()
-    
+    room = current_room()
+    room.start_votes.clear()
+
     # Add game event for game reset
-    add_game_event('game_reset', "🔄 Das Spiel wurde zurückgesetzt!", "🔄")
-    
-    players = []
-    game_started = False
-    assigned_words = {}
-    revealed = False
-    game_messages = []
-    current_starter = ""
-    votes = {}
-    voting_active = False
-    vote_results = {}
-    game_ended = False
-    winning_word = ""
-    impostor_guess_used = False
-    game_players = {}
-    player_sessions = {}
-    session_heartbeats = {}
-    
+    room.add_game_event('game_reset', "🔄 Das Spiel wurde zurückgesetzt!", "🔄")
+
+    room.reset_round()
+    room.registry.clear_lobby()
+    room.registry.clear_sessions()
+    room.session_heartbeats = {}
+    room.bump_version()
+
     return redirect(url_for("index"))
 
 @app.route("/control", methods=["GET", "POST"])
@@ -842,27 +2900,31 @@ def control_panel():
             return redirect(url_for("control_panel"))
         else:
             return render_template("control_login.html", error="Falsches Passwort!")
-    
+
     if not session.get('control_logged_in'):
         return render_template("control_login.html")
-    
-    return render_template("control_panel.html", 
-                         spicy_mode=spicy_mode,
-                         force_spicy=force_spicy,
+
+    room = current_room()
+    return render_template("control_panel.html",
+                         room_id=room.room_id,
+                         spicy_mode=room.spicy_mode,
+                         force_spicy=room.force_spicy,
                          public_ip=get_public_ip())
 
 @app.route("/control/toggle_spicy")
 def control_toggle_spicy():
-    global spicy_mode
     if session.get('control_logged_in'):
-        spicy_mode = not spicy_mode
+        room = current_room()
+        room.spicy_mode = not room.spicy_mode
+        room.bump_version()
     return redirect(url_for("control_panel"))
 
 @app.route("/control/toggle_force_spicy")
 def control_toggle_force_spicy():
-    global force_spicy
     if session.get('control_logged_in'):
-        force_spicy = not force_spicy
+        room = current_room()
+        room.force_spicy = not room.force_spicy
+        room.bump_version()
     return redirect(url_for("control_panel"))
 
 @app.route("/control/start_game")
@@ -885,61 +2947,141 @@ def control_reveal():
 
 @app.route('/api/start_votes')
 def api_start_votes():
-    global start_votes
-    return jsonify({
-        'votes': list(start_votes),
-        'total': len(players),
-        'players': players,
-        'game_started': game_started
-    })
+    room = current_room()
+    with room.lock:
+        return jsonify({
+            'votes': list(room.start_votes),
+            'total': len(room.registry),
+            'players': room.registry.lobby_players(),
+            'game_started': room.game_started
+        })
 
 @app.route('/start_vote', methods=['POST'])
 def start_vote():
-    global start_votes
-    if game_started:
+    room = current_room()
+    if room.game_started:
         return jsonify({'error': 'Game already started'}), 400
     player_name = session.get('player_name')
-    if not player_name or player_name not in players:
+    if not player_name or player_name not in room.registry:
         return jsonify({'error': 'Not a valid player'}), 400
-    start_votes.add(player_name)
-    
-    if len(start_votes) == len(players) and len(players) >= 3:
-        start_votes.clear()
+    room.start_votes.add(player_name)
+    room.bump_version()
+
+    if len(room.start_votes) == len(room.registry) and len(room.registry) >= 3:
+        room.start_votes.clear()
         return start_game()
-    return jsonify({'success': True, 'votes': list(start_votes), 'total': len(players)})
+    return jsonify({'success': True, 'votes': list(room.start_votes), 'total': len(room.registry)})
 
 @app.route('/api/heartbeat')
 def api_heartbeat():
     session_id = session.get('session_id')
     if session_id:
-        update_heartbeat(session_id)
+        current_room().update_heartbeat(session_id)
         return jsonify({'success': True})
     return jsonify({'success': False}), 401
 
+CONTROL_STATS_HISTORY = 16
+control_stats_history = {}  # Token -> zuletzt ausgelieferte Stats, Basis für Diffs an das Control Panel
+control_stats_lock = threading.Lock()
+control_stats_sequence = 0
+
 @app.route('/api/control_stats')
 def api_control_stats():
-    session_id = session.get('session_id')
-    player_name = session.get('player_name')
-    stats = {
-        'game_state': 'lobby' if not game_started else ('ended' if game_ended else ('voting' if voting_active else 'running')),
-        'player_count': len(players) if not game_started else len(game_players),
-        'players': list(players) if not game_started else list(game_players.keys()),
-        'impostor': next((p for p, w in assigned_words.items() if 'IMPOSTOR' in w), None) if game_started else None,
-        'spicy_mode': 'forced' if force_spicy else ('possible' if spicy_mode else 'disabled'),
-        'round': 1 if game_started else 0,
-        'game_started': game_started,
-        'game_ended': game_ended,
-        'voting_active': voting_active,
-        'current_starter': current_starter,
-        'winning_word': winning_word,
-        'settings': {
-            'min_players': 3,
-            'heartbeat_timeout': HEARTBEAT_TIMEOUT,
-            'cleanup_interval': CLEANUP_INTERVAL,
-            'announce_spicy_mode': announce_spicy_mode
+    """Stats für das Control Panel. Mit ?base=<token> nur die Änderungen seit dieser Antwort."""
+    room = current_room()
+    with rooms_lock:
+        all_rooms = list(rooms.values())
+    room_summaries = [r.summary() for r in all_rooms]
+    metrics = metrics_summary()  # sperrt selbst jeden Raum, daher nicht unter room.lock
+    with room.lock:
+        stats = {
+            'room_id': room.room_id,
+            'rooms': room_summaries,
+            'game_state': 'lobby' if not room.game_started else ('ended' if room.game_ended else ('voting' if room.voting_active else 'running')),
+            'player_count': room.active_count(),
+            'players': room.active_players(),
+            'impostor': next((p for p, w in room.assigned_words.items() if 'IMPOSTOR' in w), None) if room.game_started else None,
+            'spicy_mode': 'forced' if room.force_spicy else ('possible' if room.spicy_mode else 'disabled'),
+            'round': 1 if room.game_started else 0,
+            'game_started': room.game_started,
+            'game_ended': room.game_ended,
+            'voting_active': room.voting_active,
+            'current_starter': room.current_starter,
+            'winning_word': room.winning_word,
+            'words': get_word_stats(),
+            'cleanup': dict(cleanup_stats),
+            'metrics': metrics,
+            'settings': {
+                'min_players': 3,
+                'heartbeat_timeout': HEARTBEAT_TIMEOUT,
+                'cleanup_interval': CLEANUP_INTERVAL,
+                'announce_spicy_mode': announce_spicy_mode
+            }
         }
+    global control_stats_sequence
+    base = request.args.get('base')
+    with control_stats_lock:
+        control_stats_sequence += 1
+        token = f"{STATE_EPOCH}-{control_stats_sequence}"
+        base_stats = control_stats_history.get(base)
+        control_stats_history[token] = stats
+        while len(control_stats_history) > CONTROL_STATS_HISTORY:
+            del control_stats_history[next(iter(control_stats_history))]
+    if base_stats is not None:
+        response = diff_state(base_stats, stats, list_fields=('players',))
+        response.update({'delta': True, 'base': base})
+    else:
+        response = dict(stats)
+    response['token'] = token
+    return jsonify(response)
+
+def collect_gauges():
+    """Momentanwerte dieses Prozesses, beim Abruf berechnet"""
+    with rooms_lock:
+        all_rooms = list(rooms.values())
+    sessions = players = chat_messages = 0
+    for r in all_rooms:
+        with r.lock:
+            sessions += len(r.session_heartbeats)
+            players += r.active_count()
+            chat_messages += len(r.lobby_messages) + len(r.game_messages)
+    with stream_lock:
+        streams = len(stream_subscribers)
+    return {
+        'rooms': len(all_rooms),
+        'active_sessions': sessions,
+        'active_players': players,
+        'chat_buffer_messages': chat_messages,
+        'stream_connections': streams
     }
-    return jsonify(stats)
+
+def metrics_summary():
+    """Kennzahlen für das Control Panel (Zähler, Rate berechnet der Browser aus der Differenz)"""
+    summary = collect_gauges()
+    summary.update({
+        'requests_total': http_requests_total.total(),
+        'status_polls_total': status_polls_total.total(),
+        'request_latency': http_request_duration.summary(),
+        'cleanup': cleanup_duration.summary(),
+        'leaderboard_save': leaderboard_save_duration.summary(),
+        'public_ip_lookup': public_ip_duration.summary()
+    })
+    return summary
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus-Endpoint (Textformat). Werte gelten pro Worker-Prozess."""
+    if METRICS_TOKEN:
+        if request.headers.get('Authorization') != f"Bearer {METRICS_TOKEN}" and not is_control_user():
+            return Response('Unauthorized\n', 401, mimetype='text/plain')
+    lines = []
+    for name, value in collect_gauges().items():
+        metric = f"impostor_{name}"
+        lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+    for metric in (http_requests_total, http_request_duration, status_polls_total,
+                   cleanup_duration, leaderboard_save_duration, public_ip_duration):
+        lines += metric.render()
+    return Response('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
 
 @app.route('/api/kick_player', methods=['POST'])
 def api_kick_player():
@@ -949,23 +3091,40 @@ def api_kick_player():
     player_to_kick = data.get('player_name')
     if not player_to_kick:
         return jsonify({'success': False, 'error': 'No player specified'}), 400
-    if player_to_kick in players:
-        players.remove(player_to_kick)
-    if player_to_kick in game_players:
-        del game_players[player_to_kick]
-    if player_to_kick in assigned_words:
-        del assigned_words[player_to_kick]
-    if player_to_kick in votes:
-        del votes[player_to_kick]
-    session_to_remove = None
-    for sid, name in player_sessions.items():
-        if name == player_to_kick:
-            session_to_remove = sid
-            break
-    if session_to_remove:
-        del player_sessions[session_to_remove]
-        if session_to_remove in session_heartbeats:
-            del session_heartbeats[session_to_remove]
+    room = current_room()
+    remove_player(room, player_to_kick)
+    room.bump_version()
+    return jsonify({'success': True})
+
+@app.route('/api/rooms', methods=['GET', 'POST'])
+def api_rooms():
+    """Raumliste (GET) bzw. neuen Raum anlegen (POST)"""
+    if request.method == 'GET':
+        with rooms_lock:
+            all_rooms = list(rooms.values())
+        return jsonify({'rooms': [room.summary() for room in all_rooms]})
+    room = create_room()
+    if room is None:
+        return jsonify({'success': False, 'error': 'Room limit reached'}), 503
+    return jsonify({'success': True, 'room_id': room.room_id, 'join_url': url_for('join_room', room_id=room.room_id)})
+
+@app.route('/api/rooms/<room_id>/status')
+def api_room_status(room_id):
+    room = get_room(room_id)
+    if room is None:
+        return jsonify({'success': False, 'error': 'Room not found'}), 404
+    with room.lock:
+        summary = room.summary()
+        summary['player_names'] = room.active_players()
+        summary['version'] = room.version
+    return jsonify(summary)
+
+@app.route('/api/rooms/<room_id>/close', methods=['POST'])
+def api_close_room(room_id):
+    if not is_control_user():
+        return jsonify({'success': False, 'error': 'Not authorized'}), 403
+    if not close_room(room_id):
+        return jsonify({'success': False, 'error': 'Room cannot be closed'}), 400
     return jsonify({'success': True})
 
 @app.route('/api/reset_leaderboard', methods=['POST'])
@@ -974,39 +3133,34 @@ def api_reset_leaderboard():
         return jsonify({'success': False, 'error': 'Not authorized'}), 403
     data = request.get_json(silent=True) or {}
     which = data.get('which')
-    if which == 'players':
-        leaderboard['players'] = {}
-    elif which == 'impostors':
-        leaderboard['impostors'] = {}
-    elif which == 'both':
-        leaderboard['players'] = {}
-        leaderboard['impostors'] = {}
-    else:
+    if which not in ('players', 'impostors', 'both'):
         return jsonify({'success': False, 'error': 'Invalid option'}), 400
-    save_leaderboard()
+    leaderboard_store.reset(LEADERBOARD_ROLES if which == 'both' else (which,))
+    sync_leaderboard()
     return jsonify({'success': True})
 
 @app.route('/api/spicy_mode', methods=['GET', 'POST'])
 def api_spicy_mode():
-    global spicy_mode, force_spicy
+    room = current_room()
     if request.method == 'GET':
-        mode = 'forced' if force_spicy else ('possible' if spicy_mode else 'disabled')
+        mode = 'forced' if room.force_spicy else ('possible' if room.spicy_mode else 'disabled')
         return jsonify({'mode': mode})
     if not is_control_user():
         return jsonify({'success': False, 'error': 'Not authorized'}), 403
     data = request.get_json(silent=True) or {}
     mode = data.get('mode')
     if mode == 'disabled':
-        spicy_mode = False
-        force_spicy = False
+        room.spicy_mode = False
+        room.force_spicy = False
     elif mode == 'possible':
-        spicy_mode = True
-        force_spicy = False
+        room.spicy_mode = True
+        room.force_spicy = False
     elif mode == 'forced':
-        spicy_mode = False
-        force_spicy = True
+        room.spicy_mode = False
+        room.force_spicy = True
     else:
         return jsonify({'success': False, 'error': 'Invalid mode'}), 400
+    room.bump_version()
     return jsonify({'success': True})
 
 @app.route('/api/settings', methods=['GET', 'POST'])
@@ -1034,17 +3188,56 @@ def api_settings():
             pass
     if 'announce_spicy_mode' in data:
         announce_spicy_mode = bool(data['announce_spicy_mode'])
+        with rooms_lock:
+            all_rooms = list(rooms.values())
+        for room in all_rooms:
+            room.bump_version()
     return jsonify({'success': True})
 
+def read_console_log(path, cursor=None):
+    """Liest server.log ab einem Cursor ("<Datei-ID>:<Byte-Offset>"), ohne die ganze Datei zu laden.
+    Ohne gültigen Cursor (erster Abruf, Datei rotiert oder gekürzt) kommen die letzten
+    CONSOLE_TAIL_LINES Zeilen vom Dateiende, sonst nur die seitdem angehängten Bytes,
+    höchstens CONSOLE_MAX_BYTES pro Antwort. 'reset' heißt: Ausgabe ersetzen statt anhängen."""
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        return {'output': 'No log file found or logging not enabled.', 'cursor': None, 'reset': True}
+    with f:
+        stat = os.fstat(f.fileno())
+        file_id = f"{stat.st_dev}-{stat.st_ino}"  # neue Datei nach Rotation -> neue ID
+        size = stat.st_size
+        start = None
+        if cursor:
+            cursor_id, _, offset = cursor.rpartition(':')
+            if cursor_id == file_id and offset.isdigit() and int(offset) <= size:
+                start = int(offset)
+        reset = start is None
+        if reset:
+            start = max(0, size - CONSOLE_TAIL_BYTES)
+        elif size - start > CONSOLE_MAX_BYTES:
+            start = size - CONSOLE_MAX_BYTES  # Client hängt zu weit hinterher: ältere Bytes überspringen
+            reset = True
+        f.seek(start)
+        data = f.read(min(size - start, CONSOLE_MAX_BYTES))
+    if reset and start > 0:
+        skip = data.find(b'\n') + 1  # angeschnittene erste Zeile weglassen
+        data = data[skip:]
+        start += skip
+    # Nur ganze Zeilen, der Rest kommt mit dem nächsten Abruf (auch keine halben UTF-8-Zeichen).
+    # Eine einzelne Zeile länger als CONSOLE_MAX_BYTES wird trotzdem ausgeliefert.
+    end = data.rfind(b'\n') + 1
+    if end == 0 and len(data) >= CONSOLE_MAX_BYTES:
+        end = len(data)
+    text = data[:end].decode('utf-8', errors='replace')
+    if reset:
+        text = ''.join(text.splitlines(keepends=True)[-CONSOLE_TAIL_LINES:])
+    return {'output': text, 'cursor': f"{file_id}:{start + end}", 'reset': reset}
+
 @app.route('/api/console_output')
 def api_console_output():
-    log_path = 'server.log'
-    if os.path.exists(log_path):
-        with open(log_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()[-40:]
-        return jsonify({'output': ''.join(lines)})
-    else:
-        return jsonify({'output': 'No log file found or logging not enabled.'})
+    """Neue Zeilen von server.log seit ?cursor= (siehe read_console_log)"""
+    return jsonify(read_console_log(CONSOLE_LOG_FILE, request.args.get('cursor')))
 
 @app.route('/api/change_password', methods=['POST'])
 def api_change_password():
@@ -1058,32 +3251,76 @@ def api_change_password():
     CONTROL_PASSWORD = new_password
     return jsonify({'success': True})
 
+@app.route('/api/stream')
+def api_stream():
+    """Server-Sent Events: pusht Zustands-, Chat-, Vote- und Kick-Events.
+    Die offene Verbindung hält gleichzeitig den Heartbeat der Session aktuell.
+    Sind schon STREAM_MAX_OPEN Streams offen, kommt 503 und index.js pollt stattdessen."""
+    if not stream_slots.acquire(blocking=False):
+        response = jsonify({'success': False, 'error': 'Too many open streams'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(STREAM_RETRY_AFTER)
+        return response
+    room = current_room()
+    session_id = session.get('session_id')
+    subscriber_queue = queue.Queue(STREAM_QUEUE_SIZE)
+    with stream_lock:
+        stream_subscribers[subscriber_queue] = (room.room_id, session_id)
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            yield format_sse('hello', {'version': room.version, 'room_id': room.room_id})
+            if session_id and session_id in room.kicked_sessions:
+                yield format_sse('kicked', {})
+            # Verbindung regelmäßig neu aufbauen lassen, damit Threads nicht ewig belegt sind
+            deadline = time.monotonic() + STREAM_MAX_AGE
+            while time.monotonic() < deadline and get_room(room.room_id) is room:
+                if session_id:
+                    room.update_heartbeat(session_id)
+                try:
+                    event_type, data = subscriber_queue.get(timeout=min(STREAM_KEEPALIVE, HEARTBEAT_TIMEOUT / 2))
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event_type, data)
+        finally:
+            with stream_lock:
+                stream_subscribers.pop(subscriber_queue, None)
+
+    response = Response(generate(), mimetype='text/event-stream')
+    # auch wenn der Generator nie startet (Client schon weg), gibt close() den Platz frei
+    response.call_on_close(stream_slots.release)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @app.route('/api/am_i_kicked')
 def api_am_i_kicked():
+    room = current_room()
     session_id = session.get('session_id')
-    is_kicked = session_id in kicked_sessions if session_id else False
+    is_kicked = session_id in room.kicked_sessions if session_id else False
     return jsonify({'was_kicked': is_kicked})
 
 @app.route('/api/backup_leaderboard')
 def api_backup_leaderboard():
     if not is_control_user():
         return jsonify({'success': False, 'error': 'Not authorized'}), 403
-    if os.path.exists(LEADERBOARD_FILE):
-        return send_file(LEADERBOARD_FILE, as_attachment=True, download_name='leaderboard.json')
-    else:
-        return jsonify({'success': False, 'error': 'No leaderboard file found'}), 404
+    content = io.BytesIO(export_leaderboard_json().encode('utf-8'))
+    return send_file(content, mimetype='application/json', as_attachment=True, download_name='leaderboard.json')
 
 @app.route('/api/load_leaderboard_backup', methods=['POST'])
 def api_load_leaderboard_backup():
     if not is_control_user():
         return jsonify({'success': False, 'error': 'Not authorized'}), 403
-    backup_file = 'leaderboard_bckp'
-    if os.path.exists(backup_file):
-        shutil.copyfile(backup_file, LEADERBOARD_FILE)
-        load_leaderboard()
-        return jsonify({'success': True})
-    else:
+    entries = leaderboard_backups.entries()
+    if not entries:
         return jsonify({'success': False, 'error': 'No backup file found'}), 404
+    try:
+        import_leaderboard(json.loads(leaderboard_backups.read(entries[0]['name'])))
+    except (OSError, EOFError, TypeError, ValueError, AttributeError) as e:
+        return jsonify({'success': False, 'error': f'Invalid backup file: {e}'}), 400
+    return jsonify({'success': True, 'backup': entries[0]['name']})
 
 @app.route('/api/upload_leaderboard', methods=['POST'])
 def api_upload_leaderboard():
@@ -1100,9 +3337,7 @@ def api_upload_leaderboard():
             'players' not in json_data or 'impostors' not in json_data or
             not isinstance(json_data['players'], dict) or not isinstance(json_data['impostors'], dict)):
             return jsonify({'success': False, 'error': 'Invalid leaderboard format'}), 400
-        with open(LEADERBOARD_FILE, 'wb') as f:
-            f.write(data)
-        load_leaderboard()
+        import_leaderboard(json_data)
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'error': f'Invalid file: {e}'}), 400
@@ -1111,11 +3346,10 @@ def api_upload_leaderboard():
 def api_download_leaderboard_backup():
     if not is_control_user():
         return jsonify({'success': False, 'error': 'Not authorized'}), 403
-    backup_file = 'leaderboard_bckp'
-    if os.path.exists(backup_file):
-        return send_file(backup_file, as_attachment=True, download_name='leaderboard_bckp.json')
-    else:
+    entries = leaderboard_backups.entries()
+    if not entries:
         return jsonify({'success': False, 'error': 'No backup file found'}), 404
+    return send_leaderboard_backup(entries[0]['name'])
 
 @app.route('/api/upload_leaderboard_file', methods=['POST'])
 def api_upload_leaderboard_file():
@@ -1132,9 +3366,7 @@ def api_upload_leaderboard_file():
             'players' not in json_data or 'impostors' not in json_data or
             not isinstance(json_data['players'], dict) or not isinstance(json_data['impostors'], dict)):
             return jsonify({'success': False, 'error': 'Invalid leaderboard format'}), 400
-        with open(LEADERBOARD_FILE, 'wb') as f:
-            f.write(data)
-        load_leaderboard()
+        import_leaderboard(json_data)
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'error': f'Invalid file: {e}'}), 400
@@ -1143,74 +3375,48 @@ def api_upload_leaderboard_file():
 def api_create_leaderboard_backup():
     if not is_control_user():
         return jsonify({'success': False, 'error': 'Not authorized'}), 403
-    if not os.path.exists(LEADERBOARD_FILE):
-        return jsonify({'success': False, 'error': 'No leaderboard file found'}), 404
-    now = datetime.now()
-    ts = now.strftime('%d-%H-%M')
-    backup_name = f'leaderboard_bckp_{ts}.json'
-    shutil.copyfile(LEADERBOARD_FILE, backup_name)
-    return jsonify({'success': True, 'backup': backup_name})
+    try:
+        entry = create_leaderboard_backup()
+    except (OSError, sqlite3.Error) as e:
+        print(f"[api_create_leaderboard_backup] Error: {e}")
+        return jsonify({'success': False, 'error': f'Backup failed: {e}'}), 500
+    return jsonify({'success': True, 'backup': entry['name'], 'entry': entry})
 
 @app.route('/api/list_leaderboard_backups')
 def api_list_leaderboard_backups():
     if not is_control_user():
         return jsonify({'success': False, 'error': 'Not authorized'}), 403
-    files = sorted(glob.glob(BACKUP_PATTERN), reverse=True)
-    return jsonify({'success': True, 'backups': files})
+    entries = leaderboard_backups.entries()
+    return jsonify({'success': True, 'backups': [entry['name'] for entry in entries], 'entries': entries})
 
 @app.route('/api/download_leaderboard_backup_file')
 def api_download_leaderboard_backup_file():
     if not is_control_user():
         return jsonify({'success': False, 'error': 'Not authorized'}), 403
     name = request.args.get('name')
-    if not name or not os.path.exists(name) or not name.startswith('leaderboard_bckp_') or not name.endswith('.json'):
+    if not name or leaderboard_backups.find(name) is None:
         return jsonify({'success': False, 'error': 'Invalid backup file'}), 400
-    return send_from_directory('.', name, as_attachment=True)
-
-def add_game_event(event_type, message, emoji="🎮"):
-    """Adds a game event message with special styling"""
-    global lobby_messages, game_messages
-    
-    event_message = {
-        'player': 'SYSTEM',
-        'message': message,
-        'timestamp': datetime.now().strftime('%H:%M:%S'),
-        'is_event': True,
-        'event_type': event_type,
-        'emoji': emoji
-    }
-    
-    # Add to the appropriate chat based on game state
-    if game_started:
-        game_messages.append(event_message)
-    else:
-        lobby_messages.append(event_message)
-
-def get_current_chat():
-    """Returns the appropriate chat based on game state"""
-    return game_messages if game_started else lobby_messages
+    return send_leaderboard_backup(name)
 
-def add_player_message(player_name, message):
-    """Adds a player message to the appropriate chat"""
-    global lobby_messages, game_messages
-    
-    player_message = {
-        'player': player_name,
-        'message': message,
-        'timestamp': datetime.now().strftime('%H:%M:%S'),
-        'is_event': False
-    }
-    
-    if game_started:
-        game_messages.append(player_message)
-    else:
-        lobby_messages.append(player_message)
+def send_leaderboard_backup(name):
+    """Backup entpackt als .json-Download, damit es direkt wieder hochgeladen werden kann"""
+    try:
+        raw = leaderboard_backups.read(name)
+    except (OSError, EOFError, ValueError) as e:
+        print(f"[send_leaderboard_backup] Error: {e}")
+        return jsonify({'success': False, 'error': f'Backup file unreadable: {e}'}), 500
+    if raw is None:
+        return jsonify({'success': False, 'error': 'No backup file found'}), 404
+    download_name = name[:-len('.gz')] if name.endswith('.gz') else name
+    return send_file(io.BytesIO(raw), mimetype='application/json', as_attachment=True, download_name=download_name)
 
 def start_server():
-    """Startet Cleanup-Thread"""
+    """Startet Cleanup- und Backup-Thread und (optional) den WebSocket-Server"""
     start_cleanup_thread()
+    start_backup_thread()
+    start_realtime_server()
     
-    public_ip = get_public_ip()
+    public_ip = get_public_ip(wait=10)
     local_ip = get_local_ip()
     print(f"🎭 Impostor Game Server gestartet!")
     print(f"🌐 Öffentliche IP: {public_ip}:5000")
@@ -1232,6 +3438,8 @@ if __name__ == '__main__':
     
     if is_railway:
         start_cleanup_thread()
+        start_backup_thread()
+        refresh_public_ip()
         print("🚀 Railway-Modus: Gunicorn übernimmt Server-Start")
         print(f"🔐 Control-Passwort: {CONTROL_PASSWORD}")
         print(f"🏆 Leaderboard-System aktiv")
@@ -1259,7 +3467,7 @@ if __name__ == '__main__':
                                       bg='#f0f0f0', fg='#333')
                 title_label.pack(pady=20)
                 
-                public_ip = get_public_ip()
+                public_ip = get_public_ip(wait=10)
                 local_ip = get_local_ip()
                 server_label = tk.Label(gui, text=f"Server läuft auf:\nLokal: {local_ip}:5000\nÖffentlich: {public_ip}:5000", 
                                        font=("Arial", 12), 
@@ -1293,11 +3501,13 @@ if __name__ == '__main__':
             except ImportError:
                 print("⚠️ Tkinter nicht verfügbar - starte im Headless-Modus")
                 start_server()
-                app.run(host='0.0.0.0', port=5000, debug=True)
+                app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=not REALTIME_PORT)
         else:
             print("🖥️ Headless-Modus erkannt - starte Server ohne GUI")
             start_server()
-            app.run(host='0.0.0.0', port=5000, debug=True)
+            app.run(host='0.0.0.0', port=5000, debug=True, use_reloader=not REALTIME_PORT)
 
 else:
-    start_cleanup_thread()
\ No newline at end of file
+    start_cleanup_thread()
+    start_backup_thread()
+    refresh_public_ip()
\ No newline at end of file
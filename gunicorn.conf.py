@@ -0,0 +1,6 @@
+# Wird von Gunicorn automatisch aus dem Arbeitsverzeichnis geladen (siehe Procfile)
+
+def post_worker_init(worker):
+    """Mit REALTIME_PORT startet jeder Worker zusätzlich den WebSocket-Server (SO_REUSEPORT verteilt die Verbindungen)"""
+    import ImposterGame
+    ImposterGame.start_realtime_server(reuse_port=True)
@@ -0,0 +1,279 @@
+"""Lasttest für das Impostor-Spiel.
+
+Simuliert N Browser-Sessions mit dem Abfrage-Rhythmus von index.html:
+Seite laden, beitreten, /api/status (Long-Polling oder Intervall), /api/am_i_kicked
+alle 2 s, /api/leaderboard alle 10 s, gelegentlich Chat, Start-Votes, Votes und
+Impostor-Tipps. Gemessen werden Durchsatz und p50/p95/p99 pro Endpoint; das
+Ergebnis kann als JSON gespeichert und mit einem früheren Lauf verglichen werden.
+
+    python loadtest.py --sessions 50 --duration 60 --url http://localhost:5000 --output vorher.json
+    python loadtest.py --sessions 50 --duration 60 --output nachher.json --compare vorher.json
+
+Ohne --url läuft der Test im selben Prozess über den Flask-Test-Client
+(aus dem Projektverzeichnis starten, damit die Wortlisten gefunden werden).
+"""
+import argparse
+import json
+import random
+import threading
+import time
+
+import requests
+
+LEADERBOARD_INTERVAL = 10
+KICK_CHECK_INTERVAL = 2
+STATUS_INTERVAL = 2
+LONG_POLL_TIMEOUT = 40
+CHAT_MESSAGES = ["Hallo!", "Wer war das?", "Ich weiß es nicht", "Verdächtig...", "Gutes Spiel", "Nochmal?"]
+
+
+class Stats:
+    """Sammelt Latenzen (ms) und Fehler pro Endpoint"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, endpoint, latency_ms, ok):
+        with self.lock:
+            self.latencies.setdefault(endpoint, []).append(latency_ms)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self, duration):
+        """Durchsatz und Perzentile pro Endpoint"""
+        endpoints = {}
+        with self.lock:
+            for endpoint, values in sorted(self.latencies.items()):
+                values = sorted(values)
+                endpoints[endpoint] = {
+                    'count': len(values),
+                    'errors': self.errors.get(endpoint, 0),
+                    'rps': round(len(values) / duration, 2),
+                    'mean_ms': round(sum(values) / len(values), 2),
+                    'p50_ms': round(percentile(values, 50), 2),
+                    'p95_ms': round(percentile(values, 95), 2),
+                    'p99_ms': round(percentile(values, 99), 2),
+                    'max_ms': round(values[-1], 2)
+                }
+        total = sum(e['count'] for e in endpoints.values())
+        return {
+            'duration_s': round(duration, 2),
+            'total_requests': total,
+            'throughput_rps': round(total / duration, 2),
+            'errors': sum(e['errors'] for e in endpoints.values()),
+            'endpoints': endpoints
+        }
+
+
+def percentile(sorted_values, p):
+    """Perzentil mit linearer Interpolation"""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+class HttpClient:
+    """Eine Browser-Session gegen einen laufenden Server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.http = requests.Session()
+        self.retry_after = None  # Retry-After der letzten Antwort (Server am Stream-Limit)
+
+    def request(self, method, path, params=None, data=None, timeout=LONG_POLL_TIMEOUT + 5):
+        response = self.http.request(method, self.base_url + path, params=params, data=data,
+                                     timeout=timeout, allow_redirects=False)
+        self.retry_after = response.headers.get('Retry-After')
+        body = None
+        if response.headers.get('Content-Type', '').startswith('application/json') and response.content:
+            body = response.json()
+        return response.status_code, body
+
+
+class TestClient:
+    """Eine Browser-Session über den Flask-Test-Client (ohne Netzwerk)"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+        self.retry_after = None
+
+    def request(self, method, path, params=None, data=None, timeout=None):
+        response = self.client.open(path, method=method, query_string=params, data=data)
+        self.retry_after = response.headers.get('Retry-After')
+        return response.status_code, response.get_json(silent=True)
+
+
+class SimulatedPlayer:
+    """Spielt eine Session im Rhythmus von index.html"""
+
+    def __init__(self, index, client, stats, args, deadline):
+        self.index = index
+        self.name = f"Last{index:04d}"
+        self.client = client
+        self.stats = stats
+        self.args = args
+        self.deadline = deadline
+        self.host = index % args.room_size == 0 if args.room_size else index == 0
+        self.rng = random.Random(args.seed + index)
+        self.version = None
+        self.status = {}
+
+    def call(self, label, method, path, params=None, data=None):
+        started = time.perf_counter()
+        try:
+            status_code, body = self.client.request(method, path, params=params, data=data)
+            ok = status_code < 400
+        except requests.RequestException:
+            status_code, body, ok = 0, None, False
+        self.stats.record(label, (time.perf_counter() - started) * 1000, ok)
+        return status_code, body
+
+    def run(self, room_ready):
+        self.call('GET /', 'GET', '/')
+        if self.args.room_size and self.host:
+            status_code, body = self.call('POST /api/rooms', 'POST', '/api/rooms')
+            room_id = (body or {}).get('room_id', 'main')
+            room_ready[self.index] = room_id
+        if self.args.room_size:
+            host_index = self.index - self.index % self.args.room_size
+            while host_index not in room_ready and time.monotonic() < self.deadline:
+                time.sleep(0.05)
+            self.call('GET /room/<id>', 'GET', f"/room/{room_ready.get(host_index, 'main')}")
+        self.call('POST / (join)', 'POST', '/', data={'action': 'join', 'name': self.name})
+
+        # Status läuft wie im Browser parallel zu den Intervall-Abfragen
+        status_thread = threading.Thread(target=self.poll_status, daemon=True)
+        status_thread.start()
+        next_kick_check = next_leaderboard = next_action = time.monotonic()
+        while time.monotonic() < self.deadline:
+            now = time.monotonic()
+            if now >= next_kick_check:
+                self.call('/api/am_i_kicked', 'GET', '/api/am_i_kicked')
+                next_kick_check = now + KICK_CHECK_INTERVAL
+            if now >= next_leaderboard:
+                self.call('/api/leaderboard', 'GET', '/api/leaderboard')
+                next_leaderboard = now + LEADERBOARD_INTERVAL
+            if now >= next_action:
+                self.act()
+                next_action = now + self.rng.uniform(3, 8)
+            time.sleep(0.1)
+
+    def poll_status(self):
+        while time.monotonic() < self.deadline:
+            if self.args.long_poll and self.version is not None:
+                status_code, body = self.call('/api/status?since', 'GET', '/api/status', params={'since': self.version})
+                if self.client.retry_after:
+                    time.sleep(float(self.client.retry_after))  # wie index.js: Server hat keinen Platz frei
+            else:
+                status_code, body = self.call('/api/status', 'GET', '/api/status')
+                time.sleep(STATUS_INTERVAL)
+            if body:
+                self.status = body
+                self.version = body.get('version')
+            elif status_code == 0:
+                time.sleep(STATUS_INTERVAL)
+
+    def act(self):
+        """Zufällige Aktion passend zum aktuellen Spielzustand"""
+        status = self.status
+        if not status:
+            return
+        if self.rng.random() < 0.3:
+            self.call('/send_message', 'POST', '/send_message', data={'message': self.rng.choice(CHAT_MESSAGES)})
+        if not status.get('game_started'):
+            if self.name not in status.get('start_votes', []):
+                self.call('/start_vote', 'POST', '/start_vote')
+        elif status.get('game_ended') or status.get('vote_results'):
+            if self.host:
+                self.call('/return_to_lobby', 'GET', '/return_to_lobby')
+        elif status.get('voting_active'):
+            others = [p for p in status.get('players', []) if p != self.name]
+            if others and self.name not in status.get('votes', {}):
+                self.call('/vote', 'POST', '/vote', data={'voted_player': self.rng.choice(others)})
+        else:
+            word = status.get('player_word', '')
+            if 'IMPOSTOR' in word and not status.get('impostor_guess_used') and self.rng.random() < 0.1:
+                self.call('/guess_word', 'POST', '/guess_word', data={'guessed_word': 'Apfel'})
+            elif self.host:
+                self.call('/start_voting', 'GET', '/start_voting')
+
+
+def run_load_test(args):
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+    else:
+        import ImposterGame
+        make_client = lambda: TestClient(ImposterGame.app)
+    stats = Stats()
+    started = time.monotonic()
+    deadline = started + args.duration
+    room_ready = {}
+    threads = []
+    for index in range(args.sessions):
+        player = SimulatedPlayer(index, make_client(), stats, args, deadline)
+        thread = threading.Thread(target=player.run, args=(room_ready,), daemon=True)
+        threads.append(thread)
+        thread.start()
+        time.sleep(args.ramp_up / max(args.sessions, 1))
+    # noch offene Long-Polls nach Testende werden nicht abgewartet und nicht gezählt
+    for thread in threads:
+        thread.join(timeout=max(0, deadline - time.monotonic()) + 2)
+    result = stats.summary(args.duration)
+    result['config'] = {
+        'sessions': args.sessions,
+        'duration': args.duration,
+        'target': args.url or 'flask-test-client',
+        'long_poll': args.long_poll,
+        'room_size': args.room_size,
+        'seed': args.seed
+    }
+    return result
+
+
+def print_result(result, baseline=None):
+    print(f"\n{'Endpoint':<24}{'Anzahl':>8}{'Fehler':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for endpoint, e in result['endpoints'].items():
+        line = f"{endpoint:<24}{e['count']:>8}{e['errors']:>8}{e['rps']:>9}{e['p50_ms']:>9}{e['p95_ms']:>9}{e['p99_ms']:>9}"
+        old = (baseline or {}).get('endpoints', {}).get(endpoint)
+        if old and old['p95_ms']:
+            line += f"   p95 {100 * (e['p95_ms'] - old['p95_ms']) / old['p95_ms']:+.0f}%"
+        print(line)
+    print(f"\nGesamt: {result['total_requests']} Requests in {result['duration_s']} s = "
+          f"{result['throughput_rps']} req/s, {result['errors']} Fehler")
+    if baseline:
+        print(f"Vorher: {baseline['total_requests']} Requests = {baseline['throughput_rps']} req/s, "
+              f"{baseline['errors']} Fehler")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lasttest für das Impostor-Spiel")
+    parser.add_argument('--url', help="Basis-URL eines laufenden Servers (sonst Flask-Test-Client im Prozess)")
+    parser.add_argument('--sessions', type=int, default=20, help="Anzahl simulierter Sessions")
+    parser.add_argument('--duration', type=float, default=30, help="Dauer in Sekunden")
+    parser.add_argument('--ramp-up', type=float, default=2, help="Sekunden, über die die Sessions gestartet werden")
+    parser.add_argument('--room-size', type=int, default=0, help="Spieler pro Raum (0 = alle im Standardraum)")
+    parser.add_argument('--no-long-poll', dest='long_poll', action='store_false', help="/api/status alle 2 s statt Long-Polling")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Ergebnis als JSON speichern")
+    parser.add_argument('--compare', help="früheres JSON-Ergebnis zum Vergleich")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    result = run_load_test(args)
+    print_result(result, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=4)
+        print(f"Ergebnis gespeichert: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
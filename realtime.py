@@ -0,0 +1,695 @@
+"""WebSocket-Modus für das Impostor-Spiel (asyncio, ohne zusätzliche Abhängigkeiten).
+
+Ein Prozess hält damit tausende offene Verbindungen, ohne pro Browser einen
+Gunicorn-Thread zu belegen. Die Spiellogik bleibt in ImposterGame.py: jede Aktion
+läuft als normaler Flask-Request (mit Session-Cookie, Raum-Lock und Store-Transaktion)
+in einem kleinen Thread-Pool, Events kommen über publish_event() wie beim SSE-Stream.
+Nach einer Zustandsänderung wird der Raum einmal unter seinem Lock erfasst (StatusView)
+und der Status für alle Verbindungen danach ohne Lock gebaut, nicht pro Verbindung ein Request.
+
+Server neben der Flask-App starten (gleicher Prozess, gleicher Spielzustand):
+
+    REALTIME_PORT=8765 python ImposterGame.py
+    REALTIME_PORT=8765 gunicorn ImposterGame:app ...   (siehe gunicorn.conf.py)
+
+Nur den WebSocket-Server starten (mit STATE_BACKEND=sqlite neben Gunicorn-Workern):
+
+    STATE_BACKEND=sqlite python realtime.py serve --port 8765
+
+Testclient: meldet Spieler per HTTP an und hält N Verbindungen offen
+
+    python realtime.py client --url http://localhost:5000 --ws ws://localhost:8765/ws --connections 2000
+
+Protokoll (JSON-Textnachrichten):
+    Client -> Server  {"type": "status", "full": false} | {"type": "chat", "message": "..."}
+                      {"type": "vote", "voted_player": "..."} | {"type": "start_vote"}
+    Server -> Client  {"type": "status", "data": {...}}   Status bzw. Diff wie /api/status
+                      {"type": "result", "action": "...", "status": 200, "data": {...}}
+                      {"type": "kicked"} | {"type": "leaderboard"} | {"type": "room_closed"}
+                      {"type": "error", "error": "..."}
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+REALTIME_PATH = '/ws'
+REALTIME_WORKERS = 16  # Threads für Flask-Requests, unabhängig von der Zahl der Verbindungen
+REALTIME_PING_INTERVAL = 30
+MAX_MESSAGE_SIZE = 64 * 1024
+MAX_HANDSHAKE_SIZE = 8 * 1024
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+OPCODES = {OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG}
+
+CLOSE_PROTOCOL_ERROR = 1002
+CLOSE_UNSUPPORTED_DATA = 1003
+CLOSE_INVALID_DATA = 1007
+CLOSE_TOO_BIG = 1009
+
+# Aktionen, die ein Client schicken darf -> (Methode, Pfad, erlaubte Formularfelder)
+ACTIONS = {
+    'chat': ('POST', '/send_message', ('message',)),
+    'vote': ('POST', '/vote', ('voted_player',)),
+    'start_vote': ('POST', '/start_vote', ())
+}
+# Events aus publish_event(), die an Clients weitergereicht werden
+FORWARDED_EVENTS = {'kicked', 'leaderboard', 'room_closed'}
+
+
+class ConnectionClosed(Exception):
+    pass
+
+
+class ProtocolError(ConnectionClosed):
+    """Gegenstelle verletzt RFC 6455: Verbindung mit `code` schließen"""
+
+    def __init__(self, reason, code=CLOSE_PROTOCOL_ERROR):
+        super().__init__(reason)
+        self.code = code
+
+
+def accept_key(key):
+    """Sec-WebSocket-Accept zu einem Sec-WebSocket-Key (RFC 6455)"""
+    return base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+
+
+def valid_key(key):
+    """Sec-WebSocket-Key muss 16 Zufallsbytes in Base64 sein"""
+    try:
+        return len(base64.b64decode(key, validate=True)) == 16
+    except (ValueError, TypeError):
+        return False
+
+
+def apply_mask(mask, payload):
+    """XOR mit dem 4-Byte-Maskenschlüssel, als eine große Ganzzahl-Operation statt Byte für Byte"""
+    if not payload:
+        return payload
+    repeated = (mask * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(len(payload), 'big')
+
+
+def encode_frame(opcode, payload, mask=False):
+    """Ein einzelner (nicht fragmentierter) Frame; Clients müssen maskieren, Server dürfen nicht"""
+    header = bytes([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header += bytes([mask_bit | length])
+    elif length < 65536:
+        header += bytes([mask_bit | 126]) + struct.pack('!H', length)
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack('!Q', length)
+    if mask:
+        key = os.urandom(4)
+        return header + key + apply_mask(key, payload)
+    return header + payload
+
+
+class WebSocket:
+    """Minimale RFC-6455-Verbindung über asyncio-Streams (Text, Ping/Pong, Close, Fragmente).
+    Verstöße (fehlende bzw. falsche Maskierung, RSV-Bits, unbekannte Opcodes, zu lange oder
+    fragmentierte Kontroll-Frames, ungültiges UTF-8) beenden die Verbindung mit passendem Code."""
+
+    def __init__(self, reader, writer, client=False):
+        self.reader = reader
+        self.writer = writer
+        self.client = client
+        self.closed = False
+        self.last_seen = time.monotonic()
+
+    async def read_frame(self):
+        try:
+            first, second = await self.reader.readexactly(2)
+            fin, opcode = bool(first & 0x80), first & 0x0F
+            if first & 0x70:
+                raise ProtocolError('reserved bits set')  # es werden keine Erweiterungen ausgehandelt
+            if opcode not in OPCODES:
+                raise ProtocolError(f'unknown opcode {opcode:#x}')
+            # Clients müssen jeden Frame maskieren, Server dürfen es nicht
+            if bool(second & 0x80) == self.client:
+                raise ProtocolError('masked frame from server' if self.client else 'unmasked frame from client')
+            length = second & 0x7F
+            if opcode & 0x8 and (not fin or length > 125):
+                raise ProtocolError('fragmented or oversized control frame')
+            if length == 126:
+                length = struct.unpack('!H', await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', await self.reader.readexactly(8))[0]
+            if length > MAX_MESSAGE_SIZE:
+                raise ProtocolError('message too large', CLOSE_TOO_BIG)
+            mask = await self.reader.readexactly(4) if second & 0x80 else None
+            payload = await self.reader.readexactly(length)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            raise ConnectionClosed(str(e))
+        self.last_seen = time.monotonic()
+        if mask is not None:
+            payload = apply_mask(mask, payload)
+        return fin, opcode, payload
+
+    async def receive(self):
+        """Nächste Textnachricht; beantwortet Pings und setzt Fragmente zusammen"""
+        message = None
+        message_opcode = None
+        while True:
+            fin, opcode, payload = await self.read_frame()
+            if opcode == OP_PING:
+                await self.send_frame(OP_PONG, payload)
+            elif opcode == OP_PONG:
+                continue
+            elif opcode == OP_CLOSE:
+                if len(payload) == 1:
+                    raise ProtocolError('invalid close frame')
+                await self.close()
+                raise ConnectionClosed('closed by peer')
+            else:
+                if opcode != OP_CONTINUATION:
+                    if message is not None:
+                        raise ProtocolError('expected continuation frame')
+                    message = bytearray()
+                    message_opcode = opcode
+                elif message is None:
+                    raise ProtocolError('unexpected continuation frame')
+                message += payload
+                if len(message) > MAX_MESSAGE_SIZE:
+                    raise ProtocolError('message too large', CLOSE_TOO_BIG)
+                if fin:
+                    if message_opcode == OP_BINARY:
+                        raise ProtocolError('binary messages are not supported', CLOSE_UNSUPPORTED_DATA)
+                    try:
+                        return message.decode('utf-8')
+                    except UnicodeDecodeError:
+                        raise ProtocolError('invalid UTF-8 in text message', CLOSE_INVALID_DATA)
+
+    async def send_frame(self, opcode, payload):
+        if self.closed:
+            raise ConnectionClosed('already closed')
+        try:
+            self.writer.write(encode_frame(opcode, payload, mask=self.client))
+            await self.writer.drain()
+        except ConnectionError as e:
+            self.closed = True
+            raise ConnectionClosed(str(e))
+
+    async def send(self, message):
+        await self.send_text(json.dumps(message, ensure_ascii=False))
+
+    async def send_text(self, text):
+        await self.send_frame(OP_TEXT, text.encode())
+
+    async def close(self, code=1000):
+        if self.closed:
+            return
+        try:
+            await self.send_frame(OP_CLOSE, struct.pack('!H', code))
+        except ConnectionClosed:
+            pass
+        self.closed = True
+        self.writer.close()
+
+
+class EventSink:
+    """Steht in stream_subscribers wie eine queue.Queue, reicht Events aus beliebigen
+    Threads per call_soon_threadsafe an die Event-Loop weiter (wirft nie queue.Full)"""
+
+    def __init__(self, loop, handler):
+        self.loop = loop
+        self.handler = handler
+
+    def put_nowait(self, item):
+        try:
+            self.loop.call_soon_threadsafe(self.handler, item)
+        except RuntimeError:
+            pass  # Loop beendet
+
+
+class Connection:
+    """Ein verbundener Browser: Session-Cookie, Status-Cursor und Event-Abo"""
+
+    def __init__(self, server, websocket, cookie, session_data):
+        self.server = server
+        self.websocket = websocket
+        self.cookie = cookie
+        self.session_id = session_data.get('session_id')
+        self.player_name = session_data.get('player_name')
+        self.is_control = bool(server.game.is_control_session(session_data))
+        self.room_id = None
+        self.sink = None
+        # Status-Cursor: welche Version der Client hat, damit nur Diffs verschickt werden
+        self.version = None
+        self.epoch = None
+        self.chat_key = None
+        self.chat_last_id = None
+
+    def reset_cursor(self):
+        self.version = self.epoch = self.chat_key = self.chat_last_id = None
+
+    def status_query(self):
+        query = {}
+        if self.version is not None:
+            query.update({'base': self.version, 'epoch': self.epoch})
+        if self.chat_key is not None:
+            query.update({'chat_key': self.chat_key, 'after_id': self.chat_last_id})
+        return query
+
+    async def request_status(self):
+        """Erster Status als normaler /api/status-Request: setzt Raum, Spielername und Heartbeat"""
+        status_code, body = await self.server.call(self, 'GET', '/api/status', self.status_query())
+        if status_code != 200 or not body:
+            return
+        self.version = body['version']
+        self.epoch = body.get('epoch', self.epoch)
+        self.chat_key = body.get('chat_key')
+        self.chat_last_id = body.get('chat_last_id')
+        self.player_name = body.get('player_name')
+        self.is_control = bool(body.get('is_control'))
+        if self.room_id != body.get('room_id'):
+            self.subscribe(body.get('room_id'))
+        await self.websocket.send({'type': 'status', 'data': body})
+
+    def subscribe(self, room_id):
+        game = self.server.game
+        self.server.leave_room(self)
+        self.room_id = room_id
+        self.server.rooms.setdefault(room_id, set()).add(self)
+        if self.sink is None:
+            self.sink = EventSink(self.server.loop, self.on_event)
+        with game.stream_lock:
+            game.stream_subscribers[self.sink] = (room_id, self.session_id)
+
+    def unsubscribe(self):
+        self.server.leave_room(self)
+        if self.sink is not None:
+            with self.server.game.stream_lock:
+                self.server.game.stream_subscribers.pop(self.sink, None)
+
+    def on_event(self, item):
+        """Läuft in der Event-Loop: Zustandsänderung -> Status-Diff schicken, sonst weiterreichen"""
+        event_type, data = item
+        if self.websocket.closed:
+            return
+        if event_type == 'state':
+            if data.get('version') != self.version:
+                self.server.schedule_push(self.room_id)
+        elif event_type in FORWARDED_EVENTS:
+            self.server.spawn(self.websocket.send({'type': event_type}))
+
+    async def handle(self, text):
+        try:
+            message = json.loads(text)
+            message_type = message.get('type')
+        except (ValueError, AttributeError):
+            await self.websocket.send({'type': 'error', 'error': 'Invalid JSON'})
+            return
+        if message_type == 'status':
+            if message.get('full'):
+                self.reset_cursor()
+            if self.room_id is None:
+                await self.request_status()
+            else:
+                self.server.schedule_push(self.room_id)
+        elif message_type in ACTIONS:
+            method, path, fields = ACTIONS[message_type]
+            form = {field: str(message.get(field, '')) for field in fields}
+            status_code, body = await self.server.call(self, method, path, data=form)
+            await self.websocket.send({'type': 'result', 'action': message_type, 'status': status_code, 'data': body})
+        else:
+            await self.websocket.send({'type': 'error', 'error': f"Unknown message type '{message_type}'"})
+
+
+class RealtimeServer:
+    """asyncio-Server für WebSocket-Verbindungen zur Flask-App in `game` (das ImposterGame-Modul)"""
+
+    def __init__(self, game, host='0.0.0.0', port=8765, reuse_port=False):
+        self.game = game
+        self.host = host
+        self.port = port
+        self.reuse_port = reuse_port
+        self.loop = None
+        self.executor = ThreadPoolExecutor(max_workers=REALTIME_WORKERS, thread_name_prefix='realtime')
+        self.connections = set()
+        self.rooms = {}  # room_id -> Verbindungen, die Status-Diffs dieses Raums bekommen
+        self.pushing = {}  # room_id -> True, wenn während des Durchlaufs erneut angestoßen
+        self.tasks = set()
+
+    def spawn(self, coroutine):
+        """Startet eine Task und hält eine Referenz, bis sie fertig ist"""
+        task = self.loop.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.finish_task)
+        return task
+
+    def finish_task(self, task):
+        self.tasks.discard(task)
+        if not task.cancelled() and isinstance(task.exception(), Exception) \
+                and not isinstance(task.exception(), ConnectionClosed):
+            print(f"[realtime] Error: {task.exception()}")
+
+    def dispatch(self, cookie, method, path, query=None, data=None):
+        """Führt einen Flask-Request mit dem Session-Cookie der Verbindung aus (im Thread-Pool),
+        mit denselben before/after/teardown-Hooks wie über HTTP"""
+        app = self.game.app
+        headers = {'Cookie': cookie} if cookie else {}
+        with app.test_request_context(path, method=method, query_string=query, data=data, headers=headers):
+            response = app.full_dispatch_request()
+            return response.status_code, response.get_json(silent=True)
+
+    async def call(self, connection, method, path, query=None, data=None):
+        try:
+            return await self.loop.run_in_executor(self.executor, self.dispatch, connection.cookie,
+                                                   method, path, query, data)
+        except Exception as e:
+            print(f"[realtime] Error: {method} {path}: {e}")
+            return 500, None
+
+    def leave_room(self, connection):
+        members = self.rooms.get(connection.room_id)
+        if members is not None:
+            members.discard(connection)
+            if not members:
+                del self.rooms[connection.room_id]
+
+    def schedule_push(self, room_id):
+        """Status-Diffs an alle Verbindungen eines Raums; Anstöße während eines laufenden
+        Durchlaufs werden zu genau einem weiteren zusammengefasst"""
+        if room_id is None:
+            return
+        if room_id in self.pushing:
+            self.pushing[room_id] = True
+            return
+        self.pushing[room_id] = False
+        self.spawn(self.push_room(room_id))
+
+    async def push_room(self, room_id):
+        try:
+            while True:
+                self.pushing[room_id] = False
+                members = [c for c in self.rooms.get(room_id, ()) if not c.websocket.closed]
+                if not members:
+                    break
+                try:
+                    results = await self.loop.run_in_executor(self.executor, self.render_room, room_id, members)
+                except Exception as e:
+                    print(f"[push_room] Error: {e}")
+                    results = []
+                for connection, cursor, text in results:
+                    if connection.websocket.closed or connection.room_id != room_id:
+                        continue
+                    connection.version, connection.epoch, connection.chat_key, connection.chat_last_id = cursor
+                    self.spawn(connection.websocket.send_text(text))
+                if not self.pushing.get(room_id):
+                    break
+        finally:
+            self.pushing.pop(room_id, None)
+
+    def render_room(self, room_id, members):
+        """Läuft im Thread-Pool: ein Schnappschuss des Raums unter dem Raum-Lock (mit den Diffs
+        zu allen Versionen, die die Verbindungen haben), die Status pro Verbindung danach ohne Lock"""
+        game = self.game
+        room = game.get_room(room_id)
+        if room is None:
+            return []
+        with room.lock:
+            epoch = game.state_store.epoch
+            view = game.StatusView(room, {c.version for c in members if c.epoch == epoch})
+        cursor = view.cursor()
+        results = []
+        for connection in members:
+            if (connection.version, connection.epoch, connection.chat_key, connection.chat_last_id) == cursor:
+                continue  # schon aktuell
+            body = view.render(connection.player_name, connection.is_control,
+                               connection.version, connection.epoch,
+                               connection.chat_key, connection.chat_last_id)
+            results.append((connection, cursor, '{"type": "status", "data": ' + body + '}'))
+        for _ in results:
+            game.status_polls_total.inc('websocket', 'full')
+        return results
+
+    def read_session(self, cookie_header):
+        """Daten aus dem signierten Flask-Session-Cookie (leer für neue Besucher)"""
+        from werkzeug.http import parse_cookie
+        app = self.game.app
+        value = parse_cookie(cookie_header).get(app.config['SESSION_COOKIE_NAME'])
+        serializer = app.session_interface.get_signing_serializer(app)
+        if not value or serializer is None:
+            return {}
+        try:
+            return serializer.loads(value)
+        except Exception:
+            return {}
+
+    async def handshake(self, reader, writer):
+        """HTTP-Upgrade auf WebSocket; gibt den Cookie-Header zurück oder None"""
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            return None
+        lines = request.decode('latin-1').split('\r\n')
+        parts = lines[0].split(' ')
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        key = headers.get('sec-websocket-key')
+        # Browser schicken immer Origin: fremde Seiten dürfen nicht mit dem Session-Cookie verbinden
+        origin = headers.get('origin')
+        if origin and urlsplit(origin).hostname != urlsplit('//' + headers.get('host', '')).hostname:
+            writer.write(b'HTTP/1.1 403 Forbidden\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            await writer.drain()
+            return None
+        connection_tokens = {token.strip().lower() for token in headers.get('connection', '').split(',')}
+        if (len(parts) < 2 or parts[0] != 'GET' or urlsplit(parts[1]).path != REALTIME_PATH or not valid_key(key)
+                or headers.get('upgrade', '').lower() != 'websocket' or 'upgrade' not in connection_tokens):
+            writer.write(b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+            await writer.drain()
+            return None
+        if headers.get('sec-websocket-version') != '13':
+            writer.write(b'HTTP/1.1 426 Upgrade Required\r\nSec-WebSocket-Version: 13\r\n'
+                         b'Content-Length: 0\r\nConnection: close\r\n\r\n')
+            await writer.drain()
+            return None
+        writer.write(('HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                      f'Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n').encode())
+        await writer.drain()
+        return headers.get('cookie', '')
+
+    async def handle_client(self, reader, writer):
+        connection = None
+        try:
+            cookie = await self.handshake(reader, writer)
+            if cookie is None:
+                writer.close()
+                return
+            websocket = WebSocket(reader, writer)
+            connection = Connection(self, websocket, cookie, self.read_session(cookie))
+            self.connections.add(connection)
+            await connection.request_status()
+            while True:
+                await connection.handle(await websocket.receive())
+        except ProtocolError as e:
+            if connection is not None:
+                await connection.websocket.close(e.code)
+        except ConnectionClosed:
+            pass
+        except Exception as e:
+            print(f"[handle_client] Error: {e}")
+        finally:
+            if connection is not None:
+                self.connections.discard(connection)
+                connection.unsubscribe()
+                await connection.websocket.close()
+            elif not writer.is_closing():
+                writer.close()
+
+    def touch_sessions(self, sessions):
+        """Hält die Heartbeats aller verbundenen Sessions aktuell (ein Durchlauf für alle)"""
+        for room_id, session_id in sessions:
+            room = self.game.get_room(room_id)
+            if room is not None:
+                room.update_heartbeat(session_id)
+
+    async def keepalive(self):
+        """Heartbeats gesammelt im Thread-Pool, Pings an ruhige Verbindungen, tote Verbindungen schließen"""
+        interval = self.game.HEARTBEAT_TIMEOUT / 3
+        last_ping = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            sessions = [(c.room_id, c.session_id) for c in self.connections if c.room_id and c.session_id]
+            if sessions:
+                await self.loop.run_in_executor(self.executor, self.touch_sessions, sessions)
+            now = time.monotonic()
+            if now - last_ping < REALTIME_PING_INTERVAL:
+                continue
+            last_ping = now
+            for connection in list(self.connections):
+                websocket = connection.websocket
+                if now - websocket.last_seen > 3 * REALTIME_PING_INTERVAL:
+                    self.spawn(websocket.close(1001))
+                else:
+                    self.spawn(websocket.send_frame(OP_PING, b''))
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self.handle_client, self.host, self.port, backlog=1024,
+                                            limit=MAX_HANDSHAKE_SIZE, reuse_port=self.reuse_port or None)
+        print(f"🔌 WebSocket-Server auf ws://{self.host}:{self.port}{REALTIME_PATH}")
+        self.spawn(self.keepalive())
+        async with server:
+            await server.serve_forever()
+
+
+def raise_open_file_limit():
+    """Jede Verbindung braucht einen Dateideskriptor: Soft-Limit auf das Hard-Limit anheben"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY or soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard if hard != resource.RLIM_INFINITY else 65536, hard))
+    except (ImportError, ValueError, OSError) as e:
+        print(f"[raise_open_file_limit] Error: {e}")
+
+
+def start_in_thread(game, port, host='0.0.0.0', reuse_port=False):
+    """Startet den WebSocket-Server in einem eigenen Thread neben der Flask-App"""
+    raise_open_file_limit()
+    server = RealtimeServer(game, host, port, reuse_port)
+    thread = threading.Thread(target=lambda: asyncio.run(server.serve()), name='realtime', daemon=True)
+    thread.start()
+    return server
+
+
+class RealtimeClient:
+    """Testclient: eine WebSocket-Verbindung mit dem Session-Cookie eines HTTP-Spielers"""
+
+    def __init__(self, ws_url, cookie=''):
+        self.ws_url = ws_url
+        self.cookie = cookie
+        self.websocket = None
+        self.status = None
+        self.messages = 0
+
+    async def connect(self):
+        url = urlsplit(self.ws_url)
+        reader, writer = await asyncio.open_connection(url.hostname, url.port or 80, limit=MAX_MESSAGE_SIZE * 2)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f"GET {url.path or '/'} HTTP/1.1\r\nHost: {url.netloc}\r\nUpgrade: websocket\r\n"
+                      f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n"
+                      f"Cookie: {self.cookie}\r\n\r\n").encode())
+        await writer.drain()
+        response = await reader.readuntil(b'\r\n\r\n')
+        status_line = response.split(b'\r\n', 1)[0].decode('latin-1')
+        if ' 101 ' not in status_line or accept_key(key).encode() not in response:
+            writer.close()
+            raise ConnectionClosed(f"handshake failed: {status_line}")
+        self.websocket = WebSocket(reader, writer, client=True)
+
+    async def send(self, message):
+        await self.websocket.send(message)
+
+    async def receive(self):
+        message = json.loads(await self.websocket.receive())
+        self.messages += 1
+        if message.get('type') == 'status':
+            self.status = message['data']
+        return message
+
+
+def http_join(base_url, name):
+    """Tritt per HTTP bei und gibt den Session-Cookie zurück"""
+    import requests
+    http = requests.Session()
+    http.post(base_url.rstrip('/') + '/', data={'action': 'join', 'name': name}, allow_redirects=False, timeout=10)
+    return '; '.join(f"{k}={v}" for k, v in http.cookies.items())
+
+
+async def run_client(args):
+    """Öffnet --connections Verbindungen (die ersten --players als angemeldete Spieler),
+    lässt sie --duration Sekunden offen und zählt empfangene Nachrichten"""
+    players = min(args.players, args.connections)
+    cookies = [http_join(args.url, f"Ws{index:04d}") for index in range(players)] if args.url else []
+    clients = [RealtimeClient(args.ws, cookies[i] if i < len(cookies) else '') for i in range(args.connections)]
+    started = time.monotonic()
+    results = await asyncio.gather(*(client.connect() for client in clients), return_exceptions=True)
+    connected = [client for client, result in zip(clients, results) if result is None]
+    print(f"{len(connected)}/{len(clients)} verbunden in {time.monotonic() - started:.2f} s")
+    if len(connected) < len(clients):
+        print(f"Erster Fehler: {next(r for r in results if r is not None)}")
+
+    async def listen(client):
+        try:
+            while True:
+                await client.receive()
+        except ConnectionClosed:
+            pass
+
+    listeners = [asyncio.ensure_future(listen(client)) for client in connected]
+    rng = random.Random(args.seed)
+    deadline = time.monotonic() + args.duration
+    latencies = []
+    while time.monotonic() < deadline and connected:
+        await asyncio.sleep(1)
+        # ein Spieler schreibt, alle anderen bekommen einen Status-Diff
+        active = connected[:players]
+        if active:
+            client = rng.choice(active)
+            before = client.messages
+            sent = time.perf_counter()
+            await client.send({'type': 'chat', 'message': f"Hallo {rng.randint(1, 999)}"})
+            while client.messages == before and time.perf_counter() - sent < 5:
+                await asyncio.sleep(0.005)
+            latencies.append((time.perf_counter() - sent) * 1000)
+    received = sum(client.messages for client in connected)
+    print(f"{received} Nachrichten empfangen, offen: {sum(not c.websocket.closed for c in connected)}")
+    if latencies:
+        latencies.sort()
+        print(f"Chat-Antwort: p50 {latencies[len(latencies) // 2]:.1f} ms, max {latencies[-1]:.1f} ms")
+    for listener in listeners:
+        listener.cancel()
+    for client in connected:
+        await client.websocket.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket-Modus für das Impostor-Spiel")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help="nur den WebSocket-Server starten")
+    serve.add_argument('--host', default='0.0.0.0')
+    serve.add_argument('--port', type=int, default=int(os.environ.get('REALTIME_PORT', 8765)))
+    client = commands.add_parser('client', help="Testclient mit vielen Verbindungen")
+    client.add_argument('--ws', default='ws://localhost:8765' + REALTIME_PATH, help="WebSocket-URL")
+    client.add_argument('--url', help="HTTP-URL des Spiels, um Spieler anzumelden (sonst nur Zuschauer)")
+    client.add_argument('--connections', type=int, default=100)
+    client.add_argument('--players', type=int, default=4, help="davon als Spieler angemeldet")
+    client.add_argument('--duration', type=float, default=10)
+    client.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+        import ImposterGame
+        raise_open_file_limit()
+        asyncio.run(RealtimeServer(ImposterGame, args.host, args.port).serve())
+    else:
+        raise_open_file_limit()
+        asyncio.run(run_client(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,512 @@
+// --- Console Output ---
+// Der Server liefert ab dem Cursor nur neue Zeilen; bei reset (erster Abruf, Log rotiert) komplett ersetzen
+const CONSOLE_MAX_LINES = 500;
+let consoleCursor = null;
+let consoleLines = [];
+function updateConsole() {
+    const url = '/api/console_output' + (consoleCursor ? '?cursor=' + encodeURIComponent(consoleCursor) : '');
+    fetch(url).then(r => r.json()).then(data => {
+        consoleCursor = data.cursor;
+        if (!data.reset && !data.output) return;
+        const el = document.getElementById('console-output');
+        const atBottom = el.scrollTop + el.clientHeight >= el.scrollHeight - 10;
+        const lines = data.output ? data.output.replace(/\n$/, '').split('\n') : [];
+        consoleLines = data.reset ? lines : consoleLines.concat(lines);
+        if (consoleLines.length > CONSOLE_MAX_LINES) consoleLines = consoleLines.slice(-CONSOLE_MAX_LINES);
+        el.textContent = consoleLines.length ? consoleLines.join('\n') : 'No output.';
+        if (atBottom) el.scrollTop = el.scrollHeight;
+    });
+}
+setInterval(updateConsole, 4000);
+updateConsole();
+
+// --- Live Stats ---
+let gameLink = window.location.origin + '/';
+let liveStatsRevealed = false;
+// Zuletzt vollständig bekannte Stats: der Server schickt dann nur noch Diffs seit statsState.token
+let statsState = null;
+function mergeStatsDelta(state, delta, listFields) {
+    const merged = Object.assign({}, state, delta.changed);
+    listFields.forEach(field => {
+        const removed = delta[field + '_removed'] || [];
+        merged[field] = merged[field].filter(item => !removed.includes(item)).concat(delta[field + '_added'] || []);
+    });
+    merged.token = delta.token;
+    return merged;
+}
+function updateStats() {
+    const url = '/api/control_stats' + (statsState ? '?base=' + encodeURIComponent(statsState.token) : '');
+    fetch(url).then(r => r.json()).then(response => {
+        if (response.delta && (!statsState || response.base !== statsState.token)) {
+            // Diff zu einem anderen Stand (parallele Abfrage): komplett neu laden
+            statsState = null;
+            updateStats();
+            return;
+        }
+        const data = response.delta ? mergeStatsDelta(statsState, response, ['players']) : response;
+        statsState = data;
+        let stats = [
+            `<b>Status:</b> ${data.game_state}`,
+            `<b>Spieler:</b> ${data.player_count}`,
+            `<b>Impostor:</b> ${data.impostor || '-'}`,
+            `<b>Aktuelle Runde:</b> ${data.round}`,
+            `<b>Game gestartet:</b> ${data.game_started ? 'Ja' : 'Nein'}`,
+            `<b>Voting aktiv:</b> ${data.voting_active ? 'Ja' : 'Nein'}`,
+            `<b>Gewinnerwort:</b> ${data.winning_word || '-'}`,
+            `<b>Wörter:</b> ${data.words.normal} normal / ${data.words.spicy} spicy (${data.words.duplicates_removed} Duplikate entfernt)`,
+            `<b>Wortlisten geladen:</b> ${data.words.reloads}x, zuletzt ${data.words.last_reload || '-'}`
+        ];
+        document.getElementById('stats-list').innerHTML = stats.map(s => `<li>${s}</li>`).join('');
+        updateMetrics(data.metrics);
+        // Update player list
+        updatePlayerList(data.players);
+        updateRoomList(data.rooms, data.room_id);
+        // Update spicy mode
+        updateSpicyMode(data.spicy_mode, data.announce_spicy_mode);
+        // Update settings
+        document.getElementById('heartbeat-timeout').value = data.settings.heartbeat_timeout;
+        document.getElementById('cleanup-interval').value = data.settings.cleanup_interval;
+
+        // --- Blur logic for live stats ---
+        const liveStatsCard = document.getElementById('live-stats-card');
+        const overlay = document.getElementById('live-stats-overlay');
+        // Blur if game is running (not lobby or ended)
+        if (data.game_state === 'running' && !liveStatsRevealed) {
+            liveStatsCard.classList.add('blurred');
+            overlay.style.display = 'flex';
+        } else {
+            liveStatsCard.classList.remove('blurred');
+            overlay.style.display = 'none';
+        }
+    });
+}
+setInterval(updateStats, 2000);
+updateStats();
+
+// --- Server-Metriken (Zusammenfassung von /metrics, Raten aus der Differenz zweier Abfragen) ---
+let lastMetrics = null;
+function updateMetrics(metrics) {
+    const now = Date.now();
+    let requestRate = '-', pollRate = '-';
+    if (lastMetrics) {
+        const minutes = (now - lastMetrics.time) / 60000;
+        requestRate = Math.round((metrics.requests_total - lastMetrics.requests_total) / minutes);
+        pollRate = Math.round((metrics.status_polls_total - lastMetrics.status_polls_total) / minutes);
+    }
+    lastMetrics = {time: now, requests_total: metrics.requests_total, status_polls_total: metrics.status_polls_total};
+    const items = [
+        `<b>Requests:</b> ${requestRate}/min (Ø ${metrics.request_latency.mean_ms} ms)`,
+        `<b>/api/status:</b> ${pollRate}/min`,
+        `<b>Räume / Sessions / Spieler:</b> ${metrics.rooms} / ${metrics.active_sessions} / ${metrics.active_players}`,
+        `<b>Chat-Puffer:</b> ${metrics.chat_buffer_messages} Nachrichten`,
+        `<b>Live-Verbindungen:</b> ${metrics.stream_connections}`,
+        `<b>Cleanup:</b> ${metrics.cleanup.last_ms} ms (Ø ${metrics.cleanup.mean_ms} ms)`,
+        `<b>Leaderboard speichern:</b> ${metrics.leaderboard_save.last_ms} ms (${metrics.leaderboard_save.count}x)`,
+        `<b>Öffentliche IP:</b> ${metrics.public_ip_lookup.count ? metrics.public_ip_lookup.last_ms + ' ms' : '-'}`
+    ];
+    document.getElementById('metrics-list').innerHTML = items.map(s => `<li>${s}</li>`).join('');
+}
+
+// --- Player List ---
+function updatePlayerList(players) {
+    let html = '';
+    players.forEach(player => {
+        html += `<div class="player-card" data-player="${player}">
+                    <span>${player}</span>
+                    <span class="kick-cross" title="Kicken" onclick="kickPlayer('${player}')">×</span>
+                </div>`;
+    });
+    document.getElementById('player-list').innerHTML = html;
+}
+function updateRoomList(rooms, currentRoomId) {
+    let html = '';
+    rooms.forEach(room => {
+        let label = room.room_id === currentRoomId ? `<b>${room.room_id}</b>` : `<a href="/room/${room.room_id}">${room.room_id}</a>`;
+        html += `<div class="player-card">
+                    <span>${label} · ${room.state} · ${room.players} Spieler</span>
+                    ${room.room_id !== 'main' ? `<span class="kick-cross" title="Raum schließen" onclick="closeRoom('${room.room_id}')">×</span>` : ''}
+                </div>`;
+    });
+    document.getElementById('room-list').innerHTML = html;
+}
+function closeRoom(roomId) {
+    if(confirm(`Raum "${roomId}" wirklich schließen?`)) {
+        fetch('/api/rooms/' + encodeURIComponent(roomId) + '/close', {method: 'POST'}).then(() => updateStats());
+    }
+}
+function kickPlayer(player) {
+    if(confirm(`Spieler "${player}" wirklich kicken?`)) {
+        fetch('/api/kick_player', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({player_name: player})
+        }).then(() => updateStats());
+    }
+}
+
+// --- Reset Game ---
+document.getElementById('reset-game-btn').onclick = function() {
+    if(confirm('Spiel und alle Spieler zurücksetzen?')) {
+        window.location.href = '/control/reset_game';
+    }
+};
+
+// --- Reset Leaderboard ---
+function resetLeaderboard(which) {
+    if(confirm('Leaderboard wirklich zurücksetzen?')) {
+        fetch('/api/reset_leaderboard', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({which: which})
+        }).then(() => alert('Leaderboard zurückgesetzt!'));
+    }
+}
+
+// --- Start Game ---
+document.getElementById('start-game-btn').onclick = function() {
+    window.location.href = '/control/start_game';
+};
+
+// --- Spicy Mode Toggle ---
+function updateSpicyMode(mode, announce) {
+    let status = '';
+    let statusField = document.getElementById('spicy-mode-status');
+    statusField.innerHTML = '';
+    document.getElementById('spicy-disabled').classList.remove('active');
+    document.getElementById('spicy-possible').classList.remove('active');
+    document.getElementById('spicy-forced').classList.remove('active');
+    if(mode === 'disabled') {
+        document.getElementById('spicy-disabled').classList.add('active');
+        status = 'Nur normale Wörter.';
+    } else if(mode === 'possible') {
+        document.getElementById('spicy-possible').classList.add('active');
+        status = 'Normale + Spicy Wörter.';
+        statusField.innerHTML = '<span class="spicy-announcement possible">Normal + Spicy Wörter!</span>';
+    } else if(mode === 'forced') {
+        document.getElementById('spicy-forced').classList.add('active');
+        status = 'Nur Spicy Wörter!';
+        statusField.innerHTML = '<span class="spicy-announcement forced">Nur Spicy Wörter!</span>';
+    }
+    if(mode === 'disabled') statusField.textContent = status;
+    // Set the checkbox for announce spicy mode
+    fetch('/api/settings').then(r => r.json()).then(settings => {
+        document.getElementById('announce-spicy-toggle').checked = !!settings.announce_spicy_mode;
+    });
+}
+document.getElementById('spicy-disabled').onclick = function() {
+    fetch('/api/spicy_mode', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({mode: 'disabled'})
+    }).then(() => updateStats());
+};
+document.getElementById('spicy-possible').onclick = function() {
+    fetch('/api/spicy_mode', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({mode: 'possible'})
+    }).then(() => updateStats());
+};
+document.getElementById('spicy-forced').onclick = function() {
+    fetch('/api/spicy_mode', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({mode: 'forced'})
+    }).then(() => updateStats());
+};
+
+// --- Settings ---
+document.getElementById('settings-form').onsubmit = function(e) {
+    e.preventDefault();
+    let heartbeat = document.getElementById('heartbeat-timeout').value;
+    let cleanup = document.getElementById('cleanup-interval').value;
+    fetch('/api/settings', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({heartbeat_timeout: heartbeat, cleanup_interval: cleanup})
+    }).then(() => {
+        document.getElementById('settings-status').textContent = 'Gespeichert!';
+        setTimeout(() => document.getElementById('settings-status').textContent = '', 2000);
+    });
+};
+
+// --- Copy Game Link ---
+document.getElementById('copy-link-btn').onclick = function() {
+    navigator.clipboard.writeText('https://impostergame.xyz');
+    this.textContent = '✅ Link kopiert!';
+    setTimeout(() => {
+        this.textContent = '🔗 Game-Link kopieren';
+    }, 1500);
+};
+
+document.getElementById('announce-spicy-toggle').onchange = function() {
+    fetch('/api/settings', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({announce_spicy_mode: this.checked})
+    });
+};
+
+document.getElementById('change-password-form').onsubmit = function(e) {
+    e.preventDefault();
+    const pw = document.getElementById('new-password').value.trim();
+    const status = document.getElementById('password-status');
+    if (pw.length < 4) {
+        status.textContent = '❌ Passwort zu kurz (min. 4 Zeichen)';
+        status.style.color = '#e74c3c';
+        return;
+    }
+    fetch('/api/change_password', {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({new_password: pw})
+    }).then(r => r.json()).then(data => {
+        if (data.success) {
+            status.textContent = '✅ Passwort erfolgreich geändert!';
+            status.style.color = '#27ae60';
+            document.getElementById('new-password').value = '';
+        } else {
+            status.textContent = '❌ ' + (data.error || 'Fehler beim Ändern');
+            status.style.color = '#e74c3c';
+        }
+    });
+};
+
+// Overlay click handler
+document.addEventListener('DOMContentLoaded', function() {
+    liveStatsRevealed = false;
+    const overlay = document.getElementById('live-stats-overlay');
+    if (overlay) {
+        overlay.addEventListener('click', function() {
+            liveStatsRevealed = true;
+            document.getElementById('live-stats-card').classList.remove('blurred');
+            overlay.style.display = 'none';
+        });
+    }
+    // Collapsible backup list logic
+    const toggleBackupListBtn = document.getElementById('toggle-backup-list-btn');
+    const collapsibleBackupList = document.getElementById('collapsible-backup-list');
+    if (toggleBackupListBtn && collapsibleBackupList) {
+        toggleBackupListBtn.onclick = function() {
+            collapsibleBackupList.classList.toggle('open');
+            toggleBackupListBtn.textContent = collapsibleBackupList.classList.contains('open') ? 'Backups & Downloads ausblenden' : 'Backups & Downloads anzeigen';
+        };
+    }
+    // Backup Leaderboard button
+    const backupLeaderboardBtn = document.getElementById('backup-leaderboard-btn');
+    if (backupLeaderboardBtn) {
+        backupLeaderboardBtn.onclick = function() {
+            const status = document.getElementById('leaderboard-backup-status');
+            fetch('/api/create_leaderboard_backup', { method: 'POST' })
+                .then(r => r.json())
+                .then(data => {
+                    if (data.success) {
+                        status.textContent = '✅ Backup erfolgreich erstellt: ' + data.backup;
+                        status.style.color = '#27ae60';
+                        updateLeaderboardFileStatus();
+                    } else {
+                        status.textContent = '❌ ' + (data.error || 'Fehler beim Backup');
+                        status.style.color = '#e74c3c';
+                    }
+                })
+                .catch(() => {
+                    status.textContent = '❌ Fehler beim Backup.';
+                    status.style.color = '#e74c3c';
+                });
+        };
+    }
+
+    // Dark mode toggle logic
+    function setDarkMode(enabled) {
+        if (enabled) {
+            document.body.classList.add('dark-mode');
+            document.getElementById('dark-mode-toggle').textContent = '☀️';
+        } else {
+            document.body.classList.remove('dark-mode');
+            document.getElementById('dark-mode-toggle').textContent = '🌙';
+        }
+        localStorage.setItem('darkMode', enabled ? '1' : '0');
+    }
+    var darkToggle = document.getElementById('dark-mode-toggle');
+    if (darkToggle) {
+        darkToggle.onclick = function() {
+            setDarkMode(!document.body.classList.contains('dark-mode'));
+        };
+        // On page load, apply saved preference
+        const saved = localStorage.getItem('darkMode');
+        if (saved === '1') setDarkMode(true);
+        else setDarkMode(false);
+    }
+});
+
+// --- Leaderboard file status ---
+let leaderboardExists = false;
+let backupExists = false;
+let latestBackupFile = null;
+function updateLeaderboardFileStatus() {
+    fetch('/api/backup_leaderboard').then(r => {
+        leaderboardExists = (r.status === 200);
+        document.getElementById('status-leaderboard-json').innerHTML = `<span class='status-icon'>${leaderboardExists ? '✅' : '❌'}</span> Leaderboard: ${leaderboardExists ? 'Vorhanden' : 'Fehlt'}<span class='filename'>leaderboard.json</span>`;
+        document.getElementById('status-leaderboard-json').className = 'file-status ' + (leaderboardExists ? 'present' : 'missing');
+        document.getElementById('download-leaderboard-btn').disabled = !leaderboardExists;
+    });
+    fetch('/api/list_leaderboard_backups').then(r => r.json()).then(data => {
+        const backupList = document.getElementById('backup-list');
+        backupList.innerHTML = '';
+        if (data.success && data.backups.length > 0) {
+            backupExists = true;
+            latestBackupFile = data.backups[0];
+            document.getElementById('status-leaderboard-bckp').innerHTML = `<span class='status-icon'>✅</span> Backup: Vorhanden<span class='filename'>${latestBackupFile}</span>`;
+            // List all backups (Zeitpunkt und Größe aus dem Manifest)
+            data.entries.forEach(function(entry) {
+                const filename = entry.name;
+                const created = new Date(entry.created).toLocaleString('de-DE');
+                const size = (entry.size / 1024).toFixed(1) + ' KB';
+                const li = document.createElement('li');
+                li.className = 'backup-list-item';
+                li.innerHTML = `<span class='backup-filename' title='SHA-256: ${entry.sha256}'>${created} · ${size}${entry.reason === 'auto' ? ' · automatisch' : ''}</span>` +
+                    `<button class='backup-action-btn' onclick="window.open('/api/download_leaderboard_backup_file?name=${encodeURIComponent(filename)}','_blank')">Download</button>` +
+                    `<button class='backup-action-btn restore' onclick="restoreBackup('${filename}')">Als Leaderboard laden</button>`;
+                backupList.appendChild(li);
+            });
+        } else {
+            backupExists = false;
+            latestBackupFile = null;
+            document.getElementById('status-leaderboard-bckp').innerHTML = `<span class='status-icon'>❌</span> Backup: Kein Backup vorhanden`;
+        }
+    });
+}
+updateLeaderboardFileStatus();
+setInterval(updateLeaderboardFileStatus, 10000);
+
+// Custom file input logic
+const fileInput = document.getElementById('upload-leaderboard-file');
+const fileLabel = document.querySelector('.custom-file-label');
+const fileNameSpan = document.getElementById('selected-leaderboard-filename');
+const uploadActions = document.getElementById('leaderboard-upload-actions');
+fileLabel.onclick = function() { fileInput.click(); };
+fileInput.onchange = function() {
+    if (fileInput.files.length) {
+        fileNameSpan.textContent = fileInput.files[0].name;
+        document.getElementById('upload-leaderboard-btn').disabled = false;
+    } else {
+        fileNameSpan.textContent = 'Keine Datei gewählt';
+        document.getElementById('upload-leaderboard-btn').disabled = true;
+    }
+};
+document.getElementById('upload-leaderboard-btn').disabled = true;
+document.getElementById('download-leaderboard-btn').onclick = function() {
+    if (leaderboardExists) window.open('/api/backup_leaderboard', '_blank');
+};
+document.getElementById('upload-leaderboard-btn').onclick = function() {
+    uploadLeaderboardFile('/api/upload_leaderboard');
+};
+document.getElementById('load-backup-btn').onclick = function() {
+    if (!backupExists || !latestBackupFile) return;
+    const status = document.getElementById('leaderboard-backup-status');
+    fetch('/api/upload_leaderboard', {
+        method: 'POST',
+        body: (() => {
+            const formData = new FormData();
+            return fetch('/api/download_leaderboard_backup_file?name=' + encodeURIComponent(latestBackupFile))
+                .then(r => r.blob())
+                .then(blob => { formData.append('file', blob, latestBackupFile); return formData; });
+        })()
+    }).then(async r => r.json()).then(data => {
+        if (data.success) {
+            status.textContent = '✅ Backup erfolgreich als Leaderboard geladen!';
+            status.style.color = '#27ae60';
+            updateLeaderboardFileStatus();
+        } else {
+            status.textContent = '❌ ' + (data.error || 'Fehler beim Laden des Backups');
+            status.style.color = '#e74c3c';
+        }
+    }).catch(() => {
+        status.textContent = '❌ Fehler beim Laden des Backups.';
+        status.style.color = '#e74c3c';
+    });
+};
+function uploadLeaderboardFile(endpoint) {
+    const status = document.getElementById('leaderboard-backup-status');
+    if (!fileInput.files.length) {
+        status.textContent = '❌ Bitte wähle eine Datei aus.';
+        status.style.color = '#e74c3c';
+        return;
+    }
+    const formData = new FormData();
+    formData.append('file', fileInput.files[0]);
+    fetch(endpoint, {
+        method: 'POST',
+        body: formData
+    }).then(r => r.json()).then(data => {
+        if (data.success) {
+            status.textContent = '✅ Datei erfolgreich hochgeladen!';
+            status.style.color = '#27ae60';
+            fileInput.value = '';
+            fileNameSpan.textContent = 'Keine Datei gewählt';
+            document.getElementById('upload-leaderboard-btn').disabled = true;
+            updateLeaderboardFileStatus();
+        } else {
+            status.textContent = '❌ ' + (data.error || 'Fehler beim Hochladen');
+            status.style.color = '#e74c3c';
+        }
+    }).catch(() => {
+        status.textContent = '❌ Fehler beim Hochladen.';
+        status.style.color = '#e74c3c';
+    });
+}
+function restoreBackup(filename) {
+    const status = document.getElementById('leaderboard-backup-status');
+    fetch('/api/download_leaderboard_backup_file?name=' + encodeURIComponent(filename))
+        .then(r => r.blob())
+        .then(blob => {
+            const formData = new FormData();
+            formData.append('file', blob, filename);
+            return fetch('/api/upload_leaderboard', {
+                method: 'POST',
+                body: formData
+            });
+        })
+        .then(r => r.json())
+        .then(data => {
+            if (data.success) {
+                status.textContent = '✅ Backup erfolgreich als Leaderboard geladen!';
+                status.style.color = '#27ae60';
+                updateLeaderboardFileStatus();
+            } else {
+                status.textContent = '❌ ' + (data.error || 'Fehler beim Laden des Backups');
+                status.style.color = '#e74c3c';
+            }
+        })
+        .catch(() => {
+            status.textContent = '❌ Fehler beim Laden des Backups.';
+            status.style.color = '#e74c3c';
+        });
+}
+document.getElementById('backup-leaderboard-btn').onclick = function() {
+    const status = document.getElementById('leaderboard-backup-status');
+    fetch('/api/create_leaderboard_backup', { method: 'POST' })
+        .then(r => r.json())
+        .then(data => {
+            if (data.success) {
+                status.textContent = '✅ Backup erfolgreich erstellt: ' + data.backup;
+                status.style.color = '#27ae60';
+                updateLeaderboardFileStatus();
+            } else {
+                status.textContent = '❌ ' + (data.error || 'Fehler beim Backup');
+                status.style.color = '#e74c3c';
+            }
+        })
+        .catch(() => {
+            status.textContent = '❌ Fehler beim Backup.';
+            status.style.color = '#e74c3c';
+        });
+};
+
+// Collapsible backup list logic
+const toggleBackupListBtn = document.getElementById('toggle-backup-list-btn');
+const collapsibleBackupList = document.getElementById('collapsible-backup-list');
+toggleBackupListBtn.onclick = function() {
+    collapsibleBackupList.classList.toggle('open');
+    toggleBackupListBtn.textContent = collapsibleBackupList.classList.contains('open') ? 'Backups & Downloads ausblenden' : 'Backups & Downloads anzeigen';
+};
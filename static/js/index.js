@@ -0,0 +1,818 @@
+let currentPlayerName = '';
+let selectedVote = '';
+let hasVoted = false;
+let isImpostor = false;
+let isControl = false;
+let impostorGuessUsed = false;
+
+let playersShowLimit = 10;
+let impostorsShowLimit = 10;
+let playersData = [];
+let impostorsData = [];
+let leaderboardTotal = {players: 0, impostors: 0};
+
+let announceSpicyMode = true;
+
+function fetchAnnounceSpicyMode(cb) {
+    $.ajax({
+        url: '/api/status',
+        method: 'GET',
+        success: function(data) {
+            announceSpicyMode = (typeof data.announce_spicy_mode !== 'undefined') ? data.announce_spicy_mode : true;
+            if (cb) cb();
+        }
+    });
+}
+
+let statusVersion = null;
+// Zuletzt vollständig bekannter Status: der Server schickt dann nur noch Diffs seit statusVersion
+let statusState = null;
+// Chat-Cursor: nur Nachrichten nach lastChatId abholen, solange chatKey gleich bleibt
+let chatKey = null;
+let lastChatId = null;
+
+function statusParams(params) {
+    if (chatKey !== null && lastChatId !== null) {
+        params.chat_key = chatKey;
+        params.after_id = lastChatId;
+    }
+    if (statusState !== null) {
+        params.base = statusVersion;
+        params.epoch = statusState.epoch;
+    }
+    return params;
+}
+
+// Wendet einen Diff von /api/status auf den bekannten Status an (siehe diff_state im Server)
+function mergeStatusDelta(state, delta, listFields, dictFields) {
+    const merged = Object.assign({}, state);
+    const structural = ['changed', 'delta', 'base'];
+    listFields.forEach(field => structural.push(field + '_added', field + '_removed'));
+    dictFields.forEach(field => structural.push(field + '_set', field + '_removed'));
+    Object.keys(delta).forEach(key => {
+        if (!structural.includes(key)) merged[key] = delta[key];
+    });
+    Object.assign(merged, delta.changed);
+    listFields.forEach(field => {
+        const removed = delta[field + '_removed'] || [];
+        merged[field] = merged[field].filter(item => !removed.includes(item)).concat(delta[field + '_added'] || []);
+    });
+    dictFields.forEach(field => {
+        const values = Object.assign({}, merged[field], delta[field + '_set']);
+        (delta[field + '_removed'] || []).forEach(key => delete values[key]);
+        merged[field] = values;
+    });
+    merged.delta = false;
+    return merged;
+}
+
+function updateGameStatus() {
+    if (realtimeSocket && realtimeSocket.readyState === WebSocket.OPEN) {
+        // Der WebSocket-Server kennt den Stand dieses Clients und schickt den passenden Diff
+        realtimeSocket.send(JSON.stringify({type: 'status', full: statusState === null}));
+        return;
+    }
+    $.ajax({
+        url: '/api/status',
+        method: 'GET',
+        data: statusParams({}),
+        success: function(data) {
+            if (data) applyGameStatus(data);
+        },
+        error: function() {
+            console.log('Fehler beim Laden der Live-Updates');
+        }
+    });
+}
+
+// Long-Polling: der Server antwortet erst, wenn sich der Zustand seit statusVersion geändert hat.
+// Sind am Server alle Plätze belegt, antwortet er sofort mit Retry-After: dann in diesem Abstand pollen.
+function pollGameStatus() {
+    $.ajax({
+        url: '/api/status',
+        method: 'GET',
+        data: statusParams(statusVersion === null ? {} : {since: statusVersion}),
+        timeout: 40000,
+        success: function(data, textStatus, xhr) {
+            if (data) applyGameStatus(data);
+            const retryAfter = parseInt(xhr.getResponseHeader('Retry-After'), 10);
+            setTimeout(pollGameStatus, retryAfter > 0 ? retryAfter * 1000 : 0);
+        },
+        error: function() {
+            console.log('Fehler beim Laden der Live-Updates');
+            setTimeout(pollGameStatus, 2000);
+        }
+    });
+}
+
+function applyGameStatus(data) {
+    if (data.delta) {
+        if (statusState !== null && data.version <= statusVersion) return; // überholte Antwort
+        if (statusState === null || data.base !== statusVersion) {
+            // Diff passt nicht zum bekannten Stand: komplett neu laden
+            statusState = null;
+            updateGameStatus();
+            return;
+        }
+        data = mergeStatusDelta(statusState, data, ['players'], ['votes']);
+    }
+    statusState = data;
+    statusVersion = data.version;
+    window.lastStatusData = data; // Save for updatePlayersGrid
+    announceSpicyMode = (typeof data.announce_spicy_mode !== 'undefined') ? data.announce_spicy_mode : true;
+    $('#player-count').text(data.players.length);
+    $('#total-players').text(data.players.length);
+    currentPlayerName = data.player_name || '';
+    isControl = data.is_control || false;
+    impostorGuessUsed = data.impostor_guess_used || false;
+
+    if (data.can_rejoin) {
+        $('#rejoin-section').show();
+    } else {
+        $('#rejoin-section').hide();
+    }
+
+    if (isControl && data.players.length >= 3) {
+        $('#control-start-section').show();
+    } else {
+        $('#control-start-section').hide();
+    }
+
+    updateSpicyStatus(data.force_spicy, data.spicy_mode);
+    updatePlayersGrid(data.players);
+    updateStartVoteSection();
+
+    if (data.game_ended) {
+        showGameEnd(data.vote_results);
+        updateLeaderboard();
+        return;
+    } else {
+        $('#game-end-section').hide();
+    }
+
+    if (data.current_starter && data.game_started) {
+        $('#starter-name').text(data.current_starter);
+        $('#starter-section').show();
+    } else {
+        $('#starter-section').hide();
+    }
+
+    if (data.revealed && data.player_word && data.is_logged_in) {
+        showMyWord(data.player_word);
+
+        if (data.player_word.includes('IMPOSTOR')) {
+            isImpostor = true;
+            $('#impostor-guess-section').show();
+
+            if (impostorGuessUsed) {
+                $('#guess-input').prop('disabled', true);
+                $('#guess-submit').prop('disabled', true).text('Bereits geraten');
+                $('#guess-warning').text('⚠️ Du hast bereits geraten!');
+            }
+        } else {
+            isImpostor = false;
+            $('#impostor-guess-section').hide();
+        }
+    } else {
+        $('#my-word-section').hide();
+        $('#impostor-guess-section').hide();
+    }
+
+    if (data.voting_active && data.is_logged_in) {
+        showVotingSection(data.players, data.votes, data.all_voted);
+        updateVoteProgress(Object.keys(data.votes).length, data.players.length);
+
+        if (Object.keys(data.votes).length === 0) {
+            hasVoted = false;
+        }
+    } else {
+        $('#voting-section').hide();
+    }
+
+    if (data.vote_results && Object.keys(data.vote_results).length > 0 && !data.game_ended) {
+        showVoteResults(data.vote_results);
+    } else if (!data.game_ended) {
+        $('#vote-results').hide();
+    }
+
+    if (data.game_started && !data.game_ended) {
+        $('#join-section').hide();
+        $('#start-hint').hide();
+        $('#lobby-chat-container').hide();
+        $('#chat-container').show();
+
+        if (data.is_logged_in) {
+            if (data.revealed && !data.voting_active) {
+                $('#game-started-section').hide();
+                $('#revealed-section').show();
+            } else if (!data.revealed) {
+                $('#game-started-section').show();
+                $('#revealed-section').hide();
+            } else {
+                $('#game-started-section').hide();
+                $('#revealed-section').hide();
+            }
+        } else {
+            $('#game-started-section').hide();
+            $('#revealed-section').hide();
+        }
+    } else if (!data.game_ended) {
+        if (!data.is_logged_in) {
+            $('#join-section').show();
+            $('#lobby-chat-container').addClass('disabled');
+            $('#lobby-chat-disabled-message').show();
+            $('#lobby-chat-input').attr('placeholder', 'Tritt der Lobby bei, um zu chatten...');
+        } else {
+            $('#join-section').hide();
+            $('#lobby-chat-container').removeClass('disabled');
+            $('#lobby-chat-disabled-message').hide();
+            $('#lobby-chat-input').attr('placeholder', 'Schreibe eine Nachricht...');
+        }
+        $('#start-hint').show();
+        $('#game-started-section').hide();
+        $('#revealed-section').hide();
+        $('#chat-container').hide();
+        $('#lobby-chat-container').show();
+    }
+
+    if (data.game_started && !data.game_ended) {
+        updateChat(data.chat_messages, 'game', data.chat_incremental);
+    } else if (!data.game_ended) {
+        updateChat(data.chat_messages, 'lobby', data.chat_incremental);
+    }
+    if (!data.game_ended) {
+        chatKey = data.chat_key;
+        lastChatId = data.chat_last_id;
+    } else {
+        chatKey = null;
+        lastChatId = null;
+    }
+}
+
+// Nur so viele Einträge laden, wie angezeigt werden; "Mehr anzeigen" lädt die nächsten nach
+function updateLeaderboard() {
+    $.ajax({
+        url: '/api/leaderboard',
+        data: {top: Math.max(playersShowLimit, impostorsShowLimit)},
+        method: 'GET',
+        success: function(data) {
+            playersData = data.players;
+            impostorsData = data.impostors;
+            leaderboardTotal = data.total;
+
+            renderLeaderboard('players', playersData, playersShowLimit);
+            renderLeaderboard('impostors', impostorsData, impostorsShowLimit);
+        },
+        error: function() {
+            console.log('Fehler beim Laden des Leaderboards');
+        }
+    });
+}
+
+function renderLeaderboard(type, data, limit) {
+    const contentId = type === 'players' ? 'players-leaderboard-content' : 'impostors-leaderboard-content';
+    const mobileContentId = type === 'players' ? 'mobile-players-content' : 'mobile-impostors-content';
+    const showMoreId = type === 'players' ? 'show-more-players' : 'show-more-impostors';
+    const mobileShowMoreId = type === 'players' ? 'mobile-show-more-players' : 'mobile-show-more-impostors';
+
+    let html = '';
+    const displayData = data.slice(0, limit);
+
+    displayData.forEach((entry, index) => {
+        let topClass = '';
+        let trophy = '🏆';
+
+        if (index === 0) {
+            topClass = 'top-1';
+            trophy = '🥇';
+        } else if (index === 1) {
+            topClass = 'top-2';
+            trophy = '🥈';
+        } else if (index === 2) {
+            topClass = 'top-3';
+            trophy = '🥉';
+        }
+
+        html += `
+            <div class="leaderboard-entry ${topClass}">
+                <span class="leaderboard-name">${entry.name}</span>
+                <span class="leaderboard-wins">
+                    <span class="trophy">${trophy}</span>
+                    ${entry.wins}
+                </span>
+            </div>
+        `;
+    });
+
+    $('#' + contentId).html(html);
+
+    $('#' + mobileContentId).html(html);
+
+    if (leaderboardTotal[type] > limit && data.length >= limit) {
+        $('#' + showMoreId).show();
+        $('#' + mobileShowMoreId).show();
+    } else {
+        $('#' + showMoreId).hide();
+        $('#' + mobileShowMoreId).hide();
+    }
+}
+
+$('#show-more-players, #mobile-show-more-players').click(function() {
+    playersShowLimit += 10;
+    updateLeaderboard();
+});
+
+$('#show-more-impostors, #mobile-show-more-impostors').click(function() {
+    impostorsShowLimit += 10;
+    updateLeaderboard();
+});
+
+function showGameEnd(voteResults) {
+    $('#game-end-section').show();
+
+    $('#spicy-status').hide();
+    $('#starter-section').hide();
+    $('#my-word-section').hide();
+    $('#impostor-guess-section').hide();
+    $('#voting-section').hide();
+    $('#vote-results').hide();
+    $('#join-section').hide();
+    $('#game-started-section').hide();
+    $('#revealed-section').hide();
+    $('#players-section').hide();
+    $('#chat-container').hide();
+    $('#lobby-chat-container').hide();
+    $('#start-hint').hide();
+
+    let endContent = $('#game-end-content');
+    let endTitle = $('#game-end-title');
+    let endWord = $('#game-end-word');
+    let endMessage = $('#game-end-message');
+
+    if (voteResults.impostor_won) {
+        endContent.removeClass('victory defeat').addClass('impostor-win');
+        endTitle.text('🎭 IMPOSTOR GEWINNT! 🎭');
+        endWord.text(voteResults.winning_word);
+        endMessage.html(`<strong>${voteResults.impostor}</strong> hat das Wort erraten!<br>
+                       <strong class="guess-right">Geraten: "${voteResults.guessed_word}"</strong><br>
+                       <strong class="guess-right">Richtig war: "${voteResults.actual_word}"</strong><br>
+                       Der Impostor hat gewonnen!`);
+    } else if (voteResults.impostor_failed) {
+        endContent.removeClass('defeat impostor-win').addClass('victory');
+        endTitle.text('🎉 SPIELER GEWINNEN! 🎉');
+        endWord.text(voteResults.winning_word);
+        endMessage.html(`<strong>${voteResults.impostor}</strong> hat falsch geraten!<br>
+                       <strong class="guess-wrong">Geraten: "${voteResults.guessed_word}"</strong><br>
+                       <strong class="guess-right">Richtig war: "${voteResults.actual_word}"</strong><br>
+                       Die Spieler haben gewonnen!`);
+    } else if (voteResults.is_impostor) {
+        endContent.removeClass('defeat impostor-win').addClass('victory');
+        endTitle.text('🎉 IMPOSTOR GEFUNDEN! 🎉');
+        endWord.text(voteResults.winning_word);
+        endMessage.html(`<strong>${voteResults.voted_out}</strong> war der Impostor!<br>Die Spieler haben gewonnen!`);
+    } else {
+        endContent.removeClass('victory impostor-win').addClass('defeat');
+        endTitle.text('😈 IMPOSTOR GEWINNT! 😈');
+        endWord.text(voteResults.winning_word);
+        endMessage.html(`<strong>${voteResults.voted_out}</strong> war unschuldig!<br>Der Impostor hat gewonnen!`);
+    }
+}
+
+function updateVoteProgress(votedCount, totalPlayers) {
+    $('#vote-count').text(votedCount);
+    $('#total-players').text(totalPlayers);
+
+    if (votedCount >= totalPlayers) {
+        $('#vote-progress').html('<strong>✅ Alle haben gevoted - Auswertung läuft...</strong>');
+    }
+}
+
+function updateSpicyStatus(forceSpicy, spicyMode) {
+    if (!announceSpicyMode) {
+        $('#spicy-status').hide();
+        return;
+    }
+    if (forceSpicy) {
+        $('#spicy-status').removeClass('mixed').addClass('spicy-status').show();
+        $('#spicy-text').text('NUR SPICY WÖRTER 🔥');
+    } else if (spicyMode) {
+        $('#spicy-status').removeClass('spicy-status').addClass('spicy-status mixed').show();
+        $('#spicy-text').text('NORMAL + SPICY WÖRTER');
+    } else {
+        $('#spicy-status').hide();
+    }
+}
+
+function showMyWord(playerWord) {
+    $('#my-word-section').show();
+    let wordDisplay = $('#my-word-display');
+
+    if (playerWord.includes('IMPOSTOR')) {
+        wordDisplay.addClass('impostor').text('🎭 IMPOSTOR');
+    } else {
+        wordDisplay.removeClass('impostor').text(playerWord.replace('Dein Wort: ', ''));
+    }
+}
+
+function showVotingSection(players, votes, allVoted) {
+    $('#voting-section').show();
+    let html = '';
+
+    players.forEach(function(player) {
+        if (player !== currentPlayerName) {
+            let selectedClass = selectedVote === player ? 'selected' : '';
+            let disabledClass = (hasVoted || allVoted) ? 'disabled' : '';
+            html += `<div class="vote-option ${selectedClass} ${disabledClass}" data-player="${player}">${player}</div>`;
+        }
+    });
+
+    $('#vote-grid').html(html);
+
+    if (!hasVoted && !allVoted) {
+        $('.vote-option:not(.disabled)').click(function() {
+            $('.vote-option').removeClass('selected');
+            $(this).addClass('selected');
+            selectedVote = $(this).data('player');
+        });
+    }
+
+    if (hasVoted || allVoted) {
+        $('#submit-vote').prop('disabled', true).text('Stimme abgegeben');
+    } else {
+        $('#submit-vote').prop('disabled', false).text('Stimme abgeben');
+    }
+}
+
+function showVoteResults(results) {
+    $('#vote-results').show();
+    let html = '';
+
+    if (results.tie) {
+        html = `<p><strong>Gleichstand!</strong> Folgende Spieler haben gleich viele Stimmen erhalten:</p>
+               <p>${results.tied_players.join(', ')}</p>
+               <p>Das Spiel geht weiter!</p>`;
+    } else if (results.no_votes) {
+        html = '<p>Keine Stimmen abgegeben. Das Spiel geht weiter!</p>';
+    } else if (results.voted_out && !results.game_ended) {
+        let resultText = results.is_impostor ? 
+            `<span style="color: #e74c3c;">🎭 ${results.voted_out} war der IMPOSTOR! Ihr habt gewonnen!</span>` :
+            `<span style="color: #3498db;">😇 ${results.voted_out} war UNSCHULDIG! Der Impostor ist noch da!</span>`;
+
+        html = `<p><strong>${results.voted_out}</strong> wurde rausgewählt!</p>
+               <p>${resultText}</p>`;
+
+        html += '<h4>Stimmenverteilung:</h4><ul>';
+        for (let [player, count] of Object.entries(results.votes)) {
+            html += `<li>${player}: ${count} Stimme(n)</li>`;
+        }
+        html += '</ul>';
+    }
+
+    $('#results-content').html(html);
+}
+
+function updatePlayersGrid(players) {
+    let html = '';
+    // Determine voting context
+    let votingType = null;
+    let votedPlayers = [];
+    if (window.lastStatusData) {
+        if (!window.lastStatusData.game_started && window.lastStatusData.start_votes) {
+            votingType = 'start';
+            votedPlayers = window.lastStatusData.start_votes;
+        } else if (window.lastStatusData.voting_active && window.lastStatusData.votes) {
+            votingType = 'impostor';
+            votedPlayers = Object.keys(window.lastStatusData.votes);
+        }
+    }
+    players.forEach(function(player) {
+        let kickButton = '';
+        let isCurrent = player === currentPlayerName;
+        let playerLabel = isCurrent ? player + ' <span style="font-size:0.95em;">(Du)</span>' : player;
+        let extraClass = isCurrent ? ' current-player' : '';
+        if (isControl && !isCurrent) {
+            kickButton = `<button class="kick-button" onclick="kickPlayer('${player}')" title="Spieler kicken">×</button>`;
+        }
+        let votedBadge = '';
+        if (votingType === 'start' && players.length >= 3) {
+            let hasVoted = votedPlayers.includes(player);
+            votedBadge = `<span class="voted-badge">Voted: ${hasVoted ? '✅' : '🕒'}</span>`;
+        } else if (votingType === 'impostor') {
+            let hasVoted = votedPlayers.includes(player);
+            votedBadge = `<span class="voted-badge">Voted: ${hasVoted ? '✅' : '🕒'}</span>`;
+        }
+        html += `<div class="player-card${extraClass}">${playerLabel}${kickButton}${votedBadge}</div>`;
+    });
+    $('#players-grid').html(html);
+}
+
+function updateChat(messages, chatType, incremental) {
+    if (incremental && messages.length === 0) {
+        return;
+    }
+    let html = '';
+    messages.forEach(function(msg) {
+        let isOwn = msg.player === currentPlayerName;
+        let isEvent = msg.is_event || msg.player === 'SYSTEM';
+        let messageClass = isOwn ? 'chat-message own' : (isEvent ? 'chat-message event' : 'chat-message');
+        let playerClass = isEvent ? 'chat-player event' : 'chat-player';
+        let timeClass = isEvent ? 'chat-time event' : 'chat-time';
+
+        if (isEvent) {
+            html += `
+                <div class="${messageClass}">
+                    <span class="${timeClass}">${msg.timestamp}</span>
+                    ${msg.message}
+                </div>
+            `;
+        } else {
+            html += `
+                <div class="${messageClass}">
+                    <span class="${timeClass}">${msg.timestamp}</span>
+                    <span class="${playerClass}">${msg.player}:</span>
+                    ${msg.message}
+                </div>
+            `;
+        }
+    });
+
+    let chatContainer = chatType === 'lobby' ? $('#lobby-chat-messages') : $('#chat-messages');
+    let wasAtBottom = chatContainer[0].scrollHeight - chatContainer.scrollTop() <= chatContainer.outerHeight() + 50;
+
+    if (incremental) {
+        chatContainer.append(html);
+    } else {
+        chatContainer.html(html);
+    }
+
+    if (wasAtBottom) {
+        chatContainer.scrollTop(chatContainer[0].scrollHeight);
+    }
+}
+
+function sendMessage() {
+    let message = $('#chat-input').val().trim();
+    if (message) {
+        $.post('/send_message', {message: message}, function(data) {
+            if (data.success) {
+                $('#chat-input').val('');
+            }
+        });
+    }
+}
+
+function sendLobbyMessage() {
+    // Don't send if not logged in
+    if (!currentPlayerName) {
+        return;
+    }
+
+    let message = $('#lobby-chat-input').val().trim();
+    if (message) {
+        $.post('/send_message', {message: message}, function(data) {
+            if (data.success) {
+                $('#lobby-chat-input').val('');
+            }
+        });
+    }
+}
+
+function submitVote() {
+    if (selectedVote && !hasVoted) {
+        $.post('/vote', {voted_player: selectedVote}, function(data) {
+            if (data.success) {
+                hasVoted = true;
+                $('#submit-vote').prop('disabled', true).text('Stimme abgegeben');
+                $('.vote-option').addClass('disabled');
+            }
+        });
+    } else if (hasVoted) {
+        alert('Du hast bereits gevoted!');
+    } else {
+        alert('Bitte wähle einen Spieler aus!');
+    }
+}
+
+function submitGuess() {
+    if (!isImpostor) {
+        alert('Nur der Impostor kann das Wort erraten!');
+        return;
+    }
+
+    let guessedWord = $('#guess-input').val().trim();
+    if (!guessedWord) {
+        alert('Bitte gib ein Wort ein!');
+        return;
+    }
+
+    $.post('/guess_word', {guessed_word: guessedWord}, function(data) {
+        if (data.success) {
+            if (data.correct) {
+                alert('🎉 ' + data.message);
+                $('#guess-input').val('').prop('disabled', true);
+                $('#guess-submit').prop('disabled', true).text('Bereits geraten');
+                $('#guess-warning').text('⚠️ Du hast bereits geraten!');
+            } else {
+                alert('❌ ' + data.message);
+                $('#guess-input').val('').prop('disabled', true);
+                $('#guess-submit').prop('disabled', true).text('Bereits geraten');
+                $('#guess-warning').text('⚠️ Du hast bereits geraten!');
+            }
+        } else {
+            alert('Fehler: ' + data.error);
+        }
+    });
+}
+
+$('#chat-send').click(sendMessage);
+$('#chat-input').keypress(function(e) {
+    if (e.which === 13) {
+        sendMessage();
+    }
+});
+
+$('#lobby-chat-send').click(sendLobbyMessage);
+$('#lobby-chat-input').keypress(function(e) {
+    if (e.which === 13) {
+        sendLobbyMessage();
+    }
+});
+
+$('#submit-vote').click(submitVote);
+
+$('#guess-submit').click(submitGuess);
+$('#guess-input').keypress(function(e) {
+    if (e.which === 13) {
+        submitGuess();
+    }
+});
+
+function kickPlayer(playerName) {
+    if (confirm(`Spieler ${playerName} wirklich kicken?`)) {
+        $.post('/kick_player', {player_name: playerName}, function(data) {
+            if (data.success) {
+                alert(data.message);
+                updateGameStatus();
+            } else {
+                alert('Fehler: ' + data.error);
+            }
+        });
+    }
+}
+
+// WebSocket-Modus (REALTIME_PORT am Server): Status-Diffs, Leaderboard und Kicks kommen über eine Verbindung.
+// Ohne WebSocket-Server oder wenn die Verbindung abbricht, geht es mit Server-Sent Events weiter.
+let realtimeSocket = null;
+
+function startRealtime() {
+    const port = document.body.dataset.realtimePort;
+    if (!port || !window.WebSocket) {
+        startEventStream();
+        return;
+    }
+    const scheme = window.location.protocol === 'https:' ? 'wss://' : 'ws://';
+    let opened = false;
+    realtimeSocket = new WebSocket(scheme + window.location.hostname + ':' + port + '/ws');
+    realtimeSocket.onopen = function() {
+        opened = true;
+        updateLeaderboard();
+    };
+    realtimeSocket.onmessage = function(e) {
+        const message = JSON.parse(e.data);
+        if (message.type === 'status') {
+            applyGameStatus(message.data);
+        } else if (message.type === 'leaderboard') {
+            updateLeaderboard();
+        } else if (message.type === 'kicked') {
+            showKickedModal();
+        } else if (message.type === 'room_closed') {
+            window.location.reload();
+        }
+    };
+    realtimeSocket.onclose = function() {
+        realtimeSocket = null;
+        // der Server-Cursor ist weg: nach einem Wechsel auf SSE komplett neu laden
+        statusState = null;
+        if (opened) {
+            setTimeout(startRealtime, 2000);
+        } else {
+            startEventStream();
+        }
+    };
+}
+
+// Server-Sent Events: Status, Leaderboard und Kicks werden gepusht, der Stream hält auch den Heartbeat.
+// Ohne EventSource-Support oder wenn der Stream endgültig scheitert, wird wie bisher gepollt.
+let eventStream = null;
+let pollingStarted = false;
+
+function startEventStream() {
+    if (!window.EventSource) {
+        startPolling();
+        return;
+    }
+    eventStream = new EventSource('/api/stream');
+    eventStream.addEventListener('hello', function() {
+        updateGameStatus();
+        updateLeaderboard();
+    });
+    eventStream.addEventListener('state', function(e) {
+        if (JSON.parse(e.data).version !== statusVersion) {
+            updateGameStatus();
+        }
+    });
+    eventStream.addEventListener('leaderboard', updateLeaderboard);
+    eventStream.addEventListener('kicked', showKickedModal);
+    eventStream.addEventListener('room_closed', function() {
+        window.location.reload();
+    });
+    eventStream.onerror = function() {
+        if (eventStream.readyState === EventSource.CLOSED) {
+            eventStream = null;
+            startPolling();
+        }
+    };
+}
+
+function startPolling() {
+    if (pollingStarted) return;
+    pollingStarted = true;
+    pollGameStatus();
+    updateLeaderboard();
+    setInterval(updateLeaderboard, 10000);
+    setInterval(checkIfKicked, 2000);
+}
+
+$(document).ready(function() {
+    startRealtime();
+});
+
+function updateStartVoteSection() {
+    $.get('/api/start_votes', function(data) {
+        if (!data.game_started && data.players.length >= 3 && currentPlayerName && data.players.includes(currentPlayerName)) {
+            let alreadyVoted = data.votes.includes(currentPlayerName);
+            let voteCount = data.votes.length;
+            let total = data.players.length;
+            let buttonHtml = '';
+            if (!alreadyVoted) {
+                buttonHtml = `<button id="start-vote-btn" class="vote-button vibrant-vote-btn" style="margin-top:10px;">🟢 Für Spielstart stimmen</button>`;
+            } else {
+                buttonHtml = `<span class="voted-info">Du hast für den Start gestimmt!</span>`;
+            }
+            $('#start-vote-section').html(`
+                <div class="start-vote-card">
+                    <b>Abstimmung: Spiel starten</b><br>
+                    <span class="vote-progress-info">${voteCount} / ${total} Spieler haben für den Start gestimmt.</span><br>
+                    ${buttonHtml}
+                </div>
+            `).show();
+            if (!alreadyVoted) {
+                $('#start-vote-btn').off('click').on('click', function() {
+                    $.post('/start_vote', function(resp) {
+                        updateStartVoteSection();
+                    });
+                });
+            }
+        } else {
+            $('#start-vote-section').hide();
+        }
+    });
+}
+
+$('.control-start-button').css('text-decoration', 'none');
+
+function showKickedModal() {
+    $('#kicked-modal').fadeIn(200);
+    setTimeout(function() {
+        window.location.reload();
+    }, 1200);
+}
+
+function checkIfKicked() {
+    $.get('/api/am_i_kicked', function(data) {
+        if (data.was_kicked) {
+            showKickedModal();
+        }
+    });
+}
+
+// Dark mode toggle logic
+function setDarkMode(enabled) {
+    if (enabled) {
+        document.body.classList.add('dark-mode');
+        document.getElementById('dark-mode-toggle').textContent = '☀️';
+    } else {
+        document.body.classList.remove('dark-mode');
+        document.getElementById('dark-mode-toggle').textContent = '🌙';
+    }
+    localStorage.setItem('darkMode', enabled ? '1' : '0');
+}
+document.getElementById('dark-mode-toggle').onclick = function() {
+    setDarkMode(!document.body.classList.contains('dark-mode'));
+};
+// On page load, apply saved preference
+(function() {
+    const saved = localStorage.getItem('darkMode');
+    if (saved === '1') setDarkMode(true);
+    else setDarkMode(false);
+})();